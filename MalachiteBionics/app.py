@@ -28,6 +28,8 @@ except ImportError:
         def send_trading_alert_notification(self, **kwargs):
             return False
 
+from symbol_index import symbol_index
+
 # Load environment variables
 load_dotenv()
 
@@ -102,6 +104,15 @@ stripe.api_key = os.environ.get('STRIPE_SECRET_KEY', 'sk_test_fallback')
 STRIPE_PUBLISHABLE_KEY = os.environ.get('STRIPE_PUBLISHABLE_KEY', 'pk_test_fallback')
 STRIPE_WEBHOOK_SECRET = os.environ.get('STRIPE_WEBHOOK_SECRET', 'whsec_fallback')
 
+# Exchange used to check that selected coins actually trade (same as the bot)
+BINANCE_API_URL = os.environ.get('BINANCE_API_URL', 'https://api.binance.com')
+
+def get_unsupported_coins(coins):
+    """Coins without a tradable USDT pair on Binance (empty until the index first loads)"""
+    # The exchangeInfo download runs on a background thread - requests only read the index
+    symbol_index.refresh_in_background(BINANCE_API_URL)
+    return symbol_index.invalid_coins(coins)
+
 # User model
 class User(UserMixin, db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -2297,6 +2308,10 @@ def create_checkout_session():
         if len(coins) != 2:
             return jsonify({'error': 'Please select exactly 2 cryptocurrencies'}), 400
         
+        unsupported = get_unsupported_coins(coins)
+        if unsupported:
+            return jsonify({'error': f'Not available for trading: {", ".join(unsupported)}'}), 400
+        
         # Define pricing (in pence - GBP)
         prices = {
             'v3': 299,    # £2.99
@@ -2797,6 +2812,11 @@ def admin_update_user_subscription(user_id):
             flash('Non-elite plans are limited to 2 cryptocurrency pairs.', 'error')
             return redirect(url_for('admin_user_detail', user_id=user_id))
         
+        unsupported = get_unsupported_coins(coins)
+        if unsupported:
+            flash(f'No tradable USDT pair on Binance for: {", ".join(unsupported)}.', 'error')
+            return redirect(url_for('admin_user_detail', user_id=user_id))
+        
         # Find or create subscription
         subscription = Subscription.query.filter_by(user_id=user_id, status='active').first()
         if not subscription:
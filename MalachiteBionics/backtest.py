@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Historical backtest for the website trading bot strategies
+Replays hourly candles from the candle store through the registered
+strategies as whole arrays - indicators, signals and forward returns for
+every candle of a batch of symbols at once, never candle by candle
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import logging
+import numpy as np
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from candle_store import CandleStore
+from indicators import IndicatorValues, batch_momentum, batch_rsi, rolling_macd_histogram, stack_closes
+from market_data import INTERVAL_MS, KlineCache
+from strategies import ANALYSIS_CANDLES, BUY, SELL, STRATEGIES
+
+logger = logging.getLogger("backtest")
+
+DEFAULT_HORIZONS = (1, 4, 24)  # Candles after the signal
+DEFAULT_BATCH_SIZE = 64  # Symbols per indicator matrix
+
+# The bot skips symbols with fewer than 30 rows (29 closed + the forming one)
+WARMUP_CANDLES = 29
+
+def indicator_series(closes: np.ndarray, window: int = ANALYSIS_CANDLES) -> IndicatorValues:
+    """RSI, MACD histogram and momentum at every candle, as the live bot computes them"""
+    return IndicatorValues(batch_rsi(closes), rolling_macd_histogram(closes, window), batch_momentum(closes))
+
+def forward_returns(closes: np.ndarray, horizon: int) -> np.ndarray:
+    """Return from each candle's close to the close ``horizon`` candles later (NaN past the end)"""
+    out = np.full(closes.shape, np.nan)
+    if horizon < closes.shape[1]:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            out[:, :-horizon] = closes[:, horizon:] / closes[:, :-horizon] - 1
+    return out
+
+def iter_batches(store: CandleStore, symbols: Sequence[str], interval: str = "1h",
+                 start_time: Optional[int] = None, end_time: Optional[int] = None,
+                 batch_size: int = DEFAULT_BATCH_SIZE) -> Iterator[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    """Right-aligned (closes, timestamps, valid) matrices for batches of stored symbols.
+
+    ``valid`` marks candles where the symbol has the bot's minimum history.
+    Symbols with too little stored history are skipped.
+    """
+    for batch_start in range(0, len(symbols), batch_size):
+        columns = [store.read_arrays(symbol, interval, start_time=start_time, end_time=end_time)
+                   for symbol in symbols[batch_start:batch_start + batch_size]]
+        columns = [c for c in columns if c is not None and len(c["close"]) > WARMUP_CANDLES]
+        if not columns:
+            continue
+        closes = stack_closes([c["close"] for c in columns])
+        timestamps = stack_closes([c["timestamp"] for c in columns])
+        length = closes.shape[1]
+        position = np.arange(length) - (length - (~np.isnan(closes)).sum(axis=1))[:, None]
+        yield closes, timestamps, position >= WARMUP_CANDLES - 1
+
+class StrategyStats:
+    """Running signal counts, hit rates and timing for one strategy"""
+
+    def __init__(self, name: str, horizons: Sequence[int]):
+        self.name = name
+        self.horizons = tuple(horizons)
+        self.candles = 0
+        self.signals = {BUY: 0, SELL: 0}
+        self.onsets = {BUY: 0, SELL: 0}
+        self.evaluated = {code: np.zeros(len(horizons), dtype=np.int64) for code in (BUY, SELL)}
+        self.hits = {code: np.zeros(len(horizons), dtype=np.int64) for code in (BUY, SELL)}
+        self.returns = {code: np.zeros(len(horizons)) for code in (BUY, SELL)}
+        self.by_hour = np.zeros(24, dtype=np.int64)
+        self.gaps: List[np.ndarray] = []
+
+    def add(self, codes: np.ndarray, valid: np.ndarray, timestamps: np.ndarray, returns: List[np.ndarray]):
+        self.candles += int(valid.sum())
+        codes = np.where(valid, codes, 0)
+        previous = np.zeros_like(codes)
+        previous[:, 1:] = codes[:, :-1]
+        onset = (codes != 0) & (codes != previous)  # First candle of a run of the same signal
+
+        for code in (BUY, SELL):
+            mask = codes == code
+            self.signals[code] += int(mask.sum())
+            self.onsets[code] += int((onset & mask).sum())
+            for i, forward in enumerate(returns):
+                # A hit is a move in the signalled direction
+                moves = forward[mask]
+                moves = moves[~np.isnan(moves)] * code
+                self.evaluated[code][i] += len(moves)
+                self.hits[code][i] += int((moves > 0).sum())
+                self.returns[code][i] += float(moves.sum())
+
+        onset_rows, onset_cols = np.nonzero(onset)
+        onset_times = timestamps[onset_rows, onset_cols].astype(np.int64)
+        self.by_hour += np.bincount(onset_times // INTERVAL_MS["1h"] % 24, minlength=24)
+        same_symbol = onset_rows[1:] == onset_rows[:-1]
+        self.gaps.append(np.diff(onset_times)[same_symbol])
+
+    def summary(self) -> Dict:
+        gaps = np.concatenate(self.gaps) if self.gaps else np.empty(0)
+        result = {"strategy": self.name, "candles": self.candles,
+                  "median_gap_hours": float(np.median(gaps) / INTERVAL_MS["1h"]) if len(gaps) else None,
+                  "onsets_by_hour": self.by_hour.tolist()}
+        for code, label in ((BUY, "buy"), (SELL, "sell")):
+            evaluated = self.evaluated[code]
+            with np.errstate(divide="ignore", invalid="ignore"):
+                hit_rate = self.hits[code] / evaluated
+                mean_return = self.returns[code] / evaluated
+            result[label] = {
+                "signals": self.signals[code],
+                "onsets": self.onsets[code],
+                "hit_rate": {str(h): None if n == 0 else float(r) for h, n, r in zip(self.horizons, evaluated, hit_rate)},
+                "mean_return": {str(h): None if n == 0 else float(r) for h, n, r in zip(self.horizons, evaluated, mean_return)},
+            }
+        return result
+
+def run_backtest(store: CandleStore, symbols: Sequence[str], strategies: Sequence[str],
+                 interval: str = "1h", horizons: Sequence[int] = DEFAULT_HORIZONS,
+                 start_time: Optional[int] = None, end_time: Optional[int] = None,
+                 window: int = ANALYSIS_CANDLES, batch_size: int = DEFAULT_BATCH_SIZE) -> Dict:
+    """Signal counts, forward-return hit rates and timing per strategy over stored history.
+
+    Signals are taken at each candle's close, once the symbol has the bot's
+    minimum history. Gaps in the stored candles are not filled - rows are
+    treated as consecutive, like the live bot's kline frames.
+    """
+    stats = {name: StrategyStats(name, horizons) for name in strategies}
+    symbols_used = 0
+    total_candles = 0
+    for closes, timestamps, valid in iter_batches(store, symbols, interval, start_time, end_time, batch_size):
+        symbols_used += len(closes)
+        total_candles += int((~np.isnan(closes)).sum())
+
+        indicators = indicator_series(closes, window)
+        returns = [forward_returns(closes, horizon) for horizon in horizons]
+        for name in strategies:
+            strategy = STRATEGIES[name]
+            codes = strategy.predict(**{indicator: getattr(indicators, indicator) for indicator in strategy.indicators})
+            stats[name].add(codes, valid, timestamps, returns)
+    return {"symbols": symbols_used, "candles": total_candles, "interval": interval,
+            "horizons": list(horizons), "strategies": [stats[name].summary() for name in strategies]}
+
+async def fetch_history(store: CandleStore, symbols: Sequence[str], interval: str, since: int) -> Dict[str, int]:
+    """Backfill the store from the exchange (BINANCE_API_URL); candles written per symbol"""
+    from website_trading_bot import WebsiteTradingBot  # Only the backfill needs the bot's HTTP client
+
+    bot = WebsiteTradingBot(streaming=False)
+    cache = KlineCache(bot.fetch_klines, store=store)
+    written = {}
+    try:
+        for symbol in symbols:
+            written[symbol] = await cache.download_history(symbol, interval, since)
+            logger.info(f"{symbol}: {written[symbol]} {interval} candles written")
+    finally:
+        await bot.close_http_session()
+    return written
+
+def parse_date(value: str) -> int:
+    """YYYY-MM-DD (UTC) to epoch milliseconds"""
+    return int(datetime.strptime(value, "%Y-%m-%d").replace(tzinfo=timezone.utc).timestamp() * 1000)
+
+def format_rate(value: Optional[float]) -> str:
+    return "    -" if value is None else f"{value * 100:5.1f}"
+
+def print_report(result: Dict, seconds: float):
+    horizons = result["horizons"]
+    print(f"{result['symbols']} symbols, {result['candles']} {result['interval']} candles in {seconds:.2f}s")
+    header = "  ".join(f"hit@{h:<3}" for h in horizons)
+    print(f"{'strategy':<9} {'side':<4} {'signals':>9} {'onsets':>8}  {header}  median gap")
+    for summary in result["strategies"]:
+        gap = summary["median_gap_hours"]
+        for side in ("buy", "sell"):
+            side_stats = summary[side]
+            rates = "  ".join(f"{format_rate(side_stats['hit_rate'][str(h)])}%" for h in horizons)
+            gap_text = f"{gap:.0f}h" if gap is not None and side == "buy" else ""
+            print(f"{summary['strategy']:<9} {side:<4} {side_stats['signals']:>9} {side_stats['onsets']:>8}  {rates}  {gap_text}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--store", default=os.environ.get("CANDLE_STORE_DIR") or os.path.join(os.path.dirname(os.path.abspath(__file__)), "candle_data"),
+                        help="candle store directory (default: CANDLE_STORE_DIR or ./candle_data)")
+    parser.add_argument("--symbols", nargs="*", help="symbols to replay (default: every stored symbol)")
+    parser.add_argument("--strategies", nargs="*", default=list(STRATEGIES), choices=list(STRATEGIES))
+    parser.add_argument("--interval", default="1h")
+    parser.add_argument("--start", type=parse_date, help="first day, YYYY-MM-DD")
+    parser.add_argument("--end", type=parse_date, help="last day, YYYY-MM-DD")
+    parser.add_argument("--horizons", type=int, nargs="+", default=list(DEFAULT_HORIZONS))
+    parser.add_argument("--window", type=int, default=ANALYSIS_CANDLES, help="closed candles per analysis")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--json", help="also write the results to this file")
+    parser.add_argument("--fetch", action="store_true", help="backfill the store for --symbols from the exchange instead "
+                                                                   "(safe while the bot writes to the same store)")
+    parser.add_argument("--since", type=parse_date, help="with --fetch, first day to download, YYYY-MM-DD")
+    args = parser.parse_args()
+
+    if args.fetch:
+        if not args.symbols or args.since is None:
+            sys.exit("--fetch needs --symbols and --since")
+        written = asyncio.run(fetch_history(CandleStore(args.store), args.symbols, args.interval, args.since))
+        print(f"Wrote {sum(written.values())} {args.interval} candles for {len(written)} symbols to {args.store}")
+        return
+
+    if not os.path.isdir(args.store):
+        sys.exit(f"No candle store at {args.store}")
+    store = CandleStore(args.store)
+    symbols = args.symbols or store.symbols(args.interval)
+    if not symbols:
+        sys.exit(f"No {args.interval} candles stored in {args.store}")
+
+    started = time.perf_counter()
+    result = run_backtest(store, symbols, args.strategies, args.interval, args.horizons,
+                          args.start, args.end, args.window, args.batch_size)
+    print_report(result, time.perf_counter() - started)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"Results written to {args.json}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""
+HTTP load test for the Flask app
+Seeds a SQLite database with users, subscriptions and trading alerts
+(100k users and 10M alerts by default), starts the app locally, logs in
+simulated users and drives concurrent traffic at the dashboard, alert and
+admin pages, reporting p50/p95/p99 latency and SQL queries per request
+"""
+
+import os
+import sys
+import json
+import time
+import uuid
+import random
+import socket
+import asyncio
+import sqlite3
+import argparse
+import tempfile
+import subprocess
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+import aiohttp
+from werkzeug.security import generate_password_hash
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+DEFAULT_USERS = 100_000
+DEFAULT_ALERTS = 10_000_000
+DEFAULT_SESSIONS = 100  # Customers logged in for the run
+DEFAULT_CONCURRENCY = 16
+DEFAULT_DURATION = 60  # seconds
+PASSWORD = "load-test-password"
+PLANS = ("v3", "v6", "v9", "elite")
+COINS = ("SOL", "RAY", "BTC", "ETH", "BNB", "XRP", "ADA", "DOGE")
+ALERT_HISTORY_DAYS = 30
+SEED_CHUNK = 100_000
+
+# Path -> (who requests it, relative weight in the traffic mix)
+ENDPOINTS = {
+    "/dashboard": ("customer", 4),
+    "/alerts": ("customer", 3),
+    "/api/alerts/recent": ("customer", 8),
+    "/admin": ("admin", 1),
+    "/admin/alerts": ("admin", 1),
+    "/admin/bot-status": ("admin", 1),
+}
+
+# Creates the schema: importing app runs its create_tables()
+SCHEMA = "import app"
+
+# Serves the app and reports each request's SQL statement count in a header
+SERVER = """
+import sys
+from flask import g, has_request_context
+from sqlalchemy import event
+from werkzeug.serving import make_server
+import app as webapp
+
+with webapp.app.app_context():
+    engine = webapp.db.engine
+
+@event.listens_for(engine, "before_cursor_execute")
+def count_query(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context():
+        g.query_count = g.get("query_count", 0) + 1
+
+@webapp.app.after_request
+def report_queries(response):
+    response.headers["X-Query-Count"] = str(g.get("query_count", 0))
+    return response
+
+make_server("127.0.0.1", int(sys.argv[1]), webapp.app, threaded=True).serve_forever()
+"""
+
+def app_env(db_path: str) -> Dict[str, str]:
+    return dict(os.environ, DATABASE_URL=f"sqlite:///{os.path.abspath(db_path)}", PYTHONDONTWRITEBYTECODE="1")
+
+def is_seeded(db_path: str, users: int, alerts: int) -> bool:
+    if not os.path.exists(db_path):
+        return False
+    with sqlite3.connect(db_path) as connection:
+        try:
+            counts = [connection.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0] for table in ("user", "trading_alert")]
+        except sqlite3.OperationalError:
+            return False
+    return counts == [users, alerts]
+
+def seed_database(db_path: str, users: int, alerts: int, seed: int = 42):
+    """User 1 is the admin; everyone else has an active subscription and a share of the alerts"""
+    if os.path.exists(db_path):
+        os.remove(db_path)
+    subprocess.run([sys.executable, "-c", SCHEMA], cwd=ROOT, env=app_env(db_path),
+                   check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    rng = random.Random(seed)
+    password_hash = generate_password_hash(PASSWORD)  # One hash for everyone - hashing is deliberately slow
+    now = datetime.utcnow()
+    connection = sqlite3.connect(db_path)
+    connection.execute("PRAGMA journal_mode = OFF")
+    connection.execute("PRAGMA synchronous = OFF")
+
+    connection.executemany(
+        "INSERT INTO user (id, uuid, email, display_name, password_hash, email_verified, login_count, is_admin, "
+        "created_at, last_seen, is_active, bot_status, push_notifications_enabled) "
+        "VALUES (?, ?, ?, ?, ?, 1, 0, ?, ?, ?, 1, ?, 0)",
+        ((i, str(uuid.UUID(int=i)), f"user{i}@example.com", f"User {i}", password_hash, int(i == 1),
+          str(now - timedelta(days=rng.uniform(0, 365))), str(now), "online" if rng.random() < 0.5 else "offline")
+         for i in range(1, users + 1))
+    )
+    connection.executemany(
+        "INSERT INTO subscription (user_id, plan_type, coins, status, created_at, updated_at) "
+        "VALUES (?, ?, ?, 'active', ?, ?)",
+        ((i, PLANS[i % len(PLANS)], json.dumps(rng.sample(COINS, 2)), str(now), str(now)) for i in range(2, users + 1))
+    )
+    connection.commit()
+
+    history = ALERT_HISTORY_DAYS * 86400
+    for start in range(0, alerts, SEED_CHUNK):
+        rows = []
+        for _ in range(min(SEED_CHUNK, alerts - start)):
+            created = now - timedelta(seconds=rng.uniform(0, history))
+            alert_type = "buy" if rng.random() < 0.5 else "sell"
+            coin = rng.choice(COINS)
+            rows.append((rng.randint(1, users), f"{coin}/USD", alert_type, rng.uniform(0.1, 50_000),
+                         rng.randint(80, 95), PLANS[rng.randrange(len(PLANS))],
+                         f"{alert_type.upper()} signal for {coin}USDT", int(rng.random() < 0.7),
+                         str(created), str(created + timedelta(hours=24))))
+        connection.executemany(
+            "INSERT INTO trading_alert (user_id, coin_pair, alert_type, price, confidence, algorithm, message, "
+            "is_read, created_at, expires_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows
+        )
+        connection.commit()
+        print(f"  {start + len(rows):,}/{alerts:,} alerts seeded", end="\r", flush=True)
+    connection.close()
+    print()
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def start_server(db_path: str, port: int, log: Optional[str]) -> subprocess.Popen:
+    output = open(log, "w") if log else subprocess.DEVNULL
+    server = subprocess.Popen([sys.executable, "-c", SERVER, str(port)], cwd=ROOT, env=app_env(db_path),
+                              stdout=output, stderr=subprocess.STDOUT)
+    deadline = time.monotonic() + 120
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            sys.exit(f"App exited during startup (code {server.returncode})")
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return server
+        except OSError:
+            time.sleep(0.25)
+    server.terminate()
+    sys.exit("App did not start listening within 120s")
+
+async def log_in(base_url: str, user_id: int, timeout: aiohttp.ClientTimeout) -> Optional[aiohttp.ClientSession]:
+    """A session holding the user's login cookie, or None if the login was refused"""
+    session = aiohttp.ClientSession(cookie_jar=aiohttp.CookieJar(unsafe=True), timeout=timeout)
+    async with session.post(f"{base_url}/login", allow_redirects=False,
+                            data={"email": f"user{user_id}@example.com", "password": PASSWORD}) as resp:
+        if resp.status == 302 and "/dashboard" in resp.headers.get("Location", ""):
+            return session
+    await session.close()
+    return None
+
+def percentile(values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of a sorted list"""
+    return values[min(int(fraction * len(values)), len(values) - 1)]
+
+async def drive_traffic(base_url: str, users: int, sessions: int, concurrency: int, duration: float,
+                        endpoints: List[str], timeout: float, seed: int = 7) -> Dict[str, Dict]:
+    rng = random.Random(seed)
+    client_timeout = aiohttp.ClientTimeout(total=timeout)
+    customer_ids = rng.sample(range(2, users + 1), min(sessions, users - 1))
+    started = time.perf_counter()
+    logins = await asyncio.gather(*(log_in(base_url, user_id, client_timeout) for user_id in [1] + customer_ids))
+    print(f"  {sum(s is not None for s in logins)}/{len(logins)} logins in {time.perf_counter() - started:.1f}s")
+    admin, customers = logins[0], [s for s in logins[1:] if s is not None]
+    if admin is None or not customers:
+        for session in logins:
+            if session is not None:
+                await session.close()
+        sys.exit("Could not log in the admin and at least one customer")
+
+    samples = defaultdict(list)  # path -> [(seconds, status, queries)]
+    weights = [ENDPOINTS[path][1] for path in endpoints]
+    deadline = time.perf_counter() + duration
+
+    async def worker():
+        while time.perf_counter() < deadline:
+            path = rng.choices(endpoints, weights)[0]
+            session = admin if ENDPOINTS[path][0] == "admin" else rng.choice(customers)
+            start = time.perf_counter()
+            try:
+                async with session.get(f"{base_url}{path}", allow_redirects=False) as resp:
+                    await resp.read()
+                    samples[path].append((time.perf_counter() - start, resp.status,
+                                          int(resp.headers.get("X-Query-Count", -1))))
+            except asyncio.TimeoutError:
+                samples[path].append((time.perf_counter() - start, "timeout", -1))
+            except aiohttp.ClientError as e:
+                samples[path].append((time.perf_counter() - start, type(e).__name__, -1))
+
+    try:
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    finally:
+        for session in [admin] + customers:
+            await session.close()
+
+    results = {}
+    for path in endpoints:
+        rows = samples.get(path, [])
+        latencies = sorted(seconds for seconds, _, _ in rows)
+        queries = [count for _, _, count in rows if count >= 0]
+        errors = defaultdict(int)
+        for _, status, _ in rows:
+            if status != 200:
+                errors[str(status)] += 1
+        results[path] = {
+            "requests": len(rows),
+            "errors": dict(errors),
+            "p50_ms": percentile(latencies, 0.50) * 1000 if latencies else None,
+            "p95_ms": percentile(latencies, 0.95) * 1000 if latencies else None,
+            "p99_ms": percentile(latencies, 0.99) * 1000 if latencies else None,
+            "queries_per_request": sum(queries) / len(queries) if queries else None,
+            "max_queries": max(queries) if queries else None,
+        }
+    return results
+
+def format_value(value: Optional[float], width: int) -> str:
+    return f"{'-':>{width}}" if value is None else f"{value:>{width}.1f}"
+
+def print_report(results: Dict[str, Dict], duration: float):
+    print(f"\n  {'endpoint':<20} {'requests':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'queries/req':>12}  errors")
+    for path, row in results.items():
+        if not row["requests"]:
+            print(f"  {path:<20} {0:>8}")
+            continue
+        errors = ", ".join(f"{count}x {status}" for status, count in row["errors"].items())
+        latencies = " ".join(format_value(row[key], 9) for key in ("p50_ms", "p95_ms", "p99_ms"))
+        print(f"  {path:<20} {row['requests']:>8} {latencies} {format_value(row['queries_per_request'], 12)}  {errors}")
+    total = sum(row["requests"] for row in results.values())
+    print(f"\n  {total} requests in {duration:.0f}s ({total / duration:.1f}/s)")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", type=int, default=DEFAULT_USERS)
+    parser.add_argument("--alerts", type=int, default=DEFAULT_ALERTS)
+    parser.add_argument("--db", default=os.path.join(tempfile.gettempdir(), "app_load.db"),
+                        help="SQLite file; reused when it already holds --users users and --alerts alerts")
+    parser.add_argument("--reseed", action="store_true", help="rebuild the database even if it matches")
+    parser.add_argument("--sessions", type=int, default=DEFAULT_SESSIONS, help="customers logged in")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="requests in flight")
+    parser.add_argument("--duration", type=float, default=DEFAULT_DURATION, help="seconds of traffic")
+    parser.add_argument("--endpoints", nargs="+", default=list(ENDPOINTS), choices=list(ENDPOINTS))
+    parser.add_argument("--timeout", type=float, default=120, help="seconds before a request counts as timed out")
+    parser.add_argument("--server-log", help="write the app's output here")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    if args.users < 2:
+        parser.error("--users needs the admin and at least one customer")
+    if args.reseed or not is_seeded(args.db, args.users, args.alerts):
+        print(f"Seeding {args.db} with {args.users:,} users and {args.alerts:,} alerts")
+        started = time.perf_counter()
+        seed_database(args.db, args.users, args.alerts)
+        print(f"  seeded in {time.perf_counter() - started:.0f}s")
+    else:
+        print(f"Reusing {args.db} ({args.users:,} users, {args.alerts:,} alerts)")
+
+    port = free_port()
+    server = start_server(args.db, port, args.server_log)
+    try:
+        print(f"App on port {port}: {args.concurrency} concurrent requests for {args.duration:.0f}s")
+        results = asyncio.run(drive_traffic(f"http://127.0.0.1:{port}", args.users, args.sessions,
+                                            args.concurrency, args.duration, args.endpoints, args.timeout))
+    finally:
+        server.terminate()
+        server.wait()
+    print_report(results, args.duration)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"users": args.users, "alerts": args.alerts, "sessions": args.sessions,
+                       "concurrency": args.concurrency, "duration": args.duration, "endpoints": results}, f, indent=2)
+        print(f"Results written to {args.json}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Bot startup microbenchmark
+Imports website_trading_bot and builds a WebsiteTradingBot in fresh
+interpreters, reporting wall time, peak RSS and whether pandas got loaded
+"""
+
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+PROBE = """
+import json, os, resource, sys, time
+start = time.perf_counter()
+import website_trading_bot
+website_trading_bot.WebsiteTradingBot()
+elapsed = time.perf_counter() - start
+print(json.dumps({
+    "seconds": elapsed,
+    "rss_kib": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    "pandas": "pandas" in sys.modules
+}))
+"""
+
+BASELINE_PROBE = """
+import json, resource
+print(json.dumps({"rss_kib": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}))
+"""
+
+def probe(code: str) -> dict:
+    env = dict(os.environ, CANDLE_STORE_DIR="", PYTHONDONTWRITEBYTECODE="1")
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env,
+                         capture_output=True, text=True, check=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    bare = probe(BASELINE_PROBE)["rss_kib"]
+    results = [probe(PROBE) for _ in range(args.runs)]
+    seconds = statistics.median(r["seconds"] for r in results)
+    rss = statistics.median(r["rss_kib"] for r in results)
+    print(f"import + WebsiteTradingBot(), median of {args.runs} fresh interpreters")
+    print(f"  wall time     : {seconds * 1000:7.0f} ms")
+    print(f"  peak RSS      : {rss / 1024:7.1f} MiB ({(rss - bare) / 1024:.1f} MiB over a bare interpreter)")
+    print(f"  pandas loaded : {results[0]['pandas']}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Indicator and prediction hot-path microbenchmarks
+Times the bot's calculate_* methods, run_strategy per symbol and the batch
+kernels on deterministic synthetic candles (100 to 100k candles, 1 to 1000
+symbols), recording ops/sec and peak allocations. --save writes a JSON
+baseline and --compare exits non-zero when a case regressed against one
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tracemalloc
+from datetime import datetime
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+os.environ.setdefault("CANDLE_STORE_DIR", "")  # Don't create a candle store just to benchmark
+import strategies
+from indicators import IndicatorState, IndicatorValues, batch_indicators
+from website_trading_bot import WebsiteTradingBot
+
+CANDLE_SIZES = (100, 1_000, 10_000, 100_000)
+SYMBOL_COUNTS = (1, 10, 100, 1_000)
+SAMPLE_SIZE = 10_000  # Indicator triples per strategy case
+DEFAULT_TOLERANCE = 0.25
+
+Case = Tuple[str, Callable[[], object], int]  # (name, call, operations per call)
+
+def synthetic_closes(symbols: int, candles: int, seed: int = 42) -> np.ndarray:
+    """(symbols x candles) random-walk closes - same seed, same prices on every machine"""
+    rng = np.random.default_rng(seed)
+    start = rng.uniform(0.5, 500, size=(symbols, 1))
+    return start * np.exp(np.cumsum(rng.normal(0, 0.01, size=(symbols, candles)), axis=1))
+
+def synthetic_indicators(count: int, seed: int = 7) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """RSI / MACD histogram / momentum spread across every strategy's thresholds"""
+    rng = np.random.default_rng(seed)
+    return rng.uniform(0, 100, count), rng.normal(0, 0.002, count), rng.normal(0, 8, count)
+
+def build_cases(bot: WebsiteTradingBot, quick: bool) -> List[Case]:
+    candle_sizes = CANDLE_SIZES[:3] if quick else CANDLE_SIZES
+    symbol_counts = SYMBOL_COUNTS[:3] if quick else SYMBOL_COUNTS
+    cases: List[Case] = []
+
+    for candles in candle_sizes:
+        closes = synthetic_closes(1, candles)[0]
+        cases.append((f"calculate_rsi[{candles}]", lambda c=closes: bot.calculate_rsi(c), 1))
+        cases.append((f"calculate_macd[{candles}]", lambda c=closes: bot.calculate_macd(c), 1))
+        cases.append((f"calculate_momentum[{candles}]", lambda c=closes: bot.calculate_momentum(c), 1))
+
+    rsi, macd, momentum = synthetic_indicators(SAMPLE_SIZE)
+    samples = [IndicatorValues(*values) for values in zip(rsi.tolist(), macd.tolist(), momentum.tolist())]
+    for name in ("free", "v3", "v6", "v9", "v12", "elite"):
+        strategy = strategies.STRATEGIES[name]
+        arrays = {"rsi": rsi, "macd_histogram": macd, "momentum": momentum}
+        kwargs = {indicator: arrays[indicator] for indicator in strategy.indicators}
+        cases.append((f"run_strategy_{name}", lambda n=name: [strategies.run_strategy(n, v) for v in samples],
+                      SAMPLE_SIZE))
+        cases.append((f"vector_{name}[{SAMPLE_SIZE}]", lambda p=strategy.predict, k=kwargs: p(**k), SAMPLE_SIZE))
+
+    for symbols in symbol_counts:
+        closes = synthetic_closes(symbols, 101)
+        cases.append((f"batch_indicators[{symbols}x100]", lambda c=closes[:, :100]: batch_indicators(c), symbols))
+
+        # Next candle per symbol against warmed-up incremental state
+        states = []
+        for row in closes[:, :100].tolist():
+            state = IndicatorState(window=100)
+            for close in row:
+                state.update(close)
+            states.append(state)
+        last = closes[:, 100].tolist()
+        cases.append((f"state_peek[{symbols}]",
+                      lambda s=states, l=last: [state.peek(close) for state, close in zip(s, l)], symbols))
+    return cases
+
+def measure(call: Callable[[], object], min_time: float, repeat: int) -> float:
+    """Best seconds per call, looping each timing until it lasts ``min_time``"""
+    call()  # Warm-up
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            call()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            break
+        loops = max(loops * 2, int(loops * min_time / max(elapsed, 1e-9)))
+    best = elapsed / loops
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(loops):
+            call()
+        best = min(best, (time.perf_counter() - start) / loops)
+    return best
+
+def peak_allocation(call: Callable[[], object]) -> int:
+    """Peak bytes allocated during one call"""
+    tracemalloc.start()
+    call()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+def run_cases(cases: List[Case], min_time: float, repeat: int, pattern: str = "") -> Dict[str, Dict]:
+    results = {}
+    for name, call, operations in cases:
+        if pattern and pattern not in name:
+            continue
+        seconds = measure(call, min_time, repeat)
+        results[name] = {"ops_per_sec": operations / seconds, "seconds_per_call": seconds,
+                         "operations": operations, "peak_alloc_bytes": peak_allocation(call)}
+        print(f"  {name:<32} {results[name]['ops_per_sec']:>14,.0f} ops/s  {results[name]['peak_alloc_bytes'] / 1024:>10,.1f} KiB peak")
+    return results
+
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict], tolerance: float) -> List[str]:
+    """Cases that got slower, or allocate more, by more than ``tolerance``"""
+    regressions = []
+    print(f"\n  {'case':<32} {'baseline ops/s':>14} {'now ops/s':>14} {'speed':>8} {'alloc':>8}")
+    for name, current in results.items():
+        before = baseline.get(name)
+        if before is None:
+            print(f"  {name:<32} {'-':>14} {current['ops_per_sec']:>14,.0f}      new")
+            continue
+        speed = current["ops_per_sec"] / before["ops_per_sec"] - 1
+        alloc = current["peak_alloc_bytes"] / max(before["peak_alloc_bytes"], 1) - 1
+        flags = []
+        if speed < -tolerance:
+            flags.append("SLOWER")
+        if alloc > tolerance and current["peak_alloc_bytes"] - before["peak_alloc_bytes"] > 4096:
+            flags.append("MORE MEMORY")
+        if flags:
+            regressions.append(name)
+        print(f"  {name:<32} {before['ops_per_sec']:>14,.0f} {current['ops_per_sec']:>14,.0f} "
+              f"{speed * 100:>+7.1f}% {alloc * 100:>+7.1f}%  {' '.join(flags)}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--save", help="write results as a JSON baseline")
+    parser.add_argument("--compare", help="compare against a saved baseline; exit 1 on regressions")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="allowed slowdown / allocation growth as a fraction (default 0.25)")
+    parser.add_argument("--filter", default="", help="only cases whose name contains this")
+    parser.add_argument("--quick", action="store_true", help="skip the 100k-candle and 1000-symbol sizes")
+    parser.add_argument("--min-time", type=float, default=0.2, help="seconds per timing run")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    bot = WebsiteTradingBot()
+    print(f"Hot-path microbenchmarks (best of {args.repeat}, Python {platform.python_version()}, NumPy {np.__version__})")
+    results = run_cases(build_cases(bot, args.quick), args.min_time, args.repeat, args.filter)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump({
+                "created": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+                "python": platform.python_version(),
+                "numpy": np.__version__,
+                "machine": platform.platform(),
+                "results": results
+            }, f, indent=2)
+        print(f"\nBaseline written to {args.save}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline["results"], args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) beyond {args.tolerance:.0%}: {', '.join(regressions)}")
+            sys.exit(1)
+        print(f"\nNo regressions beyond {args.tolerance:.0%}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Kline decoding microbenchmark
+Compares the old json -> list of dicts -> DataFrame path with decode_klines
+on synthetic Binance responses (default 1000 candles x 500 symbols)
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tracemalloc
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from market_data import Klines, decode_klines
+
+def make_payload(candles: int, seed: int) -> bytes:
+    """A /api/v3/klines response body for a random-walk symbol"""
+    rng = random.Random(seed)
+    price = rng.uniform(0.5, 500)
+    open_time = 1_600_000_000_000
+    rows = []
+    for i in range(candles):
+        close = price * (1 + rng.gauss(0, 0.01))
+        t = open_time + i * 3_600_000
+        rows.append([
+            t, f"{price:.8f}", f"{max(price, close) * 1.002:.8f}", f"{min(price, close) * 0.998:.8f}",
+            f"{close:.8f}", f"{rng.uniform(100, 10000):.8f}", t + 3_599_999,
+            f"{rng.uniform(1e4, 1e6):.8f}", rng.randint(10, 5000), "0.00000000", "0.00000000", "0"
+        ])
+        price = close
+    return json.dumps(rows, separators=(",", ":")).encode()
+
+def decode_with_dicts(raw: bytes) -> pd.DataFrame:
+    """The original fetch_klines decoding path"""
+    data = json.loads(raw)
+    return pd.DataFrame([{
+        "timestamp": int(d[0]),
+        "open": float(d[1]),
+        "high": float(d[2]),
+        "low": float(d[3]),
+        "close": float(d[4]),
+        "volume": float(d[5])
+    } for d in data])
+
+def decode_with_columns(raw: bytes) -> Klines:
+    return Klines(decode_klines(raw))
+
+def run(decoder, payloads, repeat: int) -> float:
+    """Best wall time in seconds for decoding every payload once"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for raw in payloads:
+            decoder(raw)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def peak_allocation(decoder, raw: bytes) -> int:
+    """Peak bytes allocated while decoding one payload"""
+    tracemalloc.start()
+    decoder(raw)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--candles", type=int, default=1000)
+    parser.add_argument("--symbols", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    payloads = [make_payload(args.candles, seed) for seed in range(args.symbols)]
+
+    # Both paths must produce the same frame
+    for raw in payloads[:5]:
+        pd.testing.assert_frame_equal(decode_with_dicts(raw), decode_with_columns(raw).to_frame())
+
+    old = run(decode_with_dicts, payloads, args.repeat)
+    columns = run(decode_klines, payloads, args.repeat)
+    new = run(decode_with_columns, payloads, args.repeat)
+    total = args.candles * args.symbols
+    print(f"{args.symbols} symbols x {args.candles} candles ({total:,} klines)")
+    print(f"  json + dict rows      : {old:8.3f}s  ({total / old:>12,.0f} klines/s)")
+    print(f"  decode_klines columns : {columns:8.3f}s  ({total / columns:>12,.0f} klines/s)  {old / columns:5.1f}x")
+    print(f"  decode_klines + Klines: {new:8.3f}s  ({total / new:>12,.0f} klines/s)  {old / new:5.1f}x")
+    # Peaks include decode_klines' one copy of the body (its row boundaries become newlines)
+    print(f"  peak memory per symbol: {peak_allocation(decode_with_dicts, payloads[0]) / 1024:,.0f} KiB -> "
+          f"{peak_allocation(decode_with_columns, payloads[0]) / 1024:,.0f} KiB "
+          f"({len(payloads[0]) / 1024:,.0f} KiB response body)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+End-to-end monitoring cycle benchmark
+Seeds a SQLite database with N online users and subscriptions, points the
+bot at a local fake exchange with a chosen latency / error profile and runs
+one full monitoring cycle, reporting wall time, exchange requests, database
+statements, alerts written and peak RSS. Each size runs in a fresh process
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import sqlite3
+import argparse
+import logging
+import resource
+import tempfile
+import multiprocessing
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+os.environ.setdefault("CANDLE_STORE_DIR", "")  # Every run starts cold, like a fresh deploy
+
+USER_COUNTS = (10, 1_000, 10_000, 100_000)
+DEFAULT_SYMBOLS = 50
+PLANS = ("free", "v3", "v6", "v9", "v12", "elite")
+KNOWN_COINS = ["SOL", "RAY", "BTC", "ETH", "BNB", "XRP", "ADA", "DOGE", "AVAX", "DOT", "LINK", "MATIC"]
+
+# Network profiles for the fake exchange's REST endpoints
+PROFILES = {
+    "local": {"latency": 0.0, "jitter": 0.0, "error_rate": 0.0, "error_status": 500},
+    "typical": {"latency": 0.05, "jitter": 0.05, "error_rate": 0.0, "error_status": 500},
+    "degraded": {"latency": 0.25, "jitter": 0.25, "error_rate": 0.05, "error_status": 500},
+    "throttled": {"latency": 0.05, "jitter": 0.05, "error_rate": 0.02, "error_status": 429},
+}
+
+def coin_universe(count: int) -> List[str]:
+    """``count`` coins - real names first (the admin watches SOL and RAY), then synthetic ones"""
+    return (KNOWN_COINS + [f"COIN{i}" for i in range(max(count - len(KNOWN_COINS), 0))])[:max(count, 2)]
+
+def seed_database(connection: sqlite3.Connection, users: int, coins: List[str], seed: int = 42):
+    """User 1 is the admin; everyone else has an active subscription to two coins"""
+    rng = random.Random(seed)
+    connection.executemany(
+        "INSERT INTO user (id, email, display_name, password_hash, is_admin, is_active, bot_status) "
+        "VALUES (?, ?, ?, 'benchmark', ?, 1, 'online')",
+        ((i, f"user{i}@example.com", f"User {i}", int(i == 1)) for i in range(1, users + 1))
+    )
+    connection.executemany(
+        "INSERT INTO subscription (user_id, plan_type, coins, status) VALUES (?, ?, ?, 'active')",
+        ((i, PLANS[i % len(PLANS)], json.dumps(rng.sample(coins, 2))) for i in range(2, users + 1))
+    )
+    connection.commit()
+
+async def run_cycle(users: int, symbols: int, profile: Dict, db_path: str) -> Dict:
+    from fake_exchange import FakeBinanceExchange
+    from symbol_index import SymbolIndex
+    from website_trading_bot import WebsiteTradingBot
+
+    coins = coin_universe(symbols)
+    exchange = FakeBinanceExchange(history=200, **profile)
+    for i, coin in enumerate(coins):
+        exchange.add_symbol(SymbolIndex.symbol_for(coin), start_price=1 + i % 500)
+    await exchange.start()
+
+    # Same SQLite setup as WebsiteTradingBot.connect_database, on a scratch file
+    bot = WebsiteTradingBot(streaming=False)
+    bot.api_url = exchange.api_url
+    bot.kline_cache.clock = exchange.clock
+    bot.db_connection = sqlite3.connect(db_path, check_same_thread=False)
+    bot.db_connection.row_factory = sqlite3.Row
+    bot.db_type = "sqlite"
+    bot.create_sqlite_tables()
+    seed_database(bot.db_connection, users, coins)
+
+    statements = Counter()
+    bot.db_connection.set_trace_callback(lambda sql: statements.update([sql.split(None, 1)[0].upper()]))
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    try:
+        start = time.perf_counter()
+        found = await bot.run_cycle()
+        seconds = time.perf_counter() - start
+    finally:
+        bot.db_connection.set_trace_callback(None)
+        await bot.close_http_session()
+        await exchange.stop()
+
+    alerts = bot.db_connection.execute("SELECT COUNT(*) FROM trading_alert").fetchone()[0]
+    bot.db_connection.close()
+    rss_peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {
+        "users": users, "online_users": found, "symbols": len(coins), "seconds": seconds,
+        "requests": exchange.request_count, "failed_requests": exchange.error_count,
+        "statements": sum(statements.values()), "statements_by_type": dict(statements),
+        "alerts": alerts, "peak_rss_kib": rss_peak, "cycle_rss_growth_kib": rss_peak - rss_before
+    }
+
+def run_size(users: int, symbols: int, profile: Dict, db_dir: str, verbose: bool) -> Dict:
+    """One size in this (fresh) process, so peak RSS belongs to it alone"""
+    logging.disable(logging.NOTSET if verbose else logging.INFO)
+    db_path = os.path.join(db_dir, f"monitoring_cycle_{users}.db")
+    if os.path.exists(db_path):
+        os.remove(db_path)
+    try:
+        return asyncio.run(run_cycle(users, symbols, profile, db_path))
+    finally:
+        if os.path.exists(db_path):
+            os.remove(db_path)
+
+def print_row(result: Dict):
+    by_type = result["statements_by_type"]
+    breakdown = ", ".join(f"{by_type[kind]} {kind.lower()}" for kind in sorted(by_type, key=by_type.get, reverse=True))
+    print(f"  {result['users']:>7,} users  {result['seconds']:>8.2f}s  {result['requests']:>5} requests "
+          f"({result['failed_requests']} failed)  {result['statements']:>8,} statements ({breakdown})  "
+          f"{result['alerts']:>7,} alerts  {result['peak_rss_kib'] / 1024:>7.1f} MiB peak "
+          f"(+{result['cycle_rss_growth_kib'] / 1024:.1f} in cycle)")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", type=int, nargs="+", default=list(USER_COUNTS))
+    parser.add_argument("--symbols", type=int, default=DEFAULT_SYMBOLS, help="distinct coins users pick from")
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="typical")
+    parser.add_argument("--latency", type=float, help="seconds added to every REST response")
+    parser.add_argument("--jitter", type=float, help="up to this many more seconds, uniformly")
+    parser.add_argument("--error-rate", type=float, help="fraction of REST responses that fail")
+    parser.add_argument("--error-status", type=int, help="HTTP status of failed responses (429 pauses the bot)")
+    parser.add_argument("--db-dir", default=tempfile.gettempdir(), help="where the scratch SQLite files go")
+    parser.add_argument("--json", help="also write the results to this file")
+    parser.add_argument("--verbose", action="store_true", help="keep the bot's INFO logging")
+    args = parser.parse_args()
+
+    profile = dict(PROFILES[args.profile])
+    for name in ("latency", "jitter", "error_rate", "error_status"):
+        if getattr(args, name) is not None:
+            profile[name] = getattr(args, name)
+    print(f"One monitoring cycle, {args.symbols} symbols, profile {args.profile} "
+          f"({profile['latency'] * 1000:.0f}ms + up to {profile['jitter'] * 1000:.0f}ms, "
+          f"{profile['error_rate']:.0%} HTTP {profile['error_status']})")
+
+    results = []
+    context = multiprocessing.get_context("spawn")
+    for users in args.users:
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+            result = executor.submit(run_size, users, args.symbols, profile, args.db_dir, args.verbose).result()
+        results.append(result)
+        print_row(result)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"profile": dict(profile, name=args.profile), "results": results}, f, indent=2)
+        print(f"Results written to {args.json}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,300 @@
+"""
+Persistent on-disk candle store for the website trading bot
+One append-only, memory-mapped file per symbol/interval so restarts warm up
+from disk and offline analysis can read long histories without the exchange
+"""
+
+import os
+import struct
+import logging
+import numpy as np
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import fcntl  # Serialises writers across processes and store instances (not on Windows)
+except ImportError:
+    fcntl = None
+
+from market_data import INTERVAL_MS, KLINE_COLUMNS, Klines
+
+logger = logging.getLogger("candle_store")
+
+# File layout: fixed header followed by fixed-size records.
+#   header: magic, version, interval_ms, base open time, price decimals
+#   record: slot (candles since base open time), open/high/low/close as
+#           scaled integers, volume as float32 -> 24 bytes vs 48 for
+#           int64 + 5 x float64
+MAGIC = b"MBCANDL1"
+VERSION = 1
+HEADER_FORMAT = "<8sHqqb"
+HEADER_SIZE = 64
+
+RECORD_DTYPE = np.dtype([
+    ("slot", "<u4"),
+    ("open", "<i4"),
+    ("high", "<i4"),
+    ("low", "<i4"),
+    ("close", "<i4"),
+    ("volume", "<f4"),
+])
+
+PRICE_FIELDS = ("open", "high", "low", "close")
+MAX_DECIMALS = 8  # Binance never quotes more than 8 decimal places
+PRICE_HEADROOM = 100  # Room for a 100x move before a file has to be rescaled
+INT32_MAX = 2**31 - 1
+
+class CandleStore:
+    """Columnar candle files under ``root_dir`` named ``<SYMBOL>_<interval>.candles``.
+
+    Prices are stored as int32 multiples of 10**-decimals, where ``decimals``
+    is the fewest decimal places that reproduce every price exactly (Binance
+    quotes at most 8). Prices only become approximate if a symbol would need
+    more digits than int32 can hold with headroom. Volume is float32 and
+    approximate. Only closed candles should be appended - records are never
+    rewritten except when new prices need a different scale, or older candles
+    are prepended, and the file is re-encoded.
+
+    Writers hold an exclusive lock on ``<file>.lock`` and re-read the header
+    under it, so several processes (or instances) can share a directory.
+    Re-encoding writes a new file and swaps it in with ``os.replace``;
+    readers notice the new inode and reload the header and mapping.
+    """
+
+    def __init__(self, root_dir: str):
+        self.root_dir = root_dir
+        os.makedirs(root_dir, exist_ok=True)
+        # path -> ((inode, size), header, records) of the file as last seen
+        self._files: Dict[str, tuple] = {}
+
+    def path(self, symbol: str, interval: str) -> str:
+        return os.path.join(self.root_dir, f"{symbol.upper()}_{interval}.candles")
+
+    def symbols(self, interval: str) -> List[str]:
+        """Symbols that have a stored file for an interval"""
+        suffix = f"_{interval}.candles"
+        return sorted(name[:-len(suffix)] for name in os.listdir(self.root_dir) if name.endswith(suffix))
+
+    # ------------------------------------------------------------------
+    # Reading
+    # ------------------------------------------------------------------
+
+    def _open(self, path: str) -> Optional[Tuple[tuple, np.ndarray]]:
+        """Header and memory-mapped records, reloaded when the file was replaced or grew"""
+        try:
+            f = open(path, "rb")
+        except FileNotFoundError:
+            return None
+        with f:
+            # Header and records come from the same open file, so a concurrent
+            # os.replace can't pair one file's header with the other's records
+            stat = os.fstat(f.fileno())
+            identity = (stat.st_ino, stat.st_size)
+            cached = self._files.get(path)
+            if cached is not None and cached[0] == identity:
+                return cached[1], cached[2]
+
+            magic, version, interval_ms, base, decimals = struct.unpack(
+                HEADER_FORMAT, f.read(struct.calcsize(HEADER_FORMAT)))
+            if magic != MAGIC or version != VERSION:
+                raise ValueError(f"{path} is not a version {VERSION} candle file")
+            header = (interval_ms, base, decimals)
+            count = max(stat.st_size - HEADER_SIZE, 0) // RECORD_DTYPE.itemsize
+            if count == 0:
+                records = np.empty(0, dtype=RECORD_DTYPE)
+            else:
+                records = np.memmap(f, dtype=RECORD_DTYPE, mode="r", offset=HEADER_SIZE, shape=(count,))
+        self._files[path] = (identity, header, records)
+        return header, records
+
+    @staticmethod
+    def _decode(header: tuple, records: np.ndarray) -> Dict[str, np.ndarray]:
+        interval_ms, base, decimals = header
+        scale = 10.0 ** decimals
+        columns = {"timestamp": base + records["slot"].astype(np.int64) * interval_ms}
+        for field in PRICE_FIELDS:
+            columns[field] = records[field] / scale
+        columns["volume"] = records["volume"].astype(np.float64)
+        return columns
+
+    def count(self, symbol: str, interval: str) -> int:
+        loaded = self._open(self.path(symbol, interval))
+        return 0 if loaded is None else len(loaded[1])
+
+    def first_open_time(self, symbol: str, interval: str) -> Optional[int]:
+        """Open time of the oldest stored candle"""
+        loaded = self._open(self.path(symbol, interval))
+        if loaded is None or len(loaded[1]) == 0:
+            return None
+        (interval_ms, base, _), records = loaded
+        return base + int(records[0]["slot"]) * interval_ms
+
+    def last_open_time(self, symbol: str, interval: str) -> Optional[int]:
+        """Open time of the newest stored candle"""
+        loaded = self._open(self.path(symbol, interval))
+        if loaded is None or len(loaded[1]) == 0:
+            return None
+        (interval_ms, base, _), records = loaded
+        return base + int(records[-1]["slot"]) * interval_ms
+
+    def read_arrays(self, symbol: str, interval: str, limit: Optional[int] = None,
+                    start_time: Optional[int] = None, end_time: Optional[int] = None) -> Optional[Dict[str, np.ndarray]]:
+        """Decoded columns (timestamp int64, prices/volume float64) for a time range"""
+        loaded = self._open(self.path(symbol, interval))
+        if loaded is None:
+            return None
+        header, records = loaded
+        interval_ms, base, _ = header
+
+        # Slots are sorted, so the time range is a binary search away
+        lo, hi = 0, len(records)
+        if start_time is not None:
+            lo = int(np.searchsorted(records["slot"], max((start_time - base + interval_ms - 1) // interval_ms, 0)))
+        if end_time is not None:
+            hi = int(np.searchsorted(records["slot"], (end_time - base) // interval_ms, side="right"))
+        if limit is not None:
+            lo = max(lo, hi - limit)
+        return self._decode(header, records[lo:hi])
+
+    def read(self, symbol: str, interval: str, limit: Optional[int] = None,
+             start_time: Optional[int] = None, end_time: Optional[int] = None) -> Optional[Klines]:
+        """Stored candles as Klines (``.to_frame()`` for a DataFrame)"""
+        columns = self.read_arrays(symbol, interval, limit, start_time, end_time)
+        if columns is None:
+            return None
+        return Klines({name: columns[name] for name in KLINE_COLUMNS})
+
+    # ------------------------------------------------------------------
+    # Writing
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _max_decimals(prices: np.ndarray) -> int:
+        """Most decimals that still leave int32 headroom for these prices"""
+        decimals = MAX_DECIMALS
+        max_price = float(prices.max(initial=0))
+        while decimals > 0 and max_price * PRICE_HEADROOM * 10 ** decimals > INT32_MAX:
+            decimals -= 1
+        return decimals
+
+    @classmethod
+    def _pick_decimals(cls, prices: np.ndarray) -> int:
+        """Fewest decimals that round-trip every price exactly (within headroom)"""
+        limit = cls._max_decimals(prices)
+        for decimals in range(limit + 1):
+            scale = 10.0 ** decimals
+            if np.array_equal(np.rint(prices * scale) / scale, prices):
+                return decimals
+        logger.warning(f"Prices need more than {limit} decimals - storing them rounded")
+        return limit
+
+    @staticmethod
+    def _prices(klines: Klines) -> np.ndarray:
+        return np.concatenate([np.asarray(klines[field], dtype=np.float64) for field in PRICE_FIELDS])
+
+    @staticmethod
+    def _sorted(klines) -> Klines:
+        if not isinstance(klines, Klines):
+            klines = Klines({name: np.asarray(klines[name]) for name in KLINE_COLUMNS})
+        return klines[np.argsort(klines["timestamp"], kind="stable")]
+
+    @contextmanager
+    def _locked(self, path: str):
+        """Exclusive writer lock for a candle file.
+
+        It lives on a sidecar file because re-encoding swaps the candle file's
+        inode with os.replace - a lock on the old inode wouldn't exclude anyone.
+        """
+        with open(path + ".lock", "a") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _encode(self, klines: Klines, interval_ms: int, base: int, decimals: int,
+                strict: bool = True) -> Optional[np.ndarray]:
+        """Pack candles into records; None (when strict) if the scale doesn't fit them"""
+        records = np.empty(len(klines), dtype=RECORD_DTYPE)
+        records["slot"] = (np.asarray(klines["timestamp"], dtype=np.int64) - base) // interval_ms
+        scale = 10.0 ** decimals
+        for field in PRICE_FIELDS:
+            prices = np.asarray(klines[field], dtype=np.float64)
+            ticks = np.rint(prices * scale)
+            if strict and (ticks.max(initial=0) > INT32_MAX or not np.array_equal(ticks / scale, prices)):
+                return None
+            records[field] = np.minimum(ticks, INT32_MAX)
+        records["volume"] = klines["volume"]
+        return records
+
+    def _rewrite(self, path: str, interval: str, klines: Klines, decimals: Optional[int] = None):
+        """Replace a whole file with ``klines``, based at the oldest candle (hold the lock)"""
+        interval_ms = INTERVAL_MS[interval]
+        base = int(klines["timestamp"][0])
+        if decimals is None:
+            decimals = self._pick_decimals(self._prices(klines))
+        tmp_path = path + ".tmp"
+        header = struct.pack(HEADER_FORMAT, MAGIC, VERSION, interval_ms, base, decimals)
+        with open(tmp_path, "wb") as f:
+            f.write(header.ljust(HEADER_SIZE, b"\0"))
+            f.write(self._encode(klines, interval_ms, base, decimals, strict=False).tobytes())
+        os.replace(tmp_path, path)
+
+    def prepend(self, symbol: str, interval: str, klines: Klines) -> int:
+        """Add closed candles older than the first stored one; returns rows written.
+
+        Slots count from the file's base open time, so the whole file is
+        re-encoded with the oldest new candle as its base.
+        """
+        if klines is None or len(klines) == 0:
+            return 0
+        klines = self._sorted(klines)
+        path = self.path(symbol, interval)
+        with self._locked(path):
+            loaded = self._open(path)
+            if loaded is not None and len(loaded[1]):
+                existing = Klines(self._decode(*loaded))
+                klines = klines[klines["timestamp"] < existing["timestamp"][0]]
+                if klines.empty:
+                    return 0
+                self._rewrite(path, interval, existing.merge(klines))
+            else:
+                self._rewrite(path, interval, klines)
+        return len(klines)
+
+    def append(self, symbol: str, interval: str, klines: Klines) -> int:
+        """Append closed candles newer than the last stored one; returns rows written.
+
+        Takes Klines or anything indexable by kline column name (e.g. a DataFrame).
+        """
+        if klines is None or len(klines) == 0:
+            return 0
+        klines = self._sorted(klines)
+        path = self.path(symbol, interval)
+        with self._locked(path):
+            # Another writer may have appended, rebased or rescaled the file -
+            # work from what is on disk now, not from a cached header
+            loaded = self._open(path)
+            if loaded is None or len(loaded[1]) == 0:
+                self._rewrite(path, interval, klines)
+                return len(klines)
+
+            header, records = loaded
+            interval_ms, base, decimals = header
+            klines = klines[klines["timestamp"] > base + int(records[-1]["slot"]) * interval_ms]
+            if klines.empty:
+                return 0
+
+            encoded = self._encode(klines, interval_ms, base, decimals)
+            if encoded is None:
+                existing = Klines(self._decode(header, records))
+                decimals = self._pick_decimals(np.concatenate([self._prices(existing), self._prices(klines)]))
+                logger.info(f"Rescaling {os.path.basename(path)} to {decimals} decimals")
+                self._rewrite(path, interval, existing.merge(klines), decimals)
+                return len(klines)
+
+            with open(path, "ab") as f:
+                f.write(encoded.tobytes())
+        return len(klines)
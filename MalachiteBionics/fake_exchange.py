@@ -0,0 +1,295 @@
+"""
+Local stand-in for the Binance endpoints used by the website trading bot
+Serves REST klines, ticker prices, exchange info and combined kline WebSocket streams so the bot can run offline
+"""
+
+import asyncio
+import json
+import logging
+import random
+from functools import partial
+from typing import Dict, List, Optional
+
+from aiohttp import web, WSMsgType
+
+from market_data import INTERVAL_MS, now_ms, stream_name
+
+logger = logging.getLogger("fake_exchange")
+
+compact_dumps = partial(json.dumps, separators=(",", ":"))  # Binance's REST bodies carry no spaces
+
+class FakeBinanceExchange:
+    """In-process fake of api.binance.com and stream.binance.com.
+
+    Candles are a deterministic random walk per symbol on a simulated clock.
+    ``close_candle`` advances a symbol by one candle and pushes the closing
+    kline event to every subscribed stream client, and ``drop_connections``
+    forces clients through their reconnect path.
+
+    REST responses can be slowed by ``latency`` seconds plus up to ``jitter``
+    more, and a fraction ``error_rate`` of them fail with ``error_status``
+    (429s carry a Retry-After of ``retry_after`` seconds).
+    """
+
+    def __init__(self, interval: str = "1h", history: int = 500, seed: int = 42,
+                 start_time: Optional[int] = None, latency: float = 0.0, jitter: float = 0.0,
+                 error_rate: float = 0.0, error_status: int = 500, retry_after: int = 1):
+        self.interval = interval
+        self.interval_ms = INTERVAL_MS[interval]
+        self.history = history
+        self.random = random.Random(seed)
+
+        # Network profile - its own RNG so candles stay the same whatever the profile
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.retry_after = retry_after
+        self.network_random = random.Random(seed + 1)
+
+        # Simulated "now" sits inside the newest (forming) candle
+        start_time = now_ms() if start_time is None else start_time
+        self.now = start_time // self.interval_ms * self.interval_ms + self.interval_ms // 2
+        self.klines: Dict[str, List[List[float]]] = {}
+
+        self.clients: Dict[web.WebSocketResponse, set] = {}
+        self.request_count = 0
+        self.error_count = 0
+        self.stream_connections = 0
+
+        self.api_url = None
+        self.stream_url = None
+        self._runner = None
+
+    # ------------------------------------------------------------------
+    # Market simulation
+    # ------------------------------------------------------------------
+
+    def clock(self) -> int:
+        """Simulated exchange time in epoch milliseconds"""
+        return self.now
+
+    def add_symbol(self, symbol: str, start_price: float = 100.0):
+        """Generate history for a symbol; the newest candle is still forming"""
+        forming_open = self.now // self.interval_ms * self.interval_ms
+        first_open = forming_open - (self.history - 1) * self.interval_ms
+        price = start_price
+        candles = []
+        for i in range(self.history):
+            candles.append(self._next_candle(first_open + i * self.interval_ms, price))
+            price = candles[-1][4]
+        self.klines[symbol.upper()] = candles
+
+    def _next_candle(self, open_time: int, open_price: float) -> List[float]:
+        # Quote to a realistic tick: cents above $1, 8 decimals below
+        decimals = 2 if open_price >= 1 else 8
+        close = round(max(open_price * (1 + self.random.gauss(0, 0.01)), 1e-8), decimals)
+        high = round(max(open_price, close) * (1 + abs(self.random.gauss(0, 0.003))), decimals)
+        low = round(min(open_price, close) * (1 - abs(self.random.gauss(0, 0.003))), decimals)
+        volume = round(abs(self.random.gauss(1000, 250)), 2)
+        return [open_time, open_price, high, low, close, volume]
+
+    async def close_candle(self, symbol: str):
+        """Close a symbol's forming candle, open the next one and push both events"""
+        symbol = symbol.upper()
+        candles = self.klines[symbol]
+        closed = candles[-1]
+        forming = self._next_candle(closed[0] + self.interval_ms, closed[4])
+        candles.append(forming)
+        self.now = max(self.now, forming[0] + self.interval_ms // 2)
+
+        await self._broadcast(symbol, closed, is_closed=True)
+        await self._broadcast(symbol, forming, is_closed=False)
+
+    async def drop_connections(self):
+        """Close every stream connection from the server side"""
+        for ws in list(self.clients):
+            await ws.close()
+
+    # ------------------------------------------------------------------
+    # Wire formats
+    # ------------------------------------------------------------------
+
+    def _rest_row(self, candle: List[float]) -> list:
+        open_time = int(candle[0])
+        return [
+            open_time, f"{candle[1]:.8f}", f"{candle[2]:.8f}", f"{candle[3]:.8f}",
+            f"{candle[4]:.8f}", f"{candle[5]:.8f}", open_time + self.interval_ms - 1,
+            "0.00000000", 0, "0.00000000", "0.00000000", "0"
+        ]
+
+    def _stream_event(self, symbol: str, candle: List[float], is_closed: bool) -> dict:
+        open_time = int(candle[0])
+        return {
+            "stream": stream_name(symbol, self.interval),
+            "data": {
+                "e": "kline",
+                "E": self.now,
+                "s": symbol,
+                "k": {
+                    "t": open_time,
+                    "T": open_time + self.interval_ms - 1,
+                    "s": symbol,
+                    "i": self.interval,
+                    "o": f"{candle[1]:.8f}",
+                    "h": f"{candle[2]:.8f}",
+                    "l": f"{candle[3]:.8f}",
+                    "c": f"{candle[4]:.8f}",
+                    "v": f"{candle[5]:.8f}",
+                    "x": is_closed
+                }
+            }
+        }
+
+    async def _broadcast(self, symbol: str, candle: List[float], is_closed: bool):
+        name = stream_name(symbol, self.interval)
+        payload = json.dumps(self._stream_event(symbol, candle, is_closed))
+        for ws, streams in list(self.clients.items()):
+            if name in streams and not ws.closed:
+                await ws.send_str(payload)
+
+    # ------------------------------------------------------------------
+    # HTTP handlers
+    # ------------------------------------------------------------------
+
+    async def simulate_network(self) -> Optional[web.Response]:
+        """Apply the latency profile; returns an error response when this request should fail"""
+        self.request_count += 1
+        delay = self.latency + self.network_random.uniform(0, self.jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if self.error_rate and self.network_random.random() < self.error_rate:
+            self.error_count += 1
+            headers = {"Retry-After": str(self.retry_after)} if self.error_status in (429, 418) else None
+            return web.json_response({"code": -1003, "msg": "Simulated failure."},
+                                     status=self.error_status, headers=headers)
+        return None
+
+    async def handle_klines(self, request: web.Request) -> web.Response:
+        failure = await self.simulate_network()
+        if failure is not None:
+            return failure
+        symbol = request.query.get("symbol", "").upper()
+        if symbol not in self.klines:
+            return web.json_response({"code": -1121, "msg": "Invalid symbol."}, status=400)
+
+        limit = min(int(request.query.get("limit", 500)), 1000)
+        candles = self.klines[symbol]
+        if "startTime" in request.query:
+            start = int(request.query["startTime"])
+            candles = [c for c in candles if c[0] >= start][:limit]
+        else:
+            candles = candles[-limit:]
+        return web.json_response([self._rest_row(c) for c in candles], dumps=compact_dumps)
+
+    async def handle_exchange_info(self, request: web.Request) -> web.Response:
+        failure = await self.simulate_network()
+        if failure is not None:
+            return failure
+        return web.json_response({
+            "timezone": "UTC",
+            "serverTime": self.now,
+            "symbols": [
+                {"symbol": s, "status": "TRADING", "baseAsset": s[:-4], "quoteAsset": s[-4:]}
+                for s in self.klines
+            ]
+        })
+
+    async def handle_ticker_price(self, request: web.Request) -> web.Response:
+        failure = await self.simulate_network()
+        if failure is not None:
+            return failure
+        if "symbols" in request.query:
+            symbols = json.loads(request.query["symbols"])
+            if any(s not in self.klines for s in symbols):
+                return web.json_response({"code": -1121, "msg": "Invalid symbol."}, status=400)
+        elif "symbol" in request.query:
+            symbol = request.query["symbol"]
+            if symbol not in self.klines:
+                return web.json_response({"code": -1121, "msg": "Invalid symbol."}, status=400)
+            return web.json_response({"symbol": symbol, "price": f"{self.klines[symbol][-1][4]:.8f}"})
+        else:
+            symbols = list(self.klines)
+        return web.json_response([
+            {"symbol": s, "price": f"{self.klines[s][-1][4]:.8f}"} for s in symbols
+        ])
+
+    async def handle_stream(self, request: web.Request) -> web.WebSocketResponse:
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        self.stream_connections += 1
+
+        requested = request.query.get("streams", "")
+        self.clients[ws] = {s for s in requested.split("/") if s}
+
+        try:
+            async for msg in ws:
+                if msg.type != WSMsgType.TEXT:
+                    continue
+                try:
+                    body = json.loads(msg.data)
+                except json.JSONDecodeError:
+                    continue
+
+                method = body.get("method")
+                params = set(body.get("params", []))
+                if method == "SUBSCRIBE":
+                    self.clients[ws] |= params
+                elif method == "UNSUBSCRIBE":
+                    self.clients[ws] -= params
+                await ws.send_str(json.dumps({"result": None, "id": body.get("id")}))
+        finally:
+            self.clients.pop(ws, None)
+        return ws
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> "FakeBinanceExchange":
+        """Start serving; api_url and stream_url are set once bound"""
+        app = web.Application()
+        app.router.add_get("/api/v3/klines", self.handle_klines)
+        app.router.add_get("/api/v3/ticker/price", self.handle_ticker_price)
+        app.router.add_get("/api/v3/exchangeInfo", self.handle_exchange_info)
+        app.router.add_get("/stream", self.handle_stream)
+
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+
+        bound_port = site._server.sockets[0].getsockname()[1]
+        self.api_url = f"http://{host}:{bound_port}"
+        self.stream_url = f"ws://{host}:{bound_port}"
+        logger.info(f"Fake exchange listening on {self.api_url}")
+        return self
+
+    async def stop(self):
+        """Close client connections and shut the server down"""
+        await self.drop_connections()
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+async def main(symbols: Optional[List[str]] = None, port: int = 8765):
+    """Run a standalone fake exchange that closes a candle every few seconds"""
+    exchange = FakeBinanceExchange()
+    for symbol in symbols or ["SOLUSDT", "RAYUSDT", "BTCUSDT", "ETHUSDT"]:
+        exchange.add_symbol(symbol)
+    await exchange.start(port=port)
+    logger.info(f"Set BINANCE_API_URL={exchange.api_url} BINANCE_STREAM_URL={exchange.stream_url}")
+    try:
+        while True:
+            await asyncio.sleep(5)
+            for symbol in exchange.klines:
+                await exchange.close_candle(symbol)
+    finally:
+        await exchange.stop()
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        logger.info("Fake exchange stopped")
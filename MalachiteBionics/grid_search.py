@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Strategy threshold grid search for the website trading bot
+Computes indicator series once per stored symbol, shares them with a
+process pool through shared memory and scores every threshold combination
+of predict_v6 / predict_v9 / predict_elite on forward returns
+"""
+
+import os
+import sys
+import csv
+import time
+import argparse
+import inspect
+import itertools
+import logging
+import multiprocessing
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+from typing import Dict, List, Sequence, Tuple
+
+from backtest import DEFAULT_BATCH_SIZE, forward_returns, indicator_series, iter_batches, parse_date
+from candle_store import CandleStore
+from indicator_pool import attach_shared_memory
+from strategies import ANALYSIS_CANDLES, BUY, NEUTRAL, STRATEGIES, predict_elite, predict_v6, predict_v9
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+logger = logging.getLogger("grid_search")
+
+# Thresholds searched per strategy (each list includes the live bot's value)
+PARAMETER_GRIDS = {
+    "v6": {
+        "buy_rsi": [25, 30, 35, 40, 45],
+        "sell_rsi": [55, 60, 65, 70, 75],
+        "oversold": [15, 20, 25, 30],
+        "overbought": [70, 75, 80, 85],
+    },
+    "v9": {
+        "strong_buy_rsi": [25, 30, 35],
+        "strong_sell_rsi": [65, 70, 75],
+        "buy_rsi": [30, 35, 40],
+        "sell_rsi": [60, 65, 70],
+        "oversold": [15, 20, 25],
+        "overbought": [75, 80, 85],
+        "momentum_threshold": [2, 5, 10],
+    },
+    "elite": {
+        "oversold_strong": [20, 25, 30],
+        "overbought_strong": [70, 75, 80],
+        "macd_strong": [0.0005, 0.001, 0.002, 0.005],
+        "momentum_weak": [1, 2, 5],
+        "momentum_strong": [5, 10, 20],
+        "min_score": [3, 4, 5],
+    },
+}
+
+# Where each strategy's threshold defaults are declared
+THRESHOLD_FUNCTIONS = {"v6": predict_v6, "v9": predict_v9, "elite": predict_elite}
+
+DEFAULT_HORIZON = 24  # Candles after the signal
+DEFAULT_MIN_SIGNALS = 100
+DEFAULT_CHUNK_SIZE = 8  # Combinations per pool task
+
+def threshold_defaults(strategy: str) -> Dict[str, float]:
+    """The live bot's thresholds for a strategy"""
+    parameters = inspect.signature(THRESHOLD_FUNCTIONS[strategy]).parameters.values()
+    return {p.name: p.default for p in parameters if p.default is not inspect.Parameter.empty}
+
+def expand_grid(grid: Dict[str, Sequence[float]]) -> List[Dict[str, float]]:
+    """Every combination of a {parameter: values} grid"""
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+
+def load_features(store: CandleStore, symbols: Sequence[str], interval: str = "1h", horizon: int = DEFAULT_HORIZON,
+                  start_time=None, end_time=None, window: int = ANALYSIS_CANDLES,
+                  batch_size: int = DEFAULT_BATCH_SIZE) -> Dict[str, np.ndarray]:
+    """Indicators and forward return at every scoreable candle of every symbol, flattened.
+
+    Computed once here; every parameter combination is then scored against
+    the same arrays.
+    """
+    parts: Dict[str, List[np.ndarray]] = {"rsi": [], "macd_histogram": [], "momentum": [], "forward_return": []}
+    for closes, _, valid in iter_batches(store, symbols, interval, start_time, end_time, batch_size):
+        indicators = indicator_series(closes, window)
+        forward = forward_returns(closes, horizon)
+        keep = valid & ~np.isnan(forward)
+        for name in ("rsi", "macd_histogram", "momentum"):
+            parts[name].append(getattr(indicators, name)[keep])
+        parts["forward_return"].append(forward[keep])
+    return {name: np.concatenate(chunks) if chunks else np.empty(0) for name, chunks in parts.items()}
+
+def score(features: Dict[str, np.ndarray], strategy: str, params: Dict[str, float]) -> Tuple[int, int, int, float]:
+    """(buy signals, sell signals, hits, summed directional return) of one threshold set"""
+    predict = STRATEGIES[strategy]
+    codes = predict.predict(**{name: features[name] for name in predict.indicators}, **params)
+    signalled = codes != NEUTRAL
+    directional = features["forward_return"][signalled] * codes[signalled]
+    buys = int((codes == BUY).sum())
+    return buys, len(directional) - buys, int((directional > 0).sum()), float(directional.sum())
+
+# Worker side: features mapped from the parent's shared memory once per process
+_features: Dict[str, np.ndarray] = {}
+_blocks: List[shared_memory.SharedMemory] = []
+
+def _init_worker(specs: Dict[str, Tuple[str, int]]):
+    for name, (block_name, length) in specs.items():
+        block = attach_shared_memory(block_name)
+        _blocks.append(block)
+        _features[name] = np.ndarray((length,), dtype=np.float64, buffer=block.buf)
+
+def _score_chunk(strategy: str, start: int, combos: List[Dict[str, float]]) -> List[Tuple]:
+    return [(start + offset,) + score(_features, strategy, params) for offset, params in enumerate(combos)]
+
+def run_grid_search(features: Dict[str, np.ndarray], strategy: str, combos: List[Dict[str, float]],
+                    workers: int, chunk_size: int = DEFAULT_CHUNK_SIZE) -> List[Tuple]:
+    """Score every combination, spread over ``workers`` processes (in-process when 1).
+
+    Rows come back in combination order whatever order the workers finish in.
+    """
+    if workers <= 1:
+        return [(index,) + score(features, strategy, params) for index, params in enumerate(combos)]
+
+    blocks = []
+    try:
+        specs = {}
+        for name, values in features.items():
+            block = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+            blocks.append(block)
+            np.ndarray(values.shape, dtype=np.float64, buffer=block.buf)[:] = values
+            specs[name] = (block.name, len(values))
+
+        results = []
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                                 initializer=_init_worker, initargs=(specs,)) as executor:
+            futures = [executor.submit(_score_chunk, strategy, start, combos[start:start + chunk_size])
+                       for start in range(0, len(combos), chunk_size)]
+            for done, future in enumerate(as_completed(futures), 1):
+                results.extend(future.result())
+                if done % max(len(futures) // 10, 1) == 0:
+                    logger.info(f"{len(results)}/{len(combos)} combinations scored")
+        results.sort()
+        return results
+    finally:
+        for block in blocks:
+            block.close()
+            block.unlink()
+
+def rank(strategy: str, combos: List[Dict[str, float]], results: List[Tuple], min_signals: int) -> List[Dict]:
+    """Rows ordered by mean directional return; sets with fewer than ``min_signals`` signals go last.
+
+    Ties keep combination order, so the ranking doesn't depend on the worker count.
+    """
+    defaults = threshold_defaults(strategy)
+    rows = []
+    for index, buys, sells, hits, total in sorted(results):
+        signals = buys + sells
+        params = combos[index]
+        rows.append(dict(params, signals=signals, buys=buys, sells=sells,
+                         hit_rate=hits / signals if signals else 0.0,
+                         mean_return=total / signals if signals else 0.0,
+                         live=all(defaults.get(name) == value for name, value in params.items())))
+    # Stable sort: rows are in combination order, and reverse=True keeps equal keys in it
+    rows.sort(key=lambda row: (row["signals"] >= min_signals, row["mean_return"], row["hit_rate"]), reverse=True)
+    for position, row in enumerate(rows, 1):
+        row["rank"] = position
+    return rows
+
+def write_csv(path: str, rows: List[Dict], param_names: Sequence[str]):
+    fields = ["rank", *param_names, "signals", "buys", "sells", "hit_rate", "mean_return", "live"]
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=fields)
+        writer.writeheader()
+        writer.writerows(rows)
+
+def parse_param(value: str) -> Tuple[str, List[float]]:
+    """NAME=V1,V2,... to a grid axis"""
+    name, _, values = value.partition("=")
+    if not values:
+        raise argparse.ArgumentTypeError(f"expected NAME=V1,V2,... not {value}")
+    return name, [float(v) for v in values.split(",")]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("strategy", choices=sorted(PARAMETER_GRIDS))
+    parser.add_argument("--store", default=os.environ.get("CANDLE_STORE_DIR") or os.path.join(os.path.dirname(os.path.abspath(__file__)), "candle_data"),
+                        help="candle store directory (default: CANDLE_STORE_DIR or ./candle_data)")
+    parser.add_argument("--symbols", nargs="*", help="symbols to score on (default: every stored symbol)")
+    parser.add_argument("--param", type=parse_param, action="append", default=[],
+                        help="replace one grid axis, e.g. --param buy_rsi=30,35,40")
+    parser.add_argument("--interval", default="1h")
+    parser.add_argument("--start", type=parse_date, help="first day, YYYY-MM-DD")
+    parser.add_argument("--end", type=parse_date, help="last day, YYYY-MM-DD")
+    parser.add_argument("--horizon", type=int, default=DEFAULT_HORIZON, help="candles the forward return spans")
+    parser.add_argument("--min-signals", type=int, default=DEFAULT_MIN_SIGNALS)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--window", type=int, default=ANALYSIS_CANDLES, help="closed candles per analysis")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--output", help="results CSV (default: grid_<strategy>.csv)")
+    parser.add_argument("--top", type=int, default=10, help="rows to print")
+    args = parser.parse_args()
+
+    grid = dict(PARAMETER_GRIDS[args.strategy])
+    defaults = threshold_defaults(args.strategy)
+    for name, values in args.param:
+        if name not in defaults:
+            parser.error(f"{args.strategy} has no threshold {name} (choose from {', '.join(defaults)})")
+        grid[name] = values
+    combos = expand_grid(grid)
+
+    if not os.path.isdir(args.store):
+        sys.exit(f"No candle store at {args.store}")
+    store = CandleStore(args.store)
+    symbols = args.symbols or store.symbols(args.interval)
+    if not symbols:
+        sys.exit(f"No {args.interval} candles stored in {args.store}")
+
+    started = time.perf_counter()
+    features = load_features(store, symbols, args.interval, args.horizon, args.start, args.end,
+                             args.window, args.batch_size)
+    logger.info(f"Indicators for {len(features['rsi'])} candles of {len(symbols)} symbols in {time.perf_counter() - started:.1f}s")
+
+    started = time.perf_counter()
+    results = run_grid_search(features, args.strategy, combos, args.workers, args.chunk_size)
+    logger.info(f"Scored {len(combos)} {args.strategy} combinations in {time.perf_counter() - started:.1f}s with {args.workers} workers")
+
+    rows = rank(args.strategy, combos, results, args.min_signals)
+    output = args.output or f"grid_{args.strategy}.csv"
+    write_csv(output, rows, list(grid))
+    for row in rows[:args.top]:
+        params = ", ".join(f"{name}={row[name]:g}" for name in grid)
+        print(f"#{row['rank']:<4} {params}  signals={row['signals']} hit={row['hit_rate'] * 100:.1f}% mean={row['mean_return'] * 100:+.3f}%")
+    live = next((row for row in rows if row["live"]), None)
+    if live is not None:
+        print(f"Live thresholds rank #{live['rank']} of {len(rows)}")
+    print(f"Results written to {output}")
+
+if __name__ == "__main__":
+    main()
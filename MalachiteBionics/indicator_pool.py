@@ -0,0 +1,105 @@
+"""
+Process-pool offload for the batch indicator kernel
+Close prices go into a multiprocessing.shared_memory matrix that worker
+processes map directly, so batches are neither pickled nor copied and the
+bot's event loop only awaits the results
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Optional, Sequence, Tuple
+
+from indicators import IndicatorValues, batch_indicators
+
+logger = logging.getLogger("indicator_pool")
+
+RESULT_FIELDS = len(IndicatorValues._fields)
+
+def attach_shared_memory(name: str) -> shared_memory.SharedMemory:
+    """Map a block created by the parent; the parent alone unlinks it"""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)  # Python 3.13+
+    except TypeError:
+        # Spawned workers share the parent's resource tracker, so registering again is harmless
+        return shared_memory.SharedMemory(name=name)
+
+def _evaluate_rows(closes_name: str, out_name: str, shape: Tuple[int, int], start: int, stop: int) -> int:
+    """Worker: indicators for rows [start, stop) of the shared close matrix, written in place"""
+    closes_block = attach_shared_memory(closes_name)
+    out_block = attach_shared_memory(out_name)
+    try:
+        closes = np.ndarray(shape, dtype=np.float64, buffer=closes_block.buf)
+        out = np.ndarray((shape[0], RESULT_FIELDS), dtype=np.float64, buffer=out_block.buf)
+        values = batch_indicators(closes[start:stop])
+        for field, column in enumerate(values):
+            out[start:stop, field] = column
+        del closes, out
+        return stop - start
+    finally:
+        closes_block.close()
+        out_block.close()
+
+class IndicatorPool:
+    """Evaluates ``batch_indicators`` over many symbols in worker processes.
+
+    ``evaluate`` writes the close series straight into a shared-memory matrix
+    (right-aligned, NaN-padded like ``stack_closes``), splits its rows into
+    batches of ``batch_size`` and awaits one executor task per batch. Workers
+    are spawned rather than forked because the bot usually runs in a thread
+    of the Flask process.
+    """
+
+    def __init__(self, workers: int, batch_size: int = 256):
+        self.workers = workers
+        self.batch_size = batch_size
+        self.executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        self.batches = 0
+        self.symbols = 0
+
+    async def evaluate(self, series: Sequence[np.ndarray], length: Optional[int] = None) -> IndicatorValues:
+        """Last RSI, MACD histogram and momentum per series, as arrays in input order"""
+        rows = len(series)
+        length = max((len(c) for c in series), default=0) if length is None else length
+        if rows == 0 or length == 0:
+            empty = np.empty(0)
+            return IndicatorValues(empty, empty, empty)
+
+        closes_block = shared_memory.SharedMemory(create=True, size=rows * length * 8)
+        out_block = shared_memory.SharedMemory(create=True, size=rows * RESULT_FIELDS * 8)
+        try:
+            closes = np.ndarray((rows, length), dtype=np.float64, buffer=closes_block.buf)
+            closes.fill(np.nan)
+            for row, values in enumerate(series):
+                values = values[-length:]
+                if len(values):
+                    closes[row, length - len(values):] = values
+
+            loop = asyncio.get_running_loop()
+            tasks = [
+                loop.run_in_executor(self.executor, _evaluate_rows, closes_block.name, out_block.name,
+                                     (rows, length), start, min(start + self.batch_size, rows))
+                for start in range(0, rows, self.batch_size)
+            ]
+            await asyncio.gather(*tasks)
+            self.batches += len(tasks)
+            self.symbols += rows
+
+            out = np.ndarray((rows, RESULT_FIELDS), dtype=np.float64, buffer=out_block.buf)
+            result = IndicatorValues(*(out[:, field].copy() for field in range(RESULT_FIELDS)))
+            del closes, out
+            return result
+        finally:
+            closes_block.close()
+            closes_block.unlink()
+            out_block.close()
+            out_block.unlink()
+
+    def snapshot(self):
+        return {"workers": self.workers, "batches": self.batches, "symbols": self.symbols}
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,481 @@
+"""
+Streaming indicator engine for the website trading bot
+Keeps per-symbol RSI, MACD and momentum state and updates it in constant time
+per closed candle instead of recomputing rolling windows over the whole series,
+plus a batch kernel that evaluates a whole (symbols x candles) matrix at once
+"""
+
+import bisect
+import logging
+import sys
+import numpy as np
+from collections import OrderedDict, deque, namedtuple
+from typing import Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger("indicators")
+
+IndicatorValues = namedtuple("IndicatorValues", ["rsi", "macd_histogram", "momentum"])
+
+# Same defaults as WebsiteTradingBot.calculate_rsi / calculate_macd / calculate_momentum
+RSI_PERIOD = 14
+MACD_SHORT_SPAN = 12
+MACD_LONG_SPAN = 26
+MACD_SIGNAL_SPAN = 9
+MOMENTUM_PERIOD = 10
+
+class IndicatorState:
+    """Incremental RSI / MACD histogram / momentum for one candle series.
+
+    Matches the bot's pandas implementations run over the last ``window``
+    closes (or over everything seen when ``window`` is None). RSI and momentum
+    only ever look back a fixed number of candles. The EMAs behind MACD
+    remember their first value, so the state runs them over the whole history
+    and removes the pre-window part in closed form: with ``P = window - 1``
+    and window start ``s``, an adjust=False EMA restarted at ``s`` equals
+    ``E_t - r**P * (E_s - x_s)``, and the signal EMA of the restarted MACD line
+    has a similar correction. Every update and peek is O(1) in history length.
+    """
+
+    def __init__(self, window: Optional[int] = None, rsi_period: int = RSI_PERIOD,
+                 short_span: int = MACD_SHORT_SPAN, long_span: int = MACD_LONG_SPAN,
+                 signal_span: int = MACD_SIGNAL_SPAN, momentum_period: int = MOMENTUM_PERIOD):
+        if window is not None and window < max(rsi_period + 1, long_span, momentum_period + 1):
+            raise ValueError(f"window {window} is too short for the indicator periods")
+        self.window = window
+        self.rsi_period = rsi_period
+        self.long_span = long_span
+        self.momentum_period = momentum_period
+
+        self.alpha_short = 2 / (short_span + 1)
+        self.alpha_long = 2 / (long_span + 1)
+        self.alpha_signal = 2 / (signal_span + 1)
+        if window is not None:
+            lag = window - 1
+            r_short, r_long, r_signal = 1 - self.alpha_short, 1 - self.alpha_long, 1 - self.alpha_signal
+            self.decay_short = r_short ** lag
+            self.decay_long = r_long ** lag
+            self.decay_signal = r_signal ** lag
+            self.k_short = self.alpha_signal * sum(r_signal ** (lag - j) * r_short ** j for j in range(1, lag + 1))
+            self.k_long = self.alpha_signal * sum(r_signal ** (lag - j) * r_long ** j for j in range(1, lag + 1))
+
+        self.count = 0
+        self.last_open_time: Optional[int] = None
+        self.values: Optional[IndicatorValues] = None
+        self.prev_close: Optional[float] = None
+        self.gains = deque(maxlen=rsi_period)
+        self.losses = deque(maxlen=rsi_period)
+        self.closes = deque(maxlen=momentum_period)
+        # (close, short EMA, long EMA, signal EMA) over the whole history
+        self.ema: Optional[Tuple[float, float, float, float]] = None
+        # The same tuples for the current window, oldest first
+        self.history = deque(maxlen=window) if window is not None else None
+
+    def _step(self, close: float):
+        """Next full-history EMA tuple plus the candle's gain and loss"""
+        if self.ema is None:
+            return (close, close, close, 0.0), 0.0, 0.0
+        _, ema_short, ema_long, signal = self.ema
+        ema_short = (1 - self.alpha_short) * ema_short + self.alpha_short * close
+        ema_long = (1 - self.alpha_long) * ema_long + self.alpha_long * close
+        signal = (1 - self.alpha_signal) * signal + self.alpha_signal * (ema_short - ema_long)
+        delta = close - self.prev_close
+        return (close, ema_short, ema_long, signal), max(delta, 0.0), max(-delta, 0.0)
+
+    def _values(self, ema: Tuple[float, float, float, float], gain: float, loss: float,
+                start: Optional[Tuple[float, float, float, float]], size: int) -> IndicatorValues:
+        close, ema_short, ema_long, signal = ema
+
+        rsi = 50.0
+        if size >= self.rsi_period + 1:
+            gains, losses = list(self.gains), list(self.losses)
+            if len(gains) == self.rsi_period:
+                gains, losses = gains[1:], losses[1:]
+            avg_gain = (sum(gains) + gain) / self.rsi_period
+            avg_loss = (sum(losses) + loss) / self.rsi_period
+            if avg_loss > 0:
+                rsi = 100 - 100 / (1 + avg_gain / avg_loss)
+            elif avg_gain > 0:
+                rsi = 100.0
+
+        histogram = 0.0
+        if size >= self.long_span:
+            macd = ema_short - ema_long
+            if start is not None:
+                start_close, start_short, start_long, start_signal = start
+                drift_short = start_short - start_close
+                drift_long = start_long - start_close
+                macd -= self.decay_short * drift_short - self.decay_long * drift_long
+                signal = (signal - self.decay_signal * start_signal
+                          - (self.k_short * drift_short - self.k_long * drift_long))
+            histogram = macd - signal
+
+        momentum = 0.0
+        if size >= self.momentum_period + 1:
+            momentum = close - self.closes[0]
+        return IndicatorValues(rsi, histogram, momentum)
+
+    def _window_start(self, size: int) -> Optional[Tuple[float, float, float, float]]:
+        """EMA tuple of the first candle in a full window ending at the next candle"""
+        if self.window is None or size < self.window:
+            return None
+        return self.history[len(self.history) + 1 - self.window]
+
+    def peek(self, close: float) -> IndicatorValues:
+        """Indicators as if ``close`` were the next candle, without storing it"""
+        size = self.count + 1 if self.window is None else min(self.count + 1, self.window)
+        ema, gain, loss = self._step(close)
+        return self._values(ema, gain, loss, self._window_start(size), size)
+
+    def update(self, close: float, open_time: Optional[int] = None) -> IndicatorValues:
+        """Add a closed candle and return the indicators ending at it"""
+        values = self.values = self.peek(close)
+        ema, gain, loss = self._step(close)
+        if self.ema is not None:
+            self.gains.append(gain)
+            self.losses.append(loss)
+        self.closes.append(close)
+        self.ema = ema
+        if self.history is not None:
+            self.history.append(ema)
+        self.prev_close = close
+        self.last_open_time = open_time
+        self.count += 1
+        return values
+
+class IndicatorEngine:
+    """Indicator state per (symbol, interval), kept in step with candle frames"""
+
+    def __init__(self, window: Optional[int] = 100, **params):
+        self.window = window
+        self.params = params
+        self.states: Dict[Tuple[str, str], IndicatorState] = {}
+        self.updates = 0
+        self.reseeds = 0
+
+    def reset(self, symbol: str, interval: str):
+        self.states.pop((symbol, interval), None)
+
+    def update(self, symbol: str, interval: str, open_time: int, close: float) -> Optional[IndicatorValues]:
+        """Feed one closed candle; ignores candles at or before the last one seen"""
+        state = self.states.get((symbol, interval))
+        if state is None:
+            state = self.states[(symbol, interval)] = IndicatorState(self.window, **self.params)
+        elif state.last_open_time is not None and open_time <= state.last_open_time:
+            return None
+        self.updates += 1
+        return state.update(close, open_time)
+
+    def evaluate(self, symbol: str, interval: str, timestamps: Sequence[int], closes: Sequence[float],
+                 forming: bool = False) -> Optional[IndicatorValues]:
+        """Indicators at the end of a candle series, advancing state by its new closed candles.
+
+        Every row but the last is treated as closed; the last one too unless
+        ``forming``, in which case it is only peeked at. State that does not
+        join up with the series (first sight, a gap, an older series) is
+        rebuilt from it.
+        """
+        if len(closes) == 0:
+            return None
+        closed = len(closes) - 1 if forming else len(closes)
+        key = (symbol, interval)
+        state = self.states.get(key)
+
+        start = 0
+        if state is not None and state.last_open_time is not None and closed > 0:
+            last = state.last_open_time
+            if int(timestamps[0]) <= last <= int(timestamps[closed - 1]):
+                # Rows are sorted, so find where the state left off
+                pos = bisect.bisect_left(timestamps, last, 0, closed)
+                start = pos + 1 if int(timestamps[pos]) == last else -1
+            else:
+                start = -1
+        if state is None or start < 0:
+            if state is not None:
+                self.reseeds += 1
+            state = self.states[key] = IndicatorState(self.window, **self.params)
+            start = 0
+
+        values = None
+        for i in range(start, closed):
+            values = state.update(float(closes[i]), int(timestamps[i]))
+            self.updates += 1
+        if forming:
+            return state.peek(float(closes[-1]))
+        return values if values is not None else state.values
+
+    def snapshot(self) -> Dict:
+        return {"symbols": len(self.states), "updates": self.updates, "reseeds": self.reseeds}
+
+class IndicatorCache:
+    """LRU of indicator values keyed by (symbol, interval, open time of the last closed candle).
+
+    Values only change when a candle closes, so every evaluation between two
+    closes is a hit. A newer candle for a symbol supersedes its older entry,
+    and least recently used entries are evicted beyond ``max_bytes``.
+    """
+
+    def __init__(self, max_bytes: int = 16 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.entries: "OrderedDict[Tuple[str, str, int], Tuple[IndicatorValues, int]]" = OrderedDict()
+        self.latest: Dict[Tuple[str, str], int] = {}
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _size(key: Tuple[str, str, int], values: IndicatorValues) -> int:
+        """Approximate bytes held by one entry"""
+        return (sys.getsizeof(key) + sum(sys.getsizeof(part) for part in key)
+                + sys.getsizeof(values) + sum(sys.getsizeof(value) for value in values))
+
+    def get(self, symbol: str, interval: str, open_time: int) -> Optional[IndicatorValues]:
+        entry = self.entries.get((symbol, interval, open_time))
+        if entry is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end((symbol, interval, open_time))
+        self.hits += 1
+        return entry[0]
+
+    def _discard(self, key: Tuple[str, str, int]):
+        _, size = self.entries.pop(key)
+        self.bytes -= size
+        if self.latest.get(key[:2]) == key[2]:
+            del self.latest[key[:2]]
+
+    def put(self, symbol: str, interval: str, open_time: int, values: IndicatorValues):
+        previous = self.latest.get((symbol, interval))
+        if previous is not None and previous > open_time:
+            return  # Already holding a newer candle's values
+        if previous is not None:
+            self._discard((symbol, interval, previous))
+
+        key = (symbol, interval, open_time)
+        size = self._size(key, values)
+        self.entries[key] = (values, size)
+        self.latest[(symbol, interval)] = open_time
+        self.bytes += size
+        while self.bytes > self.max_bytes and len(self.entries) > 1:
+            self._discard(next(iter(self.entries)))
+            self.evictions += 1
+
+    def snapshot(self) -> Dict:
+        return {"entries": len(self.entries), "bytes": self.bytes, "hits": self.hits,
+                "misses": self.misses, "evictions": self.evictions}
+
+def stack_closes(series: Sequence[np.ndarray], length: Optional[int] = None) -> np.ndarray:
+    """Right-align close series into a (symbols x candles) matrix, NaN-padded on the left"""
+    length = max((len(c) for c in series), default=0) if length is None else length
+    matrix = np.full((len(series), length), np.nan)
+    for row, closes in enumerate(series):
+        closes = np.asarray(closes, dtype=np.float64)[-length:]
+        if len(closes):
+            matrix[row, length - len(closes):] = closes
+    return matrix
+
+def _cumulative(values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Running sums and nonzero counts along each row, shared by every window length"""
+    return np.cumsum(values, axis=1), np.cumsum(values != 0, axis=1)
+
+def _rolling_mean(cumulative: Tuple[np.ndarray, np.ndarray], period: int) -> np.ndarray:
+    """Trailing mean over ``period`` columns from ``_cumulative`` (NaN before it fills)"""
+    sums, nonzero = cumulative
+    out = np.full(sums.shape, np.nan)
+    if sums.shape[1] < period:
+        return out
+    out[:, period - 1] = sums[:, period - 1]
+    out[:, period:] = sums[:, period:] - sums[:, :-period]
+    # Exact zero windows stay exactly zero - differences of large sums would not
+    counts = np.zeros(sums.shape, dtype=np.int64)
+    counts[:, period - 1] = nonzero[:, period - 1]
+    counts[:, period:] = nonzero[:, period:] - nonzero[:, :-period]
+    out[:, period - 1:][counts[:, period - 1:] == 0] = 0.0
+    return out / period
+
+def _ema_columns(values: np.ndarray, span: int) -> np.ndarray:
+    """adjust=False EMA along each row, one vector step per column; starts at each row's first value"""
+    alpha = 2 / (span + 1)
+    columns = np.ascontiguousarray(values.T)  # Each step reads and writes one contiguous vector
+    out = np.empty(columns.shape)
+    # From the step after the last NaN input every row is running, so the
+    # rest is the plain recurrence, done in place without per-step NaN checks
+    gaps = np.flatnonzero(np.isnan(columns).any(axis=1))
+    started = min(int(gaps[-1]) + 2 if len(gaps) else 1, len(columns))
+
+    ema = np.full(columns.shape[1], np.nan)
+    for col in range(started):
+        x = columns[col]
+        ema = np.where(np.isnan(ema), x, (1 - alpha) * ema + alpha * x)
+        out[col] = ema
+    weighted = alpha * columns[started:]
+    for col in range(started, len(columns)):
+        np.multiply(out[col - 1], 1 - alpha, out=out[col])
+        out[col] += weighted[col - started]
+    return out.T
+
+def _series_layout(closes: np.ndarray):
+    """Float matrix plus each row's candle count and per-column position in its series"""
+    closes = np.atleast_2d(np.asarray(closes, dtype=np.float64))
+    lengths = (~np.isnan(closes)).sum(axis=1)
+    position = np.arange(closes.shape[1]) - (closes.shape[1] - lengths)[:, None]
+    return closes, lengths, position
+
+def _gains_losses(closes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Per-candle gains and losses; a row's first delta counts as 0, like pandas' diff().where(...)"""
+    delta = np.zeros_like(closes)
+    delta[:, 1:] = closes[:, 1:] - closes[:, :-1]
+    delta[np.isnan(delta)] = 0.0
+    return np.where(delta > 0, delta, 0.0), np.where(delta < 0, -delta, 0.0)
+
+def _rsi(gain_sums, loss_sums, period: int, lengths: np.ndarray, position: np.ndarray) -> np.ndarray:
+    avg_gain = _rolling_mean(gain_sums, period)
+    avg_loss = _rolling_mean(loss_sums, period)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rsi = 100 - 100 / (1 + avg_gain / avg_loss)
+    rsi[position < period - 1] = np.nan
+    rsi = np.where(np.isnan(rsi), 50.0, rsi)
+    rsi[lengths < period + 1] = 50.0
+    rsi[position < 0] = np.nan
+    return rsi
+
+def _macd(ema_short: np.ndarray, ema_long: np.ndarray, long_span: int, signal_span: int,
+          lengths: np.ndarray, position: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    macd = ema_short - ema_long
+    signal = _ema_columns(macd, signal_span)
+    histogram = macd - signal
+    for series in (macd, signal, histogram):
+        series[lengths < long_span] = 0.0
+        series[position < 0] = np.nan
+    return macd, signal, histogram
+
+def _momentum(closes: np.ndarray, period: int, lengths: np.ndarray, position: np.ndarray) -> np.ndarray:
+    momentum = np.full_like(closes, np.nan)
+    momentum[:, period:] = closes[:, period:] - closes[:, :-period]
+    momentum[position < period] = np.nan
+    momentum[lengths < period + 1] = 0.0
+    momentum[position < 0] = np.nan
+    return momentum
+
+def batch_rsi(closes: np.ndarray, period: int = RSI_PERIOD) -> np.ndarray:
+    """RSI series per row via cumulative-sum rolling means (50 where undefined)"""
+    closes, lengths, position = _series_layout(closes)
+    gains, losses = _gains_losses(closes)
+    return _rsi(_cumulative(gains), _cumulative(losses), period, lengths, position)
+
+def batch_macd(closes: np.ndarray, short_span: int = MACD_SHORT_SPAN, long_span: int = MACD_LONG_SPAN,
+               signal_span: int = MACD_SIGNAL_SPAN) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """MACD line, signal line and histogram per row via vectorised EMA recurrences"""
+    closes, lengths, position = _series_layout(closes)
+    return _macd(_ema_columns(closes, short_span), _ema_columns(closes, long_span),
+                 long_span, signal_span, lengths, position)
+
+def rolling_macd_histogram(closes: np.ndarray, window: int = 100, short_span: int = MACD_SHORT_SPAN,
+                           long_span: int = MACD_LONG_SPAN, signal_span: int = MACD_SIGNAL_SPAN) -> np.ndarray:
+    """MACD histogram per row as the bot sees it at every candle - over the last ``window`` closes only.
+
+    Runs the EMAs once over each whole row and applies ``IndicatorState``'s
+    closed-form window correction at every column, so a long history costs
+    the same as ``batch_macd`` instead of one window's recomputation per candle.
+    """
+    closes, lengths, position = _series_layout(closes)
+    ema_short = _ema_columns(closes, short_span)
+    ema_long = _ema_columns(closes, long_span)
+    macd = ema_short - ema_long
+    signal = _ema_columns(macd, signal_span)
+    histogram = macd - signal
+
+    lag = window - 1
+    if lag > 0 and closes.shape[1] > lag:
+        state = IndicatorState(window, short_span=short_span, long_span=long_span, signal_span=signal_span)
+        drift_short = ema_short[:, :-lag] - closes[:, :-lag]  # At each window's first candle
+        drift_long = ema_long[:, :-lag] - closes[:, :-lag]
+        windowed_macd = macd[:, lag:] - (state.decay_short * drift_short - state.decay_long * drift_long)
+        windowed_signal = (signal[:, lag:] - state.decay_signal * signal[:, :-lag]
+                           - (state.k_short * drift_short - state.k_long * drift_long))
+        full = position[:, lag:] >= lag
+        histogram[:, lag:] = np.where(full, windowed_macd - windowed_signal, histogram[:, lag:])
+    histogram[position < long_span - 1] = 0.0
+    histogram[position < 0] = np.nan
+    return histogram
+
+def batch_momentum(closes: np.ndarray, period: int = MOMENTUM_PERIOD) -> np.ndarray:
+    """Difference against the close ``period`` candles back, per row"""
+    closes, lengths, position = _series_layout(closes)
+    return _momentum(closes, period, lengths, position)
+
+def batch_indicators(closes: np.ndarray, rsi_period: int = RSI_PERIOD,
+                     short_span: int = MACD_SHORT_SPAN, long_span: int = MACD_LONG_SPAN,
+                     signal_span: int = MACD_SIGNAL_SPAN, momentum_period: int = MOMENTUM_PERIOD,
+                     full: bool = False) -> IndicatorValues:
+    """RSI, MACD histogram and momentum for every row of a close-price matrix.
+
+    Rows are right-aligned series (see ``stack_closes``); leading NaNs mark
+    candles a symbol does not have. Each row gives what the bot's pandas
+    methods gave for that series, including their short-history defaults.
+    Returns the last value per row, or the full (symbols x candles) series
+    when ``full`` is set.
+    """
+    rsi = batch_rsi(closes, rsi_period)
+    _, _, histogram = batch_macd(closes, short_span, long_span, signal_span)
+    momentum = batch_momentum(closes, momentum_period)
+    if not full:
+        return IndicatorValues(rsi[:, -1], histogram[:, -1], momentum[:, -1])
+    return IndicatorValues(rsi, histogram, momentum)
+
+def latest_indicators(closes: np.ndarray, names: Sequence[str]) -> IndicatorValues:
+    """Last value of only the named indicators for one close series (NaN for the others)"""
+    closes = np.asarray(closes, dtype=np.float64)[np.newaxis]
+    values = dict.fromkeys(IndicatorValues._fields, np.nan)
+    if "rsi" in names:
+        values["rsi"] = float(batch_rsi(closes)[0, -1])
+    if "macd_histogram" in names:
+        values["macd_histogram"] = float(batch_macd(closes)[2][0, -1])
+    if "momentum" in names:
+        values["momentum"] = float(batch_momentum(closes)[0, -1])
+    return IndicatorValues(**values)
+
+def sweep_field_names(rsi_periods: Sequence[int] = (RSI_PERIOD,),
+                      macd_params: Sequence[Tuple[int, int, int]] = ((MACD_SHORT_SPAN, MACD_LONG_SPAN, MACD_SIGNAL_SPAN),),
+                      momentum_periods: Sequence[int] = (MOMENTUM_PERIOD,)) -> List[str]:
+    """Result field names for a sweep, e.g. rsi_14, macd_12_26_9, momentum_10"""
+    return ([f"rsi_{period}" for period in rsi_periods]
+            + [f"macd_{short}_{long}_{signal}" for short, long, signal in macd_params]
+            + [f"momentum_{period}" for period in momentum_periods])
+
+def indicator_sweep(closes: np.ndarray, rsi_periods: Sequence[int] = (RSI_PERIOD,),
+                    macd_params: Sequence[Tuple[int, int, int]] = ((MACD_SHORT_SPAN, MACD_LONG_SPAN, MACD_SIGNAL_SPAN),),
+                    momentum_periods: Sequence[int] = (MOMENTUM_PERIOD,), full: bool = False) -> np.ndarray:
+    """Several RSI / MACD / momentum parameterisations in one pass over the prices.
+
+    The gains and losses and their running sums are computed once and reused
+    for every RSI period. Each distinct EMA span is run once, even when several
+    MACD settings use it (e.g. 12-26-9 and 12-26-5). Returns a structured
+    array with one float64 field per setting, named as in
+    ``sweep_field_names``: ``macd_*`` holds the histogram. For a 1-D price
+    series the shape is () for the last values, or (candles,) with ``full``.
+    For a (symbols x candles) matrix it is (symbols,) or (symbols, candles).
+    """
+    one_series = np.ndim(closes) == 1
+    closes, lengths, position = _series_layout(closes)
+    names = sweep_field_names(rsi_periods, macd_params, momentum_periods)
+    if len(set(names)) != len(names):
+        raise ValueError("duplicate indicator settings in sweep")
+
+    results = []
+    if rsi_periods:
+        gains, losses = _gains_losses(closes)
+        gain_sums, loss_sums = _cumulative(gains), _cumulative(losses)
+        results += [_rsi(gain_sums, loss_sums, period, lengths, position) for period in rsi_periods]
+
+    emas = {span: _ema_columns(closes, span) for span in sorted({span for params in macd_params for span in params[:2]})}
+    for short, long, signal in macd_params:
+        results.append(_macd(emas[short], emas[long], long, signal, lengths, position)[2])
+
+    results += [_momentum(closes, period, lengths, position) for period in momentum_periods]
+
+    shape = closes.shape if full else closes.shape[:1]
+    table = np.empty(shape, dtype=[(name, np.float64) for name in names])
+    for name, values in zip(names, results):
+        table[name] = values if full else values[:, -1]
+    return table[0] if one_series else table
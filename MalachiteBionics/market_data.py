@@ -0,0 +1,688 @@
+"""
+Market data helpers for the website trading bot
+Kline decoding straight into NumPy columns (the Klines container - pandas is
+only imported for to_frame()), request-weight governor, incremental kline
+cache (delta fetches, gap backfill, optional on-disk persistence via
+candle_store.py) and Binance kline streaming (combined WebSocket streams) with
+an in-memory candle series
+"""
+
+import asyncio
+import aiohttp
+import numpy as np
+import json
+import io
+import logging
+import time
+from collections import deque
+from typing import AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger("market_data")
+
+# Binance kline interval lengths in milliseconds
+INTERVAL_MS = {
+    "1m": 60_000,
+    "3m": 180_000,
+    "5m": 300_000,
+    "15m": 900_000,
+    "30m": 1_800_000,
+    "1h": 3_600_000,
+    "2h": 7_200_000,
+    "4h": 14_400_000,
+    "6h": 21_600_000,
+    "8h": 28_800_000,
+    "12h": 43_200_000,
+    "1d": 86_400_000,
+    "3d": 259_200_000,
+    "1w": 604_800_000,
+}
+
+KLINE_COLUMNS = ["timestamp", "open", "high", "low", "close", "volume"]
+# The columns the bot keeps from each REST kline row, parsed straight to these types
+KLINE_RECORD = np.dtype([(name, np.int64 if name == "timestamp" else np.float64) for name in KLINE_COLUMNS])
+
+def now_ms() -> int:
+    """Current UTC time in epoch milliseconds"""
+    return int(time.time() * 1000)
+
+def stream_name(symbol: str, interval: str) -> str:
+    """Binance stream name for a symbol's klines, e.g. solusdt@kline_1h"""
+    return f"{symbol.lower()}@kline_{interval}"
+
+def decode_klines(raw: bytes) -> Optional[Dict[str, np.ndarray]]:
+    """Decode a /api/v3/klines response body into contiguous NumPy columns.
+
+    Binance sends compact ``[[openTime,"open","high","low","close","volume",...],...]``.
+    Turning each ``],[`` row boundary into a newline (the one copy made of
+    the body) leaves CSV that NumPy's loadtxt reads in a single C pass,
+    converting only the six columns the bot keeps - open times straight to
+    int64, no per-candle lists, dicts or float() calls. Anything else (spaced
+    JSON, nulls, error bodies) goes through json instead. Returns None for an
+    empty response.
+    """
+    body = raw.strip()
+    if not body:
+        return None
+    rows = None
+    if body.startswith(b"[[") and body.endswith(b"]]"):
+        stream = io.BytesIO(body.replace(b"],[", b"\n"))
+        stream.seek(2)  # Past the opening "[["; the closing "]]" trails an unused column
+        try:
+            rows = np.loadtxt(stream, dtype=KLINE_RECORD, delimiter=",", quotechar='"',
+                              usecols=range(len(KLINE_COLUMNS)), ndmin=1)
+        except ValueError:
+            pass
+        # A row boundary written any other way would merge rows - one "]" closes each row
+        if rows is not None and len(rows) != body.count(b"]") - 1:
+            rows = None
+
+    if rows is None:
+        # Unexpected content or shape - let the JSON parser decide
+        data = json.loads(raw)
+        if not data:
+            return None
+        values = np.array([row[:len(KLINE_COLUMNS)] for row in data], dtype=np.float64)
+        rows = {name: values[:, i] for i, name in enumerate(KLINE_COLUMNS)}
+
+    # Price/volume columns share one preallocated block so each is contiguous
+    block = np.empty((5, len(rows["timestamp"])), dtype=np.float64)
+    columns = {"timestamp": np.ascontiguousarray(rows["timestamp"], dtype=np.int64)}
+    for i, name in enumerate(KLINE_COLUMNS[1:]):
+        block[i] = rows[name]
+        columns[name] = block[i]
+    return columns
+
+class Klines:
+    """Candles as NumPy columns - the bot's lightweight stand-in for a DataFrame.
+
+    ``klines["close"]`` is a float64 array and ``klines["timestamp"]`` the
+    int64 open times in ms, oldest first. Indexing with a slice, boolean mask
+    or index array returns a new Klines over those rows (views where NumPy
+    allows). ``to_frame()`` imports pandas lazily for analysis and export.
+    """
+
+    __slots__ = ("columns",)
+
+    def __init__(self, columns: Dict[str, np.ndarray]):
+        self.columns = columns
+
+    @classmethod
+    def from_rows(cls, rows: Sequence[Sequence[float]]) -> "Klines":
+        """Build from ``[open_time, open, high, low, close, volume]`` rows"""
+        block = np.array(rows, dtype=np.float64).reshape(-1, len(KLINE_COLUMNS))
+        columns = {"timestamp": block[:, 0].astype(np.int64)}
+        for i, name in enumerate(KLINE_COLUMNS[1:], start=1):
+            columns[name] = np.ascontiguousarray(block[:, i])
+        return cls(columns)
+
+    def __len__(self) -> int:
+        return len(self.columns["timestamp"])
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            return self.columns[key]
+        return Klines({name: column[key] for name, column in self.columns.items()})
+
+    @property
+    def empty(self) -> bool:
+        return len(self) == 0
+
+    def tail(self, n: int) -> "Klines":
+        return self[max(len(self) - n, 0):]
+
+    def rows(self) -> List[List[float]]:
+        """Rows as ``[open_time, open, high, low, close, volume]`` lists"""
+        columns = [self.columns[name].tolist() for name in KLINE_COLUMNS]
+        return [list(row) for row in zip(*columns)]
+
+    def merge(self, other: "Klines") -> "Klines":
+        """Union by open time, sorted; ``other`` wins where both have a candle"""
+        timestamps = np.concatenate([self["timestamp"], other["timestamp"]])
+        order = np.argsort(timestamps, kind="stable")
+        ordered = timestamps[order]
+        # After a stable sort the later (other) duplicate comes last - keep it
+        keep = np.ones(len(order), dtype=bool)
+        keep[:-1] = ordered[1:] != ordered[:-1]
+        order = order[keep]
+        return Klines({
+            name: np.concatenate([self.columns[name], other.columns[name]])[order]
+            for name in KLINE_COLUMNS
+        })
+
+    def to_frame(self):
+        """The candles as a pandas DataFrame (imports pandas on first use)"""
+        import pandas as pd
+        return pd.DataFrame(self.columns, columns=KLINE_COLUMNS, copy=False)
+
+def kline_request_weight(limit: int) -> int:
+    """Request weight Binance charges for GET /api/v3/klines"""
+    if limit < 100:
+        return 1
+    if limit < 500:
+        return 2
+    if limit <= 1000:
+        return 5
+    return 10
+
+class RateLimitGovernor:
+    """Shared request-weight budget for the Binance REST API.
+
+    Binance counts request weight per IP per calendar minute and reports the
+    running total in ``X-MBX-USED-WEIGHT-1M``. The governor works like a token
+    bucket that refills at each minute boundary: callers ``acquire`` their
+    request's weight before sending and queue (FIFO) once the budget - the
+    limit minus a safety margin - is spent. Response headers correct the local
+    estimate, which also accounts for other processes on the same IP, but only
+    for requests sent in the current window. HTTP 429/418 pause every caller
+    until ``Retry-After`` has passed.
+    """
+
+    def __init__(self, weight_limit: int = 6000, safety_margin: float = 0.1,
+                 clock: Callable[[], float] = time.time):
+        self.weight_limit = weight_limit
+        self.budget = int(weight_limit * (1 - safety_margin))
+        self.clock = clock
+
+        self.window = None
+        self.used_weight = 0
+        self.paused_until = 0.0
+        self.peak_weight = 0
+        self.throttled = 0  # acquires that had to wait for budget
+        self.rate_limited = 0  # 429 responses
+        self.banned = 0  # 418 responses
+
+        self._lock = asyncio.Lock()
+
+    def _roll_window(self, now: float):
+        window = int(now // 60)
+        if window != self.window:
+            self.window = window
+            self.used_weight = 0
+
+    async def acquire(self, weight: int = 1) -> int:
+        """Wait until ``weight`` fits in the current minute's budget, take it and return the window"""
+        async with self._lock:
+            waited = False
+            while True:
+                now = self.clock()
+                if now < self.paused_until:
+                    waited = True
+                    await asyncio.sleep(self.paused_until - now)
+                    continue
+
+                self._roll_window(now)
+                if self.used_weight + weight <= self.budget or self.used_weight == 0:
+                    self.used_weight += weight
+                    self.peak_weight = max(self.peak_weight, self.used_weight)
+                    if waited:
+                        self.throttled += 1
+                    return self.window
+
+                # Budget spent - wait for the next minute window
+                waited = True
+                await asyncio.sleep((self.window + 1) * 60 - now + 0.05)
+
+    def observe(self, status: int, headers, sent_window: Optional[int] = None) -> None:
+        """Update the budget from a response's status and rate-limit headers.
+
+        ``sent_window`` is what ``acquire`` returned for the request. A response
+        to a request sent before the current window reports the previous
+        minute's weight, so its count is ignored.
+        """
+        now = self.clock()
+        self._roll_window(now)
+
+        used = headers.get("X-MBX-USED-WEIGHT-1M") or headers.get("x-mbx-used-weight-1m")
+        if used is not None and sent_window in (None, self.window):
+            try:
+                # Responses can finish out of order - never lower the count
+                self.used_weight = max(self.used_weight, int(used))
+                self.peak_weight = max(self.peak_weight, self.used_weight)
+            except ValueError:
+                pass
+
+        if status in (429, 418):
+            try:
+                retry_after = int(headers.get("Retry-After", 60))
+            except ValueError:
+                retry_after = 60
+            self.paused_until = max(self.paused_until, now + retry_after)
+            if status == 418:
+                self.banned += 1
+                logger.error(f"Binance IP ban (HTTP 418) - pausing all requests for {retry_after}s")
+            else:
+                self.rate_limited += 1
+                logger.warning(f"Binance rate limit hit (HTTP 429) - pausing all requests for {retry_after}s")
+
+    def snapshot(self) -> Dict:
+        """Current budget usage, for logs and status pages"""
+        now = self.clock()
+        self._roll_window(now)
+        return {
+            "weight_limit": self.weight_limit,
+            "budget": self.budget,
+            "used_weight": self.used_weight,
+            "remaining": max(self.budget - self.used_weight, 0),
+            "utilization": round(self.used_weight / self.weight_limit * 100, 1),
+            "peak_weight": self.peak_weight,
+            "paused_for": max(round(self.paused_until - now, 1), 0),
+            "throttled": self.throttled,
+            "rate_limited": self.rate_limited,
+            "banned": self.banned
+        }
+
+class KlineCache:
+    """In-memory candles per (symbol, interval), kept fresh with delta fetches.
+
+    The first request for a key downloads the full window. After that only
+    candles from the last cached open time onwards are requested (that candle
+    is refetched because it was probably still forming), merged in place, and
+    any holes inside the window are backfilled. ``fetcher`` is called as
+    ``fetcher(symbol, interval, limit, start_time)`` and returns Klines.
+
+    With a ``store`` (a CandleStore) a cold key is warmed from disk instead of
+    the exchange, and every closed candle is appended to the store.
+    """
+
+    def __init__(self, fetcher: Callable[..., Awaitable[Optional[Klines]]],
+                 max_candles: int = 1000, clock: Callable[[], int] = now_ms,
+                 store=None):
+        self.fetcher = fetcher
+        self.max_candles = max_candles
+        self.clock = clock
+        self.store = store
+        self.frames: Dict[Tuple[str, str], Klines] = {}
+        self.unfillable = set()  # (symbol, interval, gap_start) the exchange has no data for
+        self.full_fetches = 0
+        self.delta_fetches = 0
+        self.backfills = 0
+        self.warm_starts = 0
+
+    def get(self, symbol: str, interval: str) -> Optional[Klines]:
+        """Cached candles for a key without touching the exchange"""
+        return self.frames.get((symbol, interval))
+
+    def merge(self, symbol: str, interval: str, new: Klines) -> Klines:
+        """Merge fetched candles into the cache; newer rows win on the same open time"""
+        key = (symbol, interval)
+        old = self.frames.get(key)
+        if old is None or old.empty:
+            merged = new
+        elif new is None or new.empty:
+            merged = old
+        else:
+            merged = old.merge(new)
+
+        merged = merged.tail(self.max_candles)
+        self.frames[key] = merged
+        return merged
+
+    @staticmethod
+    def find_gaps(klines: Klines, interval_ms: int) -> List[Tuple[int, int]]:
+        """Missing (first open time, candle count) ranges inside a candle window"""
+        timestamps = klines["timestamp"]
+        steps = np.diff(timestamps)
+        return [
+            (int(timestamps[idx]) + interval_ms, int(steps[idx] // interval_ms) - 1)
+            for idx in np.flatnonzero(steps > interval_ms)
+        ]
+
+    async def get_klines(self, symbol: str, interval: str, limit: int) -> Optional[Klines]:
+        """Return the latest ``limit`` candles, fetching only what changed"""
+        key = (symbol, interval)
+        interval_ms = INTERVAL_MS[interval]
+        cached = self.frames.get(key)
+
+        if cached is None and self.store is not None:
+            stored = self.store.read(symbol, interval, limit=self.max_candles)
+            if stored is not None and not stored.empty:
+                self.frames[key] = cached = stored
+                self.warm_starts += 1
+
+        if cached is None or len(cached) < limit:
+            klines = await self.fetcher(symbol, interval, limit)
+            if klines is None or klines.empty:
+                return cached.tail(limit) if cached is not None else None
+            self.full_fetches += 1
+            self.frames.pop(key, None)
+            merged = self.merge(symbol, interval, klines)
+        else:
+            last_open = int(cached["timestamp"][-1])
+            missing = (self.clock() - last_open) // interval_ms + 1
+
+            if missing >= limit:
+                # Offline for longer than the window - a full fetch is cheaper
+                klines = await self.fetcher(symbol, interval, limit)
+                if klines is None or klines.empty:
+                    return cached.tail(limit)
+                self.full_fetches += 1
+                self.frames.pop(key, None)
+                merged = self.merge(symbol, interval, klines)
+            else:
+                klines = await self.fetcher(symbol, interval, int(missing) + 1, last_open)
+                if klines is None or klines.empty:
+                    return cached.tail(limit)
+                self.delta_fetches += 1
+                merged = self.merge(symbol, interval, klines)
+
+        merged = await self._backfill(symbol, interval, merged)
+        await self._save(symbol, interval, merged)
+        return merged.tail(limit)
+
+    async def record(self, symbol: str, interval: str, klines: Klines) -> Klines:
+        """Merge candles that arrived outside a fetch (e.g. from a kline stream) and persist them"""
+        merged = self.merge(symbol, interval, klines)
+        await self._save(symbol, interval, merged)
+        return merged
+
+    async def _save(self, symbol: str, interval: str, klines: Klines):
+        if self.store is None:
+            return
+        try:
+            await self._persist(symbol, interval, klines)
+        except Exception as e:
+            logger.error(f"Failed to persist {symbol} {interval} candles: {e}")
+
+    async def _persist(self, symbol: str, interval: str, klines: Klines):
+        """Append closed candles to the store, first filling any stretch it is missing"""
+        interval_ms = INTERVAL_MS[interval]
+        closed = klines[klines["timestamp"] + interval_ms <= self.clock()]
+        if closed.empty:
+            return
+
+        last = self.store.last_open_time(symbol, interval)
+        if last is not None:
+            # The window can start after the store ends (e.g. after long downtime);
+            # page in the stretch between them so the history stays contiguous
+            async for page in self.fetch_range(symbol, interval, last + interval_ms, int(closed["timestamp"][0])):
+                self.store.append(symbol, interval, page)
+
+        self.store.append(symbol, interval, closed)
+
+    async def fetch_range(self, symbol: str, interval: str, start: int, end: int) -> AsyncIterator[Klines]:
+        """Pages of up to 1000 candles with open times in [start, end), oldest first"""
+        interval_ms = INTERVAL_MS[interval]
+        while start < end:
+            page = await self.fetcher(symbol, interval, min(max((end - start) // interval_ms, 1), 1000), start)
+            if page is None or page.empty:
+                break
+            page = page[page["timestamp"] < end]
+            if page.empty:
+                break
+            yield page
+            start = int(page["timestamp"][-1]) + interval_ms
+
+    async def download_history(self, symbol: str, interval: str, since: int) -> int:
+        """Page every closed candle from ``since`` into the store; returns candles written.
+
+        Fills both ends - history older than the store's first candle and
+        everything after its last - so it can be rerun to top the store up.
+        """
+        interval_ms = INTERVAL_MS[interval]
+        since = since // interval_ms * interval_ms
+        forming = self.clock() // interval_ms * interval_ms  # Candles opening here or later aren't closed
+        written = 0
+
+        first = self.store.first_open_time(symbol, interval)
+        if first is not None and since < first:
+            pages = [page async for page in self.fetch_range(symbol, interval, since, first)]
+            if pages:
+                older = Klines({name: np.concatenate([page[name] for page in pages]) for name in KLINE_COLUMNS})
+                written += self.store.prepend(symbol, interval, older)
+
+        last = self.store.last_open_time(symbol, interval)
+        start = since if last is None else max(since, last + interval_ms)
+        async for page in self.fetch_range(symbol, interval, start, forming):
+            written += self.store.append(symbol, interval, page)
+        return written
+
+    async def _backfill(self, symbol: str, interval: str, klines: Klines) -> Klines:
+        """Fetch candles missing from the middle of the cached window, a page at a time"""
+        interval_ms = INTERVAL_MS[interval]
+        for gap_start, count in self.find_gaps(klines, interval_ms):
+            if (symbol, interval, gap_start) in self.unfillable:
+                continue
+
+            filled = 0
+            async for page in self.fetch_range(symbol, interval, gap_start, gap_start + count * interval_ms):
+                self.backfills += 1
+                filled += len(page)
+                klines = self.merge(symbol, interval, page)
+            if not filled:
+                # Exchange has no candles here (e.g. maintenance) - don't ask again
+                self.backfills += 1
+                self.unfillable.add((symbol, interval, gap_start))
+                continue
+
+            logger.info(f"Backfilled {filled} missing {interval} candles for {symbol}")
+        return klines
+
+class KlineStream:
+    """Live kline series for a roster of symbols via Binance combined streams.
+
+    Each symbol keeps up to ``max_candles`` closed candles in memory, seeded
+    through ``history_loader`` and then extended from the stream. ``on_candle_closed``
+    is scheduled with the symbol as soon as a candle closes. The connection is
+    re-established with backoff when it drops, and symbols are resynced from
+    REST so candles that closed while disconnected are not missed.
+    """
+
+    def __init__(self, session: aiohttp.ClientSession, base_url: str,
+                 history_loader: Callable[[str, str, int], Awaitable[Optional[Klines]]],
+                 on_candle_closed: Callable[[str], Awaitable[None]],
+                 interval: str = "1h", max_candles: int = 100,
+                 clock: Callable[[], int] = now_ms):
+        self.session = session
+        self.base_url = base_url.rstrip("/")
+        self.history_loader = history_loader
+        self.on_candle_closed = on_candle_closed
+        self.interval = interval
+        self.interval_ms = INTERVAL_MS[interval]
+        self.max_candles = max_candles
+        self.clock = clock
+
+        self.symbols = set()
+        self.candles: Dict[str, deque] = {}
+        self.forming: Dict[str, List[float]] = {}
+        self.running = False
+        self.connected = False
+        self.reconnects = 0
+
+        self._ws = None
+        self._request_id = 0
+        self._wakeup = asyncio.Event()
+        self._evaluations = set()
+
+    # ------------------------------------------------------------------
+    # Candle series
+    # ------------------------------------------------------------------
+
+    def is_ready(self, symbol: str) -> bool:
+        """True once the symbol's series has been seeded"""
+        return symbol in self.candles
+
+    def last_closed_open_time(self, symbol: str) -> Optional[int]:
+        """Open time of the newest closed candle held for a symbol"""
+        series = self.candles.get(symbol)
+        return int(series[-1][0]) if series else None
+
+    def get_klines(self, symbol: str, include_forming: bool = False) -> Optional[Klines]:
+        """Closed candles for a symbol (plus the forming one if asked)"""
+        series = self.candles.get(symbol)
+        if not series:
+            return None
+
+        rows = list(series)
+        if include_forming and symbol in self.forming:
+            rows.append(self.forming[symbol])
+        return Klines.from_rows(rows)
+
+    async def seed(self, symbol: str) -> bool:
+        """(Re)load a symbol's closed candles from the history loader"""
+        # One extra row because the newest kline from REST is usually still open
+        klines = await self.history_loader(symbol, self.interval, self.max_candles + 1)
+        if klines is None or klines.empty:
+            logger.warning(f"Could not seed stream series for {symbol}")
+            return False
+
+        rows = klines[klines["timestamp"] + self.interval_ms <= self.clock()].rows()
+        self.candles[symbol] = deque(rows[-self.max_candles:], maxlen=self.max_candles)
+        return True
+
+    def apply_kline(self, symbol: str, kline: Dict) -> bool:
+        """Merge one stream kline payload; returns True when it closed a new candle"""
+        candle = [
+            int(kline["t"]), float(kline["o"]), float(kline["h"]),
+            float(kline["l"]), float(kline["c"]), float(kline["v"])
+        ]
+        series = self.candles.get(symbol)
+        if series is None:
+            return False
+
+        if not kline.get("x"):
+            self.forming[symbol] = candle
+            return False
+
+        self.forming.pop(symbol, None)
+        if series and series[-1][0] >= candle[0]:
+            return False  # Already have this candle (e.g. replay after resync)
+
+        series.append(candle)
+        return True
+
+    # ------------------------------------------------------------------
+    # Roster / subscriptions
+    # ------------------------------------------------------------------
+
+    async def set_symbols(self, symbols: Iterable[str]):
+        """Track exactly this roster, (un)subscribing on the live connection"""
+        wanted = {s.upper() for s in symbols}
+        added = wanted - self.symbols
+        removed = self.symbols - wanted
+        if not added and not removed:
+            return
+
+        for symbol in added:
+            if not await self.seed(symbol):
+                wanted.discard(symbol)  # Retried on the next roster refresh
+        added &= wanted
+        for symbol in removed:
+            self.candles.pop(symbol, None)
+            self.forming.pop(symbol, None)
+
+        self.symbols = wanted
+        logger.info(f"Kline stream roster: {len(wanted)} symbols (+{len(added)}, -{len(removed)})")
+
+        if self._ws is not None and not self._ws.closed:
+            if added:
+                await self._send_method("SUBSCRIBE", added)
+            if removed:
+                await self._send_method("UNSUBSCRIBE", removed)
+        else:
+            self._wakeup.set()
+
+    async def _send_method(self, method: str, symbols: Iterable[str]):
+        """Send a SUBSCRIBE/UNSUBSCRIBE request on the open connection"""
+        self._request_id += 1
+        await self._ws.send_str(json.dumps({
+            "method": method,
+            "params": [stream_name(s, self.interval) for s in sorted(symbols)],
+            "id": self._request_id
+        }))
+
+    # ------------------------------------------------------------------
+    # Connection handling
+    # ------------------------------------------------------------------
+
+    async def run(self):
+        """Keep a stream connection open until stop() is called"""
+        self.running = True
+        backoff = 1
+
+        while self.running:
+            if not self.symbols:
+                # Nothing to stream yet - wait for a roster
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            try:
+                streams = "/".join(stream_name(s, self.interval) for s in sorted(self.symbols))
+                url = f"{self.base_url}/stream?streams={streams}"
+                async with self.session.ws_connect(url, heartbeat=60) as ws:
+                    self._ws = ws
+                    self.connected = True
+                    backoff = 1
+                    logger.info(f"Kline stream connected ({len(self.symbols)} symbols)")
+
+                    if self.reconnects:
+                        await self._resync()
+
+                    async for msg in ws:
+                        if msg.type == aiohttp.WSMsgType.TEXT:
+                            await self._handle_message(msg.data)
+                        elif msg.type in (aiohttp.WSMsgType.CLOSED, aiohttp.WSMsgType.ERROR):
+                            break
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Kline stream error: {e}")
+            finally:
+                self._ws = None
+                self.connected = False
+
+            if self.running:
+                self.reconnects += 1
+                logger.info(f"Kline stream disconnected, reconnecting in {backoff}s")
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 60)
+
+    async def _resync(self):
+        """Reload every symbol after a reconnect and evaluate missed closes"""
+        for symbol in list(self.symbols):
+            before = self.last_closed_open_time(symbol)
+            if not await self.seed(symbol):
+                continue
+            after = self.last_closed_open_time(symbol)
+            if before is not None and after is not None and after > before:
+                self._evaluate(symbol)
+
+    def _evaluate(self, symbol: str):
+        """Run the close handler without blocking the message reader"""
+        task = asyncio.ensure_future(self.on_candle_closed(symbol))
+        self._evaluations.add(task)
+        task.add_done_callback(self._evaluation_done)
+
+    def _evaluation_done(self, task: asyncio.Future):
+        self._evaluations.discard(task)
+        if not task.cancelled() and task.exception():
+            logger.error(f"Candle close handler failed: {task.exception()}")
+
+    async def _handle_message(self, raw: str):
+        """Dispatch one combined-stream message"""
+        try:
+            message = json.loads(raw)
+        except json.JSONDecodeError:
+            logger.warning("Malformed kline stream message")
+            return
+
+        data = message.get("data")
+        if not data or data.get("e") != "kline":
+            return  # Subscription acknowledgements etc.
+
+        symbol = data["s"].upper()
+        if symbol not in self.symbols:
+            return
+
+        if self.apply_kline(symbol, data["k"]):
+            self._evaluate(symbol)
+
+    async def stop(self):
+        """Close the stream connection and stop reconnecting"""
+        self.running = False
+        self._wakeup.set()
+        if self._ws is not None and not self._ws.closed:
+            await self._ws.close()
+        for task in list(self._evaluations):
+            task.cancel()
@@ -0,0 +1,175 @@
+"""
+Higher-timeframe candles for the website trading bot
+Builds 4h/12h/1d/1w klines from closed 1h candles already held in the kline
+cache or candle store, so extra timeframes cost no exchange request weight
+"""
+
+import logging
+import math
+import numpy as np
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from market_data import INTERVAL_MS, KLINE_COLUMNS, Klines
+
+logger = logging.getLogger("resampler")
+
+RESAMPLED_INTERVALS = ("4h", "12h", "1d", "1w")
+
+# Binance weeks open on Monday 00:00 UTC; the epoch was a Thursday
+WEEK_OFFSET_MS = 4 * INTERVAL_MS["1d"]
+
+def bucket_open_times(timestamps: np.ndarray, interval: str) -> np.ndarray:
+    """Open time of the ``interval`` candle each open time falls into (Binance alignment)"""
+    interval_ms = INTERVAL_MS[interval]
+    offset = WEEK_OFFSET_MS if interval == "1w" else 0
+    timestamps = np.asarray(timestamps, dtype=np.int64)
+    return (timestamps - offset) // interval_ms * interval_ms + offset
+
+def _aggregate(klines: Klines, buckets: np.ndarray) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+    """Group consecutive rows by bucket: first open, max high, min low, last close, summed volume.
+
+    Volumes are summed with math.fsum (correctly rounded), so a candle's total
+    does not depend on how its source candles were batched.
+    """
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:], len(buckets)] - 1
+    columns = {
+        "timestamp": buckets[starts],
+        "open": klines["open"][starts],
+        "high": np.maximum.reduceat(klines["high"], starts),
+        "low": np.minimum.reduceat(klines["low"], starts),
+        "close": klines["close"][ends],
+        "volume": np.array([math.fsum(chunk) for chunk in np.split(klines["volume"], starts[1:])]),
+    }
+    return starts, columns
+
+def resample_klines(klines: Klines, interval: str, source_interval: str = "1h",
+                    include_partial: bool = False) -> Klines:
+    """Aggregate sorted source candles into ``interval`` candles.
+
+    Buckets the source series does not fully cover - the first one when the
+    series starts mid-bucket, and the last one when it is still filling - are
+    dropped unless ``include_partial``. Buckets with exchange gaps inside are
+    kept, as Binance builds them from whatever candles exist.
+    """
+    if klines is None or klines.empty:
+        return Klines({name: np.empty(0, dtype=np.int64 if name == "timestamp" else np.float64)
+                       for name in KLINE_COLUMNS})
+    buckets = bucket_open_times(klines["timestamp"], interval)
+    starts, columns = _aggregate(klines, buckets)
+    resampled = Klines(columns)
+    if include_partial:
+        return resampled
+
+    interval_ms = INTERVAL_MS[interval]
+    keep = np.ones(len(resampled), dtype=bool)
+    keep[0] = klines["timestamp"][0] == buckets[0]
+    last_open = int(klines["timestamp"][-1])
+    keep[-1] &= last_open + INTERVAL_MS[source_interval] >= int(buckets[-1]) + interval_ms
+    return resampled[keep]
+
+class CandleResampler:
+    """Higher-timeframe series per symbol, extended incrementally as source candles close.
+
+    ``update`` takes closed source candles (already-seen ones are ignored) and
+    folds them into a forming candle per interval; a candle moves to the
+    closed series once the source reaches the end of its bucket. A bucket the
+    first update only saw part of is never emitted.
+    """
+
+    def __init__(self, intervals: Sequence[str] = RESAMPLED_INTERVALS, source_interval: str = "1h",
+                 max_candles: int = 200):
+        for interval in intervals:
+            if INTERVAL_MS[interval] % INTERVAL_MS[source_interval]:
+                raise ValueError(f"{interval} is not a whole number of {source_interval} candles")
+        self.intervals = tuple(intervals)
+        self.source_interval = source_interval
+        self.source_ms = INTERVAL_MS[source_interval]
+        self.max_candles = max_candles
+
+        self.last_source: Dict[str, int] = {}
+        self.closed: Dict[Tuple[str, str], Klines] = {}
+        self.forming: Dict[Tuple[str, str], List[float]] = {}
+        self.forming_volumes: Dict[Tuple[str, str], List[float]] = {}  # Source volumes so far
+        self.partial: Dict[Tuple[str, str], int] = {}  # Bucket seen only in part
+
+    def history_needed(self) -> int:
+        """Source candles that fill ``max_candles`` of the longest interval"""
+        longest = max(INTERVAL_MS[interval] for interval in self.intervals)
+        return (self.max_candles + 1) * (longest // self.source_ms)
+
+    def has(self, symbol: str) -> bool:
+        return symbol in self.last_source
+
+    def update(self, symbol: str, klines: Optional[Klines]) -> Dict[str, int]:
+        """Fold in closed source candles; returns newly closed candles per interval"""
+        if klines is None or klines.empty:
+            return {}
+        last = self.last_source.get(symbol)
+        if last is not None:
+            klines = klines[klines["timestamp"] > last]
+            if klines.empty:
+                return {}
+        first_update = last is None
+        self.last_source[symbol] = int(klines["timestamp"][-1])
+
+        added = {}
+        for interval in self.intervals:
+            added[interval] = self._update_interval(symbol, interval, klines, first_update)
+        return added
+
+    def _update_interval(self, symbol: str, interval: str, klines: Klines, first_update: bool) -> int:
+        key = (symbol, interval)
+        interval_ms = INTERVAL_MS[interval]
+        buckets = bucket_open_times(klines["timestamp"], interval)
+        starts, columns = _aggregate(klines, buckets)
+        rows = [list(row) for row in zip(*(columns[name].tolist() for name in KLINE_COLUMNS))]
+        last_volumes = klines["volume"][starts[-1]:].tolist()
+
+        if first_update and klines["timestamp"][0] != buckets[0]:
+            self.partial[key] = int(buckets[0])
+
+        forming = self.forming.pop(key, None)
+        forming_volumes = self.forming_volumes.pop(key, [])
+        if forming is not None and rows[0][0] == forming[0]:
+            # Continue the candle that was still forming
+            head = rows[0]
+            volumes = forming_volumes + klines["volume"][:len(klines) if len(starts) == 1 else starts[1]].tolist()
+            rows[0] = [forming[0], forming[1], max(forming[2], head[2]), min(forming[3], head[3]),
+                       head[4], math.fsum(volumes)]
+            if len(starts) == 1:
+                last_volumes = volumes
+        elif forming is not None:
+            rows.insert(0, forming)
+
+        # Everything but the newest bucket is complete; the newest once the source reaches its end
+        done = rows[:-1]
+        newest = rows[-1]
+        if int(klines["timestamp"][-1]) + self.source_ms >= newest[0] + interval_ms:
+            done.append(newest)
+        else:
+            self.forming[key] = newest
+            self.forming_volumes[key] = last_volumes
+
+        skip = self.partial.get(key)
+        done = [row for row in done if row[0] != skip]
+        if not done:
+            return 0
+        new = Klines.from_rows(done)
+        existing = self.closed.get(key)
+        merged = new if existing is None else existing.merge(new)
+        self.closed[key] = merged.tail(self.max_candles)
+        return len(done)
+
+    def get_klines(self, symbol: str, interval: str, limit: Optional[int] = None,
+                   include_forming: bool = False) -> Optional[Klines]:
+        """Closed ``interval`` candles for a symbol, oldest first (plus the forming one if asked)"""
+        key = (symbol, interval)
+        closed = self.closed.get(key)
+        forming = self.forming.get(key)
+        if include_forming and forming is not None and forming[0] != self.partial.get(key):
+            forming_row = Klines.from_rows([forming])
+            closed = forming_row if closed is None else closed.merge(forming_row)
+        if closed is None:
+            return None
+        return closed if limit is None else closed.tail(limit)
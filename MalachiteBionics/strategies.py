@@ -0,0 +1,142 @@
+"""
+Vectorised trading strategies for the website trading bot
+Array versions of WebsiteTradingBot.predict_* that score whole vectors of
+RSI / MACD histogram / momentum values (many symbols, or one symbol's history)
+with boolean masks and np.select instead of per-value if/elif ladders, and the
+registry that declares which indicators and candle history each strategy needs
+"""
+
+import numpy as np
+from collections import namedtuple
+from typing import Callable, Dict, FrozenSet, Iterable, Optional, Sequence, Tuple
+
+from indicators import MOMENTUM_PERIOD, RSI_PERIOD
+
+# Signal codes returned by the array strategies
+BUY = 1
+SELL = -1
+NEUTRAL = 0
+
+SIGNAL_NAMES = {BUY: "Buy", SELL: "Sell", NEUTRAL: "Neutral"}
+
+def _floats(*values):
+    return [np.asarray(value, dtype=np.float64) for value in values]
+
+def signal_names(codes) -> np.ndarray:
+    """Map signal codes to the "Buy" / "Sell" / "Neutral" strings the scalar versions return"""
+    codes = np.asarray(codes)
+    return np.select([codes == BUY, codes == SELL], ["Buy", "Sell"], "Neutral")
+
+def predict_free(rsi, macd_histogram) -> np.ndarray:
+    """Free Algorithm - RSI < 30 and MACD > 0 = Buy, RSI > 70 and MACD < 0 = Sell"""
+    rsi, macd_hist = _floats(rsi, macd_histogram)
+    return np.select(
+        [(rsi < 30) & (macd_hist > 0), (rsi > 70) & (macd_hist < 0)],
+        [BUY, SELL], NEUTRAL
+    ).astype(np.int8)
+
+def predict_v3(rsi) -> np.ndarray:
+    """V3 Trading Algorithm - RSI only"""
+    rsi, = _floats(rsi)
+    return np.select([rsi <= 30, rsi >= 70], [BUY, SELL], NEUTRAL).astype(np.int8)
+
+def predict_v12(rsi, macd_histogram) -> np.ndarray:
+    """V12 Trading Algorithm - same rules as the free algorithm"""
+    return predict_free(rsi, macd_histogram)
+
+def predict_v6(rsi, macd_histogram, buy_rsi=35, sell_rsi=65, oversold=25, overbought=75) -> np.ndarray:
+    """V6 Trading Algorithm - RSI + MACD, with very oversold/overbought RSI on its own"""
+    rsi, macd_hist = _floats(rsi, macd_histogram)
+    return np.select(
+        [(rsi <= buy_rsi) & (macd_hist > 0), (rsi >= sell_rsi) & (macd_hist < 0), rsi <= oversold, rsi >= overbought],
+        [BUY, SELL, BUY, SELL], NEUTRAL
+    ).astype(np.int8)
+
+def predict_v9(rsi, macd_histogram, momentum, strong_buy_rsi=30, strong_sell_rsi=70, buy_rsi=35,
+               sell_rsi=65, oversold=20, overbought=80, momentum_threshold=5, momentum_rsi=50) -> np.ndarray:
+    """V9 Trading Algorithm - RSI + MACD + Momentum, strongest agreement first"""
+    rsi, macd_hist, mom = _floats(rsi, macd_histogram, momentum)
+    conditions = [
+        (rsi <= strong_buy_rsi) & (macd_hist > 0) & (mom > 0),  # All indicators align
+        (rsi >= strong_sell_rsi) & (macd_hist < 0) & (mom < 0),
+        (rsi <= buy_rsi) & ((macd_hist > 0) | (mom > 0)),  # 2 out of 3 indicators
+        (rsi >= sell_rsi) & ((macd_hist < 0) | (mom < 0)),
+        rsi <= oversold,  # Very extreme RSI overrides the rest
+        rsi >= overbought,
+        (mom > momentum_threshold) & (rsi < momentum_rsi),  # Strong momentum with moderate RSI
+        (mom < -momentum_threshold) & (rsi > momentum_rsi),
+    ]
+    return np.select(conditions, [BUY, SELL] * 4, NEUTRAL).astype(np.int8)
+
+def predict_elite(rsi, macd_histogram, momentum, oversold_strong=25, oversold=35, overbought=65,
+                  overbought_strong=75, macd_strong=0.001, momentum_weak=2, momentum_strong=10,
+                  min_score=4) -> np.ndarray:
+    """Elite Algorithm - scores each indicator and signals on a total of +/-4"""
+    rsi, macd_hist, mom = _floats(rsi, macd_histogram, momentum)
+    score = (
+        np.select([rsi <= oversold_strong, rsi <= oversold, rsi >= overbought_strong, rsi >= overbought],
+                  [3, 2, -3, -2], 0)
+        + np.select([macd_hist > macd_strong, macd_hist > 0, macd_hist < -macd_strong, macd_hist < 0],
+                    [2, 1, -2, -1], 0)
+        + np.select([mom > momentum_strong, mom > momentum_weak, mom < -momentum_strong, mom < -momentum_weak],
+                    [2, 1, -2, -1], 0)
+    )
+    return np.select([score >= min_score, score <= -min_score], [BUY, SELL], NEUTRAL).astype(np.int8)
+
+def predict_v9_or_v12(rsi, macd_histogram, momentum, **thresholds) -> np.ndarray:
+    """V9 where momentum is available, V12 where it is not (as the bot has always done)"""
+    momentum = np.asarray(momentum, dtype=np.float64)
+    return np.where(np.isnan(momentum), predict_v12(rsi, macd_histogram),
+                    predict_v9(rsi, macd_histogram, momentum, **thresholds)).astype(np.int8)
+
+# Closed 1h candles the bot analyses. MACD's EMAs depend on where the window
+# starts, so it always gets the full window; RSI and momentum only look back
+# a fixed number of candles and are exact from much shorter series.
+ANALYSIS_CANDLES = 100
+INDICATOR_HISTORY = {
+    "rsi": RSI_PERIOD + 1,
+    "macd_histogram": ANALYSIS_CANDLES,
+    "momentum": MOMENTUM_PERIOD + 1,
+}
+
+Strategy = namedtuple("Strategy", ["name", "indicators", "candles", "confidence", "predict"])
+
+STRATEGIES: Dict[str, Strategy] = {}
+
+def register_strategy(name: str, indicators: Sequence[str], confidence: float,
+                      predict: Callable[..., np.ndarray], candles: Optional[int] = None) -> Strategy:
+    """Add a strategy to the registry.
+
+    ``predict`` receives each declared indicator as a keyword argument named
+    after its ``IndicatorValues`` field and returns signal codes. ``candles``
+    is the closed-candle history the strategy needs, by default the longest
+    its indicators need.
+    """
+    for indicator in indicators:
+        if indicator not in INDICATOR_HISTORY:
+            raise ValueError(f"Unknown indicator {indicator} for strategy {name}")
+    if candles is None:
+        candles = max(INDICATOR_HISTORY[indicator] for indicator in indicators)
+    strategy = Strategy(name, tuple(indicators), candles, confidence, predict)
+    STRATEGIES[name] = strategy
+    return strategy
+
+def requirements(names: Iterable[str]) -> Tuple[FrozenSet[str], int]:
+    """Union of the indicators and the longest candle history the named strategies need"""
+    strategies = [STRATEGIES[name] for name in names]
+    indicators = frozenset(indicator for strategy in strategies for indicator in strategy.indicators)
+    return indicators, max((strategy.candles for strategy in strategies), default=0)
+
+def run_strategy(name: str, indicators) -> Tuple[str, float]:
+    """Signal name and confidence of one strategy for a single set of indicator values"""
+    strategy = STRATEGIES[name]
+    code = strategy.predict(**{indicator: getattr(indicators, indicator) for indicator in strategy.indicators})
+    return SIGNAL_NAMES[int(code)], strategy.confidence
+
+register_strategy("free", ("rsi", "macd_histogram"), 80, predict_free)
+register_strategy("v3", ("rsi",), 80, predict_v3)
+register_strategy("v6", ("rsi", "macd_histogram"), 85, predict_v6)
+register_strategy("v9", ("rsi", "macd_histogram", "momentum"), 90, predict_v9_or_v12)
+register_strategy("v12", ("rsi", "macd_histogram"), 95, predict_v12)
+register_strategy("elite", ("rsi", "macd_histogram", "momentum"), 95, predict_elite)
+register_strategy("default", ("rsi", "macd_histogram"), 85, predict_v12)  # Unknown plans
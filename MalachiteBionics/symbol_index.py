@@ -0,0 +1,132 @@
+"""
+Cached index of tradable Binance symbols
+Built from /api/v3/exchangeInfo and refreshed on a long TTL, with a negative
+cache for symbols the exchange has rejected. Shared by the Flask app (to
+reject bad coins at subscription time) and the trading bot (to skip them).
+"""
+
+import json
+import logging
+import threading
+import time
+import urllib.request
+from typing import Dict, Iterable, List, Optional
+
+logger = logging.getLogger("symbol_index")
+
+EXCHANGE_INFO_PATH = "/api/v3/exchangeInfo"
+EXCHANGE_INFO_WEIGHT = 20  # Binance request weight for the full exchangeInfo
+QUOTE_ASSET = "USDT"
+
+class SymbolIndex:
+    """Set of symbols currently TRADING on Binance plus a negative cache.
+
+    ``is_invalid`` is True for symbols the loaded index does not list, and for
+    symbols recently rejected by the exchange (e.g. HTTP 400 "Invalid symbol")
+    even before the index has loaded. Until the first load every other symbol
+    is given the benefit of the doubt, so an unreachable exchange never blocks
+    subscriptions.
+    """
+
+    def __init__(self, ttl: int = 6 * 3600, negative_ttl: int = 3600, retry_delay: int = 300):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.retry_delay = retry_delay
+        self.symbols = set()
+        self.fetched_at = None
+        self.next_attempt = 0.0
+        self.negative: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._refreshing = threading.Lock()  # At most one exchangeInfo download at a time
+
+    @staticmethod
+    def symbol_for(coin: str) -> str:
+        """Exchange symbol the bot trades a coin against, e.g. SOL -> SOLUSDT"""
+        return f"{coin.strip().upper()}{QUOTE_ASSET}"
+
+    def is_loaded(self) -> bool:
+        return self.fetched_at is not None
+
+    def is_stale(self) -> bool:
+        """True when a refresh is due (and the last failure has cooled down)"""
+        if time.time() < self.next_attempt:
+            return False
+        return self.fetched_at is None or time.time() - self.fetched_at > self.ttl
+
+    def refresh_failed(self):
+        """Back off before the next attempt so callers don't hammer the exchange"""
+        self.next_attempt = time.time() + self.retry_delay
+
+    def load(self, exchange_info: Dict) -> int:
+        """Replace the index from an exchangeInfo payload; returns the symbol count"""
+        symbols = {
+            s["symbol"] for s in exchange_info.get("symbols", [])
+            if s.get("status") == "TRADING"
+        }
+        with self._lock:
+            self.symbols = symbols
+            self.fetched_at = time.time()
+            # The fresh index is authoritative for listed symbols
+            self.negative = {s: t for s, t in self.negative.items() if s not in symbols}
+        logger.info(f"Symbol index loaded: {len(symbols)} trading symbols")
+        return len(symbols)
+
+    def mark_invalid(self, symbol: str):
+        """Remember that the exchange rejected a symbol"""
+        with self._lock:
+            self.negative[symbol] = time.time() + self.negative_ttl
+        logger.warning(f"{symbol} rejected by exchange - skipping it for {self.negative_ttl}s")
+
+    def is_invalid(self, symbol: str) -> bool:
+        """True if the symbol is known not to trade"""
+        expires = self.negative.get(symbol)
+        if expires is not None:
+            if expires > time.time():
+                return True
+            with self._lock:
+                self.negative.pop(symbol, None)
+        return self.is_loaded() and symbol not in self.symbols
+
+    def invalid_coins(self, coins: Iterable[str]) -> List[str]:
+        """Coins without a tradable USDT pair"""
+        return [coin for coin in coins if coin and self.is_invalid(self.symbol_for(coin))]
+
+    def refresh_sync(self, api_url: str, timeout: float = 5) -> bool:
+        """Blocking refresh for the Flask app; keeps the old index on failure"""
+        try:
+            with urllib.request.urlopen(f"{api_url}{EXCHANGE_INFO_PATH}", timeout=timeout) as resp:
+                self.load(json.loads(resp.read()))
+            return True
+        except Exception as e:
+            logger.warning(f"Could not refresh symbol index: {e}")
+            self.refresh_failed()
+            return False
+
+    def refresh_if_stale(self, api_url: str, timeout: float = 5) -> Optional[bool]:
+        """Blocking refresh only when the TTL has expired; concurrent callers wait for one download"""
+        with self._refreshing:
+            if not self.is_stale():
+                return None
+            return self.refresh_sync(api_url, timeout)
+
+    def refresh_in_background(self, api_url: str, timeout: float = 5) -> bool:
+        """Start a refresh thread when the TTL has expired and none is running; never blocks.
+
+        Callers keep reading the current index (or give every coin the benefit
+        of the doubt before the first load) while the download runs.
+        """
+        if not self.is_stale() or not self._refreshing.acquire(blocking=False):
+            return False
+
+        def refresh():
+            try:
+                if self.is_stale():  # Another refresh may have finished first
+                    self.refresh_sync(api_url, timeout)
+            finally:
+                self._refreshing.release()
+
+        threading.Thread(target=refresh, name="symbol-index-refresh", daemon=True).start()
+        return True
+
+# Shared by the Flask request handlers
+symbol_index = SymbolIndex()
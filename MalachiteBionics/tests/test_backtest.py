@@ -0,0 +1,56 @@
+"""
+The --fetch backfill against the fake exchange, into a store the live bot
+keeps appending to through its own CandleStore instance
+"""
+
+import asyncio
+
+import numpy as np
+
+import backtest
+import website_trading_bot
+from candle_store import CandleStore
+from fake_exchange import FakeBinanceExchange
+from market_data import INTERVAL_MS, KLINE_COLUMNS, Klines
+
+HOUR = INTERVAL_MS["1h"]
+
+def closed_candles(exchange: FakeBinanceExchange, symbol: str) -> Klines:
+    """The exchange's closed candles as they come over REST (8-decimal strings)"""
+    rows = np.array([[float(value) for value in exchange._rest_row(candle)[:6]]
+                     for candle in exchange.klines[symbol][:-1]])
+    columns = {name: rows[:, i] for i, name in enumerate(KLINE_COLUMNS)}
+    columns["timestamp"] = columns["timestamp"].astype(np.int64)
+    return Klines(columns)
+
+def test_backfill_alongside_the_bot(tmp_path, monkeypatch):
+    root = str(tmp_path)
+
+    async def scenario() -> Klines:
+        exchange = FakeBinanceExchange(history=1500)
+        exchange.add_symbol("BTCUSDT")
+        await exchange.start()
+        monkeypatch.setattr(website_trading_bot, "BINANCE_API_URL", exchange.api_url)
+        try:
+            # The bot has stored the last 100 closed candles
+            bot_store = CandleStore(root)
+            bot_store.append("BTCUSDT", "1h", closed_candles(exchange, "BTCUSDT").tail(100))
+
+            since = int(closed_candles(exchange, "BTCUSDT")["timestamp"][-1000])
+            written = await backtest.fetch_history(CandleStore(root), ["BTCUSDT"], "1h", since)
+            assert written == {"BTCUSDT": 900}
+
+            # The next close goes through the bot's instance, after the backfill rebased the file
+            await exchange.close_candle("BTCUSDT")
+            expected = closed_candles(exchange, "BTCUSDT")
+            assert bot_store.append("BTCUSDT", "1h", expected.tail(1)) == 1
+            assert await backtest.fetch_history(CandleStore(root), ["BTCUSDT"], "1h", since) == {"BTCUSDT": 0}
+            return expected.tail(1001)
+        finally:
+            await exchange.stop()
+
+    expected = asyncio.run(scenario())
+    stored = CandleStore(root).read("BTCUSDT", "1h")
+    assert (np.diff(stored["timestamp"]) == HOUR).all()
+    for name in KLINE_COLUMNS[:5]:
+        np.testing.assert_array_equal(stored[name], expected[name])
@@ -0,0 +1,115 @@
+"""
+CandleStore round trips: append, prepend and rescale, and two store
+instances writing the same directory the way the bot and the backfill
+command do
+"""
+
+import threading
+
+import numpy as np
+import pytest
+
+from candle_store import CandleStore
+from market_data import INTERVAL_MS, KLINE_COLUMNS, Klines
+
+HOUR = INTERVAL_MS["1h"]
+BASE = 1_700_000_000_000 // HOUR * HOUR
+
+def candles(start: int, count: int, price: float = 100.0, step: float = 0.5) -> Klines:
+    """``count`` hourly candles from slot ``start``; slot k closes at price + k * step"""
+    closes = price + step * (start + np.arange(count))
+    return Klines({
+        "timestamp": BASE + (start + np.arange(count, dtype=np.int64)) * HOUR,
+        "open": closes - step, "high": closes + step, "low": closes - 2 * step, "close": closes,
+        "volume": start + np.arange(count, dtype=np.float64) + 0.5,
+    })
+
+def assert_same(stored: Klines, expected: Klines):
+    for name in KLINE_COLUMNS:
+        np.testing.assert_array_equal(stored[name], expected[name])
+
+@pytest.fixture
+def root(tmp_path):
+    return str(tmp_path)
+
+def test_append_round_trip_and_skips_stored_candles(root):
+    store = CandleStore(root)
+    assert store.append("BTCUSDT", "1h", candles(0, 10)) == 10
+    assert store.append("BTCUSDT", "1h", candles(5, 10)) == 5  # Slots 5-9 are already stored
+    assert store.append("BTCUSDT", "1h", candles(0, 3)) == 0
+    assert_same(store.read("BTCUSDT", "1h"), candles(0, 15))
+    assert store.first_open_time("BTCUSDT", "1h") == BASE
+    assert store.last_open_time("BTCUSDT", "1h") == BASE + 14 * HOUR
+    assert_same(store.read("BTCUSDT", "1h", start_time=BASE + 3 * HOUR, end_time=BASE + 6 * HOUR), candles(3, 4))
+    assert store.symbols("1h") == ["BTCUSDT"]
+
+def test_prepend_rebases_the_file(root):
+    store = CandleStore(root)
+    store.append("BTCUSDT", "1h", candles(100, 10))
+    assert store.prepend("BTCUSDT", "1h", candles(90, 15)) == 10  # Only the candles before slot 100
+    assert_same(store.read("BTCUSDT", "1h"), candles(90, 20))
+    assert store.prepend("BTCUSDT", "1h", candles(95, 5)) == 0
+    assert store.append("BTCUSDT", "1h", candles(110, 2)) == 2
+    assert_same(store.read("BTCUSDT", "1h"), candles(90, 22))
+
+def test_rescale_keeps_prices_exact(root):
+    store = CandleStore(root)
+    store.append("BTCUSDT", "1h", candles(0, 5, price=100, step=1))
+    finer = candles(5, 5, price=100.125, step=0)
+    assert store.append("BTCUSDT", "1h", finer) == 5
+    stored = store.read("BTCUSDT", "1h")
+    assert_same(stored[:5], candles(0, 5, price=100, step=1))
+    assert_same(stored[5:], finer)
+
+def test_append_after_another_instance_prepended(root):
+    bot, backfill = CandleStore(root), CandleStore(root)
+    bot.append("BTCUSDT", "1h", candles(100, 10))
+    assert bot.last_open_time("BTCUSDT", "1h") == BASE + 109 * HOUR
+
+    backfill.prepend("BTCUSDT", "1h", candles(50, 50))
+    # The bot cached the old base; its append must still land at slot 110
+    assert bot.append("BTCUSDT", "1h", candles(110, 1)) == 1
+    for store in (bot, backfill):
+        assert_same(store.read("BTCUSDT", "1h"), candles(50, 61))
+
+def test_append_after_another_instance_rescaled(root):
+    bot, other = CandleStore(root), CandleStore(root)
+    bot.append("BTCUSDT", "1h", candles(0, 5, price=100, step=0.5))
+    assert bot.count("BTCUSDT", "1h") == 5  # Stored with one decimal
+
+    finer = candles(5, 1, price=100.125, step=0)
+    other.append("BTCUSDT", "1h", finer)
+    # 100.5 fits the bot's cached one-decimal scale, but the file now has three
+    half = candles(6, 1, price=100.5, step=0)
+    assert bot.append("BTCUSDT", "1h", half) == 1
+    for store in (bot, other):
+        stored = store.read("BTCUSDT", "1h")
+        assert_same(stored[:5], candles(0, 5, price=100, step=0.5))
+        assert_same(stored[5:6], finer)
+        assert_same(stored[6:], half)
+
+def test_interleaved_appends_from_two_instances(root):
+    first, second = CandleStore(root), CandleStore(root)
+    for start in range(0, 40, 4):
+        first.append("BTCUSDT", "1h", candles(start, 3))
+        second.append("BTCUSDT", "1h", candles(start + 1, 3))  # Overlaps two of first's candles
+    for store in (first, second):
+        assert_same(store.read("BTCUSDT", "1h"), candles(0, 40))
+
+def test_concurrent_writers_keep_the_file_contiguous(root):
+    # Separate instances lock separate open files, so threads contend like processes
+    def writer(prepend: bool):
+        store = CandleStore(root)
+        for slot in range(200):
+            if prepend:
+                store.prepend("BTCUSDT", "1h", candles(199 - slot, 1))
+            else:
+                store.append("BTCUSDT", "1h", candles(200 + slot, 1))
+
+    CandleStore(root).append("BTCUSDT", "1h", candles(200, 1))
+    threads = [threading.Thread(target=writer, args=(prepend,)) for prepend in (True, False)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert_same(CandleStore(root).read("BTCUSDT", "1h"), candles(0, 400))
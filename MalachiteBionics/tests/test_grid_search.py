@@ -0,0 +1,32 @@
+"""
+Grid search rankings are the same however many workers score them, ties
+included
+"""
+
+import numpy as np
+
+from grid_search import PARAMETER_GRIDS, expand_grid, rank, run_grid_search
+
+def test_ranking_does_not_depend_on_workers():
+    rng = np.random.default_rng(7)
+    count = 5000
+    # Coarse RSI values and few candles leave many threshold sets tied
+    features = {
+        "rsi": rng.integers(0, 21, count) * 5.0,
+        "macd_histogram": rng.normal(0, 0.002, count),
+        "momentum": rng.normal(0, 5, count),
+        "forward_return": rng.normal(0, 0.02, count),
+    }
+    combos = expand_grid(PARAMETER_GRIDS["v6"])
+    serial = rank("v6", combos, run_grid_search(features, "v6", combos, workers=1), min_signals=100)
+    parallel = rank("v6", combos, run_grid_search(features, "v6", combos, workers=3, chunk_size=3), min_signals=100)
+
+    keys = [(row["mean_return"], row["hit_rate"]) for row in serial]
+    assert len(set(keys)) < len(keys)  # The grid really has ties
+    assert parallel == serial
+
+def test_rank_breaks_ties_by_combination_order():
+    combos = [{"buy_rsi": value} for value in (30, 35, 40)]
+    results = [(2, 1, 1, 1, 0.02), (0, 1, 1, 1, 0.02), (1, 2, 0, 2, 0.06)]
+    rows = rank("v6", combos, results, min_signals=1)
+    assert [row["buy_rsi"] for row in rows] == [35, 30, 40]
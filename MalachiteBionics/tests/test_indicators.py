@@ -0,0 +1,98 @@
+"""
+Parity of the NumPy indicator kernels with the pandas implementations the
+bot used before pandas left the hot path: calculate_rsi / calculate_macd /
+calculate_momentum over whole series, and IndicatorState run incrementally
+over sliding windows and over full history
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from indicators import IndicatorState
+from website_trading_bot import WebsiteTradingBot
+
+BOT = WebsiteTradingBot()
+TOLERANCE = {"rtol": 1e-9, "atol": 1e-9}
+
+# Reference implementations - the bot's original pandas code
+
+def pandas_rsi(closes: pd.Series, period: int = 14) -> pd.Series:
+    if len(closes) < period + 1:
+        return pd.Series([50] * len(closes), index=closes.index, dtype=float)
+    delta = closes.diff()
+    gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
+    rs = gain / loss
+    rsi = 100 - (100 / (1 + rs))
+    return rsi.fillna(50)
+
+def pandas_macd(series: pd.Series, short_span: int = 12, long_span: int = 26, signal_span: int = 9):
+    if len(series) < long_span:
+        zeros = pd.Series([0] * len(series), index=series.index, dtype=float)
+        return zeros, zeros, zeros
+    ema_short = series.ewm(span=short_span, adjust=False).mean()
+    ema_long = series.ewm(span=long_span, adjust=False).mean()
+    macd_line = ema_short - ema_long
+    signal_line = macd_line.ewm(span=signal_span, adjust=False).mean()
+    return macd_line, signal_line, macd_line - signal_line
+
+def pandas_momentum(series: pd.Series, period: int = 10) -> pd.Series:
+    if len(series) < period + 1:
+        return pd.Series([0] * len(series), index=series.index, dtype=float)
+    return series - series.shift(period)
+
+def random_walk(length: int, seed: int, flat: bool = False) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    closes = rng.uniform(0.01, 500) * np.exp(np.cumsum(rng.normal(0, 0.01, length)))
+    if flat and length > 30:
+        closes[5:25] = closes[5]  # No gains or losses - RSI's 0/0 case
+    return closes
+
+SERIES = [(length, seed, seed % 4 == 0) for seed, length in enumerate([1, 10, 14, 15, 16, 25, 26, 27, 50, 100, 101, 257, 1000])]
+
+@pytest.mark.parametrize("length,seed,flat", SERIES)
+def test_calculate_rsi(length, seed, flat):
+    closes = random_walk(length, seed, flat)
+    np.testing.assert_allclose(BOT.calculate_rsi(closes), pandas_rsi(pd.Series(closes)).to_numpy(), **TOLERANCE)
+
+@pytest.mark.parametrize("length,seed,flat", SERIES)
+def test_calculate_macd(length, seed, flat):
+    closes = random_walk(length, seed, flat)
+    for actual, expected in zip(BOT.calculate_macd(closes), pandas_macd(pd.Series(closes))):
+        np.testing.assert_allclose(actual, expected.to_numpy(), **TOLERANCE)
+
+@pytest.mark.parametrize("length,seed,flat", SERIES)
+def test_calculate_momentum(length, seed, flat):
+    closes = random_walk(length, seed, flat)
+    np.testing.assert_allclose(BOT.calculate_momentum(closes), pandas_momentum(pd.Series(closes)).to_numpy(),
+                               equal_nan=True, **TOLERANCE)
+
+def reference_values(closes: np.ndarray):
+    series = pd.Series(closes)
+    return (pandas_rsi(series).iloc[-1], pandas_macd(series)[2].iloc[-1], pandas_momentum(series).iloc[-1])
+
+def assert_state_matches(values, closes):
+    rsi, histogram, momentum = reference_values(closes)
+    np.testing.assert_allclose([values.rsi, values.macd_histogram, values.momentum], [rsi, histogram, momentum],
+                               equal_nan=True, **TOLERANCE)
+
+@pytest.mark.parametrize("seed,flat", [(1, False), (2, True), (3, False)])
+def test_indicator_state_sliding_window(seed, flat):
+    closes = random_walk(600, seed, flat)
+    state = IndicatorState(window=100)
+    for end in range(1, len(closes) + 1):
+        values = state.update(closes[end - 1])
+        if end >= 26:
+            assert_state_matches(values, closes[max(end - 100, 0):end])
+        if end < len(closes) and end >= 100 and end % 17 == 0:
+            # peek previews the next candle without changing the state
+            assert_state_matches(state.peek(closes[end]), closes[end - 99:end + 1])
+
+def test_indicator_state_full_history():
+    closes = random_walk(400, 8, flat=True)
+    state = IndicatorState(window=None)
+    for end in range(1, len(closes) + 1):
+        values = state.update(closes[end - 1])
+        if end >= 26:
+            assert_state_matches(values, closes[:end])
@@ -0,0 +1,122 @@
+"""
+KlineCache against a stubbed fetcher: the first full fetch, delta fetches,
+gap backfill wider than one request, gaps the exchange can't fill and the
+warm start from the candle store
+"""
+
+import asyncio
+
+import numpy as np
+
+from candle_store import CandleStore
+from market_data import INTERVAL_MS, KLINE_COLUMNS, KlineCache, Klines
+
+HOUR = INTERVAL_MS["1h"]
+START = 1_700_000_000_000 // HOUR * HOUR
+REQUEST_LIMIT = 1000  # Binance caps /api/v3/klines at 1000 candles
+
+class StubExchange:
+    """Hourly candles up to a movable clock, served like /api/v3/klines"""
+
+    def __init__(self, candles: int, missing=()):
+        self.now = START + (candles - 1) * HOUR + HOUR // 2  # Inside the newest (forming) candle
+        self.missing = set(missing)  # Slots the exchange has no candle for
+        self.calls = []
+
+    def clock(self) -> int:
+        return self.now
+
+    def advance(self, candles: int):
+        self.now += candles * HOUR
+
+    def series(self) -> Klines:
+        slots = np.arange((self.now - START) // HOUR + 1)
+        slots = slots[~np.isin(slots, list(self.missing))]
+        close = 100.0 + slots
+        return Klines({
+            "timestamp": START + slots * HOUR, "open": close - 1, "high": close + 1,
+            "low": close - 2, "close": close, "volume": slots + 0.5,
+        })
+
+    async def fetch(self, symbol: str, interval: str, limit: int, start_time=None):
+        self.calls.append((limit, start_time))
+        limit = min(limit, REQUEST_LIMIT)
+        series = self.series()
+        if start_time is None:
+            return series.tail(limit)
+        return series[series["timestamp"] >= start_time][:limit]
+
+def expected(exchange: StubExchange, limit: int) -> Klines:
+    return exchange.series().tail(limit)
+
+def assert_same(actual: Klines, wanted: Klines):
+    for name in KLINE_COLUMNS:
+        np.testing.assert_array_equal(actual[name], wanted[name])
+
+def test_full_then_delta_fetch():
+    exchange = StubExchange(500)
+    cache = KlineCache(exchange.fetch, clock=exchange.clock)
+
+    assert_same(asyncio.run(cache.get_klines("BTCUSDT", "1h", 100)), expected(exchange, 100))
+    assert exchange.calls == [(100, None)]
+    assert (cache.full_fetches, cache.delta_fetches) == (1, 0)
+
+    # Three candles later only the last cached (then forming) candle onwards is asked for
+    last_open = int(cache.get("BTCUSDT", "1h")["timestamp"][-1])
+    exchange.advance(3)
+    assert_same(asyncio.run(cache.get_klines("BTCUSDT", "1h", 100)), expected(exchange, 100))
+    assert exchange.calls[1] == (5, last_open)
+    assert (cache.full_fetches, cache.delta_fetches) == (1, 1)
+
+def test_offline_longer_than_the_window_refetches_in_full():
+    exchange = StubExchange(500)
+    cache = KlineCache(exchange.fetch, clock=exchange.clock)
+    asyncio.run(cache.get_klines("BTCUSDT", "1h", 100))
+    exchange.advance(150)
+    assert_same(asyncio.run(cache.get_klines("BTCUSDT", "1h", 100)), expected(exchange, 100))
+    assert exchange.calls[1] == (100, None)
+    assert cache.full_fetches == 2
+
+def test_gap_wider_than_one_request_is_paged():
+    exchange = StubExchange(3000)
+    cache = KlineCache(exchange.fetch, max_candles=3000, clock=exchange.clock)
+    series = exchange.series()
+    # The cache holds both ends of the window but lost 2500 candles in between
+    cache.merge("BTCUSDT", "1h", series[:200])
+    cache.merge("BTCUSDT", "1h", series[2700:])
+
+    assert_same(asyncio.run(cache.get_klines("BTCUSDT", "1h", 500)), series.tail(500))
+    assert_same(cache.get("BTCUSDT", "1h"), series)
+    backfill_calls = exchange.calls[1:]  # After the delta fetch
+    assert all(limit <= REQUEST_LIMIT for limit, _ in backfill_calls)
+    assert [start for _, start in backfill_calls] == [START + slot * HOUR for slot in (200, 1200, 2200)]
+    assert cache.unfillable == set()
+
+def test_unfillable_gap_is_not_asked_for_again():
+    exchange = StubExchange(500, missing=range(450, 455))  # An exchange outage
+    cache = KlineCache(exchange.fetch, clock=exchange.clock)
+
+    klines = asyncio.run(cache.get_klines("BTCUSDT", "1h", 100))
+    assert_same(klines, expected(exchange, 100))
+    gap_start = START + 450 * HOUR
+    assert exchange.calls == [(100, None), (5, gap_start)]
+    assert cache.unfillable == {("BTCUSDT", "1h", gap_start)}
+
+    exchange.advance(1)
+    asyncio.run(cache.get_klines("BTCUSDT", "1h", 100))
+    assert len(exchange.calls) == 3  # The delta fetch only
+    assert exchange.calls[2][1] != gap_start
+
+def test_warm_start_from_the_store(tmp_path):
+    exchange = StubExchange(500)
+    store = CandleStore(str(tmp_path))
+    store.append("BTCUSDT", "1h", exchange.series()[:-1])  # Every closed candle
+    exchange.advance(2)
+
+    cache = KlineCache(exchange.fetch, clock=exchange.clock, store=store)
+    assert_same(asyncio.run(cache.get_klines("BTCUSDT", "1h", 100)), expected(exchange, 100))
+    assert (cache.warm_starts, cache.full_fetches, cache.delta_fetches) == (1, 0, 1)
+    assert exchange.calls == [(5, START + 498 * HOUR)]
+
+    # The candles that closed since are persisted, the forming one isn't
+    assert store.last_open_time("BTCUSDT", "1h") == START + 500 * HOUR
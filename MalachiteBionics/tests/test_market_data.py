@@ -0,0 +1,159 @@
+"""
+decode_klines against the json path it replaced: well-formed bodies,
+scientific notation, empty responses and bodies that are not a whole
+number of numeric rows. RateLimitGovernor queueing, pauses and minute
+boundaries, and how fetch_klines spends its weight on failures
+"""
+
+import json
+import asyncio
+
+import numpy as np
+import pytest
+
+import market_data
+from fake_exchange import FakeBinanceExchange
+from market_data import KLINE_COLUMNS, RateLimitGovernor, decode_klines
+from website_trading_bot import WebsiteTradingBot
+
+def kline_row(open_time: int, close: str):
+    return [open_time, "1.5", "2.25", "0.75", close, "1234.5", open_time + 3599999, "99.1", 42, "10.0", "20.0", "0"]
+
+def reference(raw: bytes):
+    rows = json.loads(raw)
+    return {name: np.array([float(row[i]) for row in rows]) for i, name in enumerate(KLINE_COLUMNS)}
+
+# Binance sends compact JSON (the loadtxt path); spaced JSON takes the json path
+@pytest.mark.parametrize("separators", [(",", ":"), (", ", ": ")])
+@pytest.mark.parametrize("closes", [["100.0"], ["0.00001234", "1e-8", "3.5E+2"], ["1.5"] * 3])
+def test_matches_json(closes, separators):
+    rows = [kline_row(1_700_000_000_000 + i * 3_600_000, close) for i, close in enumerate(closes)]
+    raw = json.dumps(rows, separators=separators).encode()
+    columns = decode_klines(raw)
+    expected = reference(raw)
+    assert columns["timestamp"].dtype == np.int64
+    for name in KLINE_COLUMNS:
+        assert columns[name].flags.c_contiguous
+        np.testing.assert_array_equal(columns[name], expected[name])
+
+def test_only_the_kept_columns_are_parsed(monkeypatch):
+    # Trailing fields the bot drops can't send the body down the json path
+    monkeypatch.setattr("market_data.json.loads", lambda raw: pytest.fail("took the json path"))
+    row = kline_row(1_700_000_000_000, "100.0")
+    row[-1] = "unused"
+    columns = decode_klines(json.dumps([row, row], separators=(",", ":")).encode())
+    assert columns["close"].tolist() == [100.0, 100.0]
+
+def test_merged_rows_fall_back_to_json():
+    # A row boundary with a space can't become a newline; the row count check catches it
+    raw = b'[[1,"2","3","4","5","6"],[2,"2","3","4","5","6"], [3,"2","3","4","5","6"]]'
+    assert decode_klines(raw)["timestamp"].tolist() == [1, 2, 3]
+
+@pytest.mark.parametrize("raw", [b"", b"[]", b" [ ] \r\n"])
+def test_empty(raw):
+    assert decode_klines(raw) is None
+
+def test_non_numeric_falls_back_to_json():
+    # loadtxt rejects null; json reads it
+    row = kline_row(1_700_000_000_000, "100.0")
+    row[5] = None
+    columns = decode_klines(json.dumps([row]).encode())
+    assert columns["close"].tolist() == [100.0]
+    assert columns["timestamp"].tolist() == [1_700_000_000_000]
+    assert np.isnan(columns["volume"][0])
+
+def test_governor_ignores_headers_from_previous_window():
+    now = [59.9]
+    governor = RateLimitGovernor(weight_limit=6000, clock=lambda: now[0])
+    window = asyncio.run(governor.acquire(2))
+    assert (window, governor.used_weight) == (0, 2)
+
+    # The response lands after the minute rolled over - its count is last minute's
+    now[0] = 60.1
+    governor.observe(200, {"X-MBX-USED-WEIGHT-1M": "5000"}, window)
+    assert governor.used_weight == 0
+
+    window = asyncio.run(governor.acquire(2))
+    governor.observe(200, {"X-MBX-USED-WEIGHT-1M": "40"}, window)
+    assert (window, governor.used_weight) == (1, 40)
+
+@pytest.fixture
+def fake_time(monkeypatch):
+    """A governor clock that asyncio.sleep advances instead of waiting"""
+    now = [10.0]
+    slept = []
+    real_sleep = asyncio.sleep
+
+    async def sleep(delay):
+        slept.append(delay)
+        now[0] += delay
+        await real_sleep(0)
+
+    monkeypatch.setattr(market_data.asyncio, "sleep", sleep)
+    return now, slept
+
+def test_governor_queues_until_the_next_window(fake_time):
+    now, slept = fake_time
+    governor = RateLimitGovernor(weight_limit=100, clock=lambda: now[0])  # Budget 90
+
+    assert asyncio.run(governor.acquire(60)) == 0
+    assert asyncio.run(governor.acquire(30)) == 0
+    assert slept == []
+
+    # 90 + 20 is over budget - wait for the minute to roll over
+    assert asyncio.run(governor.acquire(20)) == 1
+    assert slept == [pytest.approx(50.05)]
+    assert (governor.used_weight, governor.peak_weight, governor.throttled) == (20, 90, 1)
+
+def test_governor_admits_oversized_requests_into_an_empty_window(fake_time):
+    now, slept = fake_time
+    governor = RateLimitGovernor(weight_limit=100, clock=lambda: now[0])
+    assert asyncio.run(governor.acquire(500)) == 0
+    assert slept == [] and governor.used_weight == 500
+
+def test_governor_queues_callers_in_order(fake_time):
+    now, _ = fake_time
+    governor = RateLimitGovernor(weight_limit=100, clock=lambda: now[0])
+    order = []
+
+    async def caller(name, weight):
+        order.append((name, await governor.acquire(weight)))
+
+    async def run():
+        await asyncio.gather(caller("a", 80), caller("b", 80), caller("c", 5))
+
+    asyncio.run(run())
+    # c would fit after a, but it queued behind b
+    assert order == [("a", 0), ("b", 1), ("c", 1)]
+
+@pytest.mark.parametrize("status,counter", [(429, "rate_limited"), (418, "banned")])
+def test_governor_pauses_for_retry_after(fake_time, status, counter):
+    now, slept = fake_time
+    governor = RateLimitGovernor(clock=lambda: now[0])
+    window = asyncio.run(governor.acquire(1))
+    governor.observe(status, {"Retry-After": "30"}, window)
+    assert (getattr(governor, counter), governor.paused_until) == (1, 40.0)
+
+    asyncio.run(governor.acquire(1))
+    assert slept == [pytest.approx(30.0)]
+
+    # Without Retry-After the pause is a full minute
+    governor.observe(status, {})
+    assert governor.paused_until == now[0] + 60
+
+# A simulated -1003 failure on every request, and the exchange's own -1121 for an unknown symbol
+@pytest.mark.parametrize("symbol,error_rate,invalid", [("BTCUSDT", 1.0, False), ("NOPEUSDT", 0.0, True)])
+def test_fetch_klines_does_not_retry_bad_requests(symbol, error_rate, invalid):
+    async def scenario():
+        exchange = FakeBinanceExchange(history=10, error_rate=error_rate, error_status=400)
+        await exchange.start()
+        bot = WebsiteTradingBot(streaming=False)
+        bot.api_url = exchange.api_url
+        try:
+            result = await bot.fetch_klines(symbol, "1h", 10)
+            return result, exchange.request_count, bot.symbol_index.is_invalid(symbol)
+        finally:
+            await bot.close_http_session()
+            await exchange.stop()
+
+    assert asyncio.run(scenario()) == (None, 1, invalid)
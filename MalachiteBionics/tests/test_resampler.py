@@ -0,0 +1,115 @@
+"""
+CandleResampler fed hourly candles incrementally against the one-shot
+resample_klines, and resample_klines against pandas resample: 4h, 1d and
+1w, series starting in the middle of a bucket and series with exchange gaps
+"""
+
+import asyncio
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from fake_exchange import FakeBinanceExchange
+from market_data import INTERVAL_MS, KLINE_COLUMNS, Klines
+from resampler import CandleResampler, bucket_open_times, resample_klines
+from website_trading_bot import WebsiteTradingBot
+
+HOUR = INTERVAL_MS["1h"]
+MONDAY = 1_704_067_200_000  # 2024-01-01 00:00 UTC, a Monday
+INTERVALS = ("4h", "1d", "1w")
+PANDAS_RULES = {"4h": "4h", "1d": "1D", "1w": "W-MON"}
+
+def hourly(count: int, first: int, seed: int, gaps: int = 0) -> Klines:
+    """Random-walk hourly candles from ``first``, with ``gaps`` candles missing at random"""
+    rng = np.random.default_rng(seed)
+    slots = np.arange(count)
+    if gaps:
+        slots = np.delete(slots, rng.choice(np.arange(1, count - 1), gaps, replace=False))
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, len(slots))))
+    open_ = np.r_[100.0, close[:-1]]
+    spread = rng.uniform(0, 0.01, len(slots))
+    return Klines({
+        "timestamp": first + slots.astype(np.int64) * HOUR,
+        "open": open_, "high": np.maximum(open_, close) * (1 + spread),
+        "low": np.minimum(open_, close) * (1 - spread), "close": close,
+        "volume": rng.uniform(0, 1000, len(slots)),
+    })
+
+def assert_same(actual: Klines, expected: Klines):
+    assert len(actual) == len(expected)
+    for name in KLINE_COLUMNS:
+        np.testing.assert_array_equal(actual[name], expected[name])
+
+def feed(resampler: CandleResampler, klines: Klines, seed: int):
+    """Hand the series over in random batches, each overlapping what was already sent"""
+    rng = np.random.default_rng(seed)
+    end = 0
+    while end < len(klines):
+        start = max(end - int(rng.integers(0, 5)), 0)
+        end = min(end + int(rng.integers(1, 40)), len(klines))
+        resampler.update("BTCUSDT", klines[start:end])
+
+# First open times: on a week boundary, mid-day on a Wednesday, and one hour into a 4h bucket
+@pytest.mark.parametrize("first", [MONDAY, MONDAY + 2 * 86_400_000 + 13 * HOUR, MONDAY + 5 * HOUR])
+@pytest.mark.parametrize("gaps", [0, 25])
+@pytest.mark.parametrize("seed", range(3))
+def test_incremental_matches_one_shot(first, gaps, seed):
+    klines = hourly(24 * 7 * 6 + 17, first, seed, gaps)
+    resampler = CandleResampler(INTERVALS, max_candles=10_000)
+    feed(resampler, klines, seed)
+
+    for interval in INTERVALS:
+        assert_same(resampler.get_klines("BTCUSDT", interval), resample_klines(klines, interval))
+
+        # The forming candle matches the one-shot partial bucket
+        partial = resample_klines(klines, interval, include_partial=True)
+        with_forming = resampler.get_klines("BTCUSDT", interval, include_forming=True)
+        assert_same(with_forming, partial[partial["timestamp"] >= with_forming["timestamp"][0]])
+
+def test_nothing_closes_before_the_first_full_bucket():
+    resampler = CandleResampler(INTERVALS)
+    assert resampler.update("BTCUSDT", hourly(3, MONDAY + HOUR, 0)) == {"4h": 0, "1d": 0, "1w": 0}
+    assert resampler.get_klines("BTCUSDT", "4h") is None
+    # The 01:00 start means the 00:00 bucket is partial and never emitted
+    assert resampler.get_klines("BTCUSDT", "4h", include_forming=True) is None
+    assert resampler.update("BTCUSDT", hourly(8, MONDAY + HOUR, 0)[3:]) == {"4h": 1, "1d": 0, "1w": 0}
+    assert resampler.get_klines("BTCUSDT", "4h")["timestamp"].tolist() == [MONDAY + 4 * HOUR]
+
+@pytest.mark.parametrize("interval", INTERVALS)
+def test_one_shot_matches_pandas(interval):
+    klines = hourly(24 * 7 * 8, MONDAY + 7 * HOUR, 3, gaps=40)
+    frame = klines.to_frame()
+    frame.index = pd.to_datetime(frame["timestamp"], unit="ms")
+    resampled = frame.resample(PANDAS_RULES[interval], label="left", closed="left").agg(
+        {"open": "first", "high": "max", "low": "min", "close": "last", "volume": "sum"}).dropna()
+    opens = resampled.index.as_unit("ms").asi8
+
+    actual = resample_klines(klines, interval, include_partial=True)
+    np.testing.assert_array_equal(actual["timestamp"], opens)
+    np.testing.assert_array_equal(bucket_open_times(opens, interval), opens)
+    for name in ("open", "high", "low", "close"):
+        np.testing.assert_array_equal(actual[name], resampled[name].to_numpy())
+    np.testing.assert_allclose(actual["volume"], resampled["volume"].to_numpy(), rtol=1e-12)
+
+def test_bot_serves_resampled_klines_from_hourly_polls():
+    async def scenario():
+        exchange = FakeBinanceExchange(history=500)
+        exchange.add_symbol("BTCUSDT")
+        await exchange.start()
+        bot = WebsiteTradingBot(streaming=False)
+        bot.api_url = exchange.api_url
+        bot.kline_cache.clock = exchange.clock
+        try:
+            four_hour = await bot.get_resampled_klines("BTCUSDT", "4h")
+            requests = exchange.request_count
+            await bot.get_resampled_klines("BTCUSDT", "1d")
+            return four_hour, requests, exchange.request_count, await bot.kline_cache.get_klines("BTCUSDT", "1h", 101)
+        finally:
+            await bot.close_http_session()
+            await exchange.stop()
+
+    four_hour, first_requests, later_requests, hourly_klines = asyncio.run(scenario())
+    closed = hourly_klines[:-1]
+    assert first_requests == 1 and later_requests == 1  # 1d came from the same hourly candles
+    assert_same(four_hour, resample_klines(closed, "4h"))
@@ -0,0 +1,179 @@
+"""
+Parity of the strategy registry with the bot's original scalar predict_*
+logic - threshold edges, NaN, infinities and signed zero, plus random
+samples across every strategy's thresholds
+"""
+
+import itertools
+
+import numpy as np
+import pytest
+
+import strategies
+
+# Reference implementations - the bot's original scalar predict_* methods
+
+def scalar_free(rsi: float, macd_hist: float) -> str:
+    if rsi < 30 and macd_hist > 0:
+        return "Buy"
+    elif rsi > 70 and macd_hist < 0:
+        return "Sell"
+    return "Neutral"
+
+def scalar_v3(rsi: float) -> str:
+    if rsi <= 30:
+        return "Buy"
+    elif rsi >= 70:
+        return "Sell"
+    return "Neutral"
+
+scalar_v12 = scalar_free  # The same rule under another name
+
+def scalar_v6(rsi: float, macd_hist: float) -> str:
+    if rsi <= 35 and macd_hist > 0:
+        return "Buy"
+    elif rsi >= 65 and macd_hist < 0:
+        return "Sell"
+    elif rsi <= 25:
+        return "Buy"
+    elif rsi >= 75:
+        return "Sell"
+    return "Neutral"
+
+def scalar_v9(rsi: float, macd_hist: float, mom: float) -> str:
+    if rsi <= 30 and macd_hist > 0 and mom > 0:
+        return "Buy"
+    elif rsi >= 70 and macd_hist < 0 and mom < 0:
+        return "Sell"
+    elif rsi <= 35 and (macd_hist > 0 or mom > 0):
+        return "Buy"
+    elif rsi >= 65 and (macd_hist < 0 or mom < 0):
+        return "Sell"
+    elif rsi <= 20:
+        return "Buy"
+    elif rsi >= 80:
+        return "Sell"
+    elif mom > 5 and rsi < 50:
+        return "Buy"
+    elif mom < -5 and rsi > 50:
+        return "Sell"
+    return "Neutral"
+
+def scalar_v9_or_v12(rsi: float, macd_hist: float, mom: float) -> str:
+    # The bot ran v12 for symbols whose momentum wasn't available
+    return scalar_v12(rsi, macd_hist) if np.isnan(mom) else scalar_v9(rsi, macd_hist, mom)
+
+def scalar_elite(rsi: float, macd_hist: float, mom: float) -> str:
+    score = 0
+    if rsi <= 25:
+        score += 3
+    elif rsi <= 35:
+        score += 2
+    elif rsi >= 75:
+        score -= 3
+    elif rsi >= 65:
+        score -= 2
+
+    if macd_hist > 0.001:
+        score += 2
+    elif macd_hist > 0:
+        score += 1
+    elif macd_hist < -0.001:
+        score -= 2
+    elif macd_hist < 0:
+        score -= 1
+
+    if mom > 10:
+        score += 2
+    elif mom > 2:
+        score += 1
+    elif mom < -10:
+        score -= 2
+    elif mom < -2:
+        score -= 1
+
+    if score >= 4:
+        return "Buy"
+    elif score <= -4:
+        return "Sell"
+    return "Neutral"
+
+SPECIALS = [np.nan, np.inf, -np.inf, 0.0, -0.0]
+
+def around(values):
+    """Each value plus its nearest float neighbours on both sides"""
+    return [v for value in values for v in (np.nextafter(value, -np.inf), value, np.nextafter(value, np.inf))]
+
+RSI_EDGES = around([20, 25, 30, 35, 40, 50, 60, 65, 70, 75, 80]) + SPECIALS + [-1.0, 101.0]
+MACD_EDGES = around([0.0, 0.001, -0.001]) + SPECIALS + [1e-12, -1e-12]
+MOMENTUM_EDGES = around([0.0, 2, -2, 5, -5, 10, -10]) + SPECIALS
+
+# Registered strategy -> reference
+REFERENCES = {
+    "free": scalar_free, "v3": scalar_v3, "v6": scalar_v6,
+    "v9": scalar_v9_or_v12, "v12": scalar_v12, "elite": scalar_elite,
+    "default": scalar_v12,  # Unknown plans
+}
+
+EDGES = {"rsi": RSI_EDGES, "macd_histogram": MACD_EDGES, "momentum": MOMENTUM_EDGES}
+
+def random_indicators(count: int, seed: int):
+    rng = np.random.default_rng(seed)
+    return {
+        "rsi": rng.uniform(0, 100, count),
+        "macd_histogram": rng.normal(0, 0.002, count),
+        "momentum": rng.normal(0, 8, count),
+    }
+
+def assert_parity(name, columns):
+    strategy = strategies.STRATEGIES[name]
+    arrays = {indicator: np.asarray(columns[indicator], dtype=np.float64) for indicator in strategy.indicators}
+    rows = list(zip(*arrays.values()))
+    expected = [REFERENCES[name](*(float(value) for value in row)) for row in rows]
+    actual = strategies.signal_names(strategy.predict(**arrays)).tolist()
+    mismatches = [(row, e, a) for row, e, a in zip(rows, expected, actual) if e != a]
+    assert not mismatches, f"{name}: {len(mismatches)} mismatches, first {mismatches[:3]}"
+
+def test_every_strategy_has_a_reference():
+    assert sorted(strategies.STRATEGIES) == sorted(REFERENCES)
+
+@pytest.mark.parametrize("name", sorted(REFERENCES))
+def test_threshold_edges(name):
+    arguments = strategies.STRATEGIES[name].indicators
+    grid = list(itertools.product(*(EDGES[argument] for argument in arguments)))
+    assert_parity(name, {argument: [row[i] for row in grid] for i, argument in enumerate(arguments)})
+
+@pytest.mark.parametrize("name", sorted(REFERENCES))
+@pytest.mark.parametrize("seed", range(5))
+def test_random_samples(name, seed):
+    assert_parity(name, random_indicators(20_000, seed))
+
+@pytest.mark.parametrize("name", sorted(REFERENCES))
+def test_integer_thresholds_hit_exactly(name):
+    # Indicator values landing exactly on integer thresholds - the <=/< boundaries
+    rng = np.random.default_rng(11)
+    columns = {
+        "rsi": rng.integers(0, 101, 20_000).astype(float),
+        "macd_histogram": rng.choice([-0.001, -0.0, 0.0, 0.001, 0.002, -0.002], 20_000),
+        "momentum": rng.integers(-12, 13, 20_000).astype(float),
+    }
+    assert_parity(name, columns)
+
+def test_live_thresholds_are_the_defaults():
+    # The threshold keywords added for the grid search must not change live behaviour
+    columns = random_indicators(20_000, 99)
+    rsi, macd, momentum = columns["rsi"], columns["macd_histogram"], columns["momentum"]
+    assert np.array_equal(strategies.predict_v6(rsi, macd), strategies.predict_v6(rsi, macd, 35, 65, 25, 75))
+    assert np.array_equal(strategies.predict_v9(rsi, macd, momentum),
+                          strategies.predict_v9(rsi, macd, momentum, 30, 70, 35, 65, 20, 80, 5, 50))
+    assert np.array_equal(strategies.predict_elite(rsi, macd, momentum),
+                          strategies.predict_elite(rsi, macd, momentum, 25, 35, 65, 75, 0.001, 2, 10, 4))
+
+def test_v9_falls_back_to_v12_without_momentum():
+    columns = random_indicators(5_000, 3)
+    momentum = columns["momentum"].copy()
+    momentum[::3] = np.nan
+    assert np.isnan(momentum).any()
+    codes = strategies.predict_v9_or_v12(columns["rsi"], columns["macd_histogram"], momentum)
+    expected = [scalar_v9_or_v12(r, m, o) for r, m, o in zip(columns["rsi"], columns["macd_histogram"], momentum)]
+    assert strategies.signal_names(codes).tolist() == expected
@@ -0,0 +1,90 @@
+"""
+Streaming mode end to end against the fake exchange on an ephemeral port:
+seed, a streamed candle close, a dropped connection with a close missed
+while disconnected, and the resync through KlineCache and the candle store
+"""
+
+import asyncio
+
+import numpy as np
+import pytest
+
+import website_trading_bot
+from candle_store import CandleStore
+from fake_exchange import FakeBinanceExchange
+from market_data import INTERVAL_MS
+from website_trading_bot import WebsiteTradingBot
+
+HOUR = INTERVAL_MS["1h"]
+
+async def wait_for(condition, timeout: float = 10.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        if asyncio.get_running_loop().time() > deadline:
+            pytest.fail("timed out waiting for the stream")
+        await asyncio.sleep(0.01)
+
+def test_stream_close_disconnect_and_resync(tmp_path, monkeypatch):
+    monkeypatch.setattr(website_trading_bot, "ROSTER_REFRESH_SECONDS", 3600)
+
+    async def scenario():
+        exchange = FakeBinanceExchange(history=200)
+        exchange.add_symbol("BTCUSDT")
+        await exchange.start()
+
+        bot = WebsiteTradingBot(streaming=True)
+        bot.api_url, bot.stream_url = exchange.api_url, exchange.stream_url
+        bot.kline_cache.clock = exchange.clock
+        bot.kline_cache.store = CandleStore(str(tmp_path))
+        bot.running = True
+
+        analyzed = []
+
+        async def analyze_symbol(symbol, watchers, klines=None):
+            analyzed.append((symbol, int(klines["timestamp"][-1]), len(watchers)))
+
+        async def nothing(*args):
+            pass
+
+        monkeypatch.setattr(bot, "get_active_subscriptions", lambda: [{"user_id": 1, "coins": ["BTC"]}])
+        monkeypatch.setattr(bot, "analyze_symbol", analyze_symbol)
+        monkeypatch.setattr(bot, "refresh_symbol_index", nothing)
+        monkeypatch.setattr(bot, "refresh_ticker_prices", nothing)
+
+        loop_task = asyncio.ensure_future(bot.streaming_loop())
+        try:
+            await wait_for(lambda: bot.kline_stream is not None and bot.kline_stream.connected
+                           and exchange.clients)
+            stream = bot.kline_stream
+            seeded = stream.last_closed_open_time("BTCUSDT")
+            assert seeded == exchange.klines["BTCUSDT"][-2][0]
+
+            # A close pushed over the stream
+            await exchange.close_candle("BTCUSDT")
+            await wait_for(lambda: len(analyzed) == 1)
+            assert analyzed[0] == ("BTCUSDT", seeded + HOUR, 1)
+
+            # Drop the connection and close a candle nobody hears about
+            await exchange.drop_connections()
+            await wait_for(lambda: not stream.connected)
+            await exchange.close_candle("BTCUSDT")
+
+            # The reconnect resyncs through the kline cache and evaluates the missed close
+            await wait_for(lambda: len(analyzed) == 2)
+            assert stream.reconnects == 1
+            assert analyzed[1] == ("BTCUSDT", seeded + 2 * HOUR, 1)
+            assert stream.last_closed_open_time("BTCUSDT") == seeded + 2 * HOUR
+            return bot.kline_cache.store.read("BTCUSDT", "1h"), seeded
+        finally:
+            bot.running = False
+            loop_task.cancel()
+            await asyncio.gather(loop_task, return_exceptions=True)
+            await bot.kline_stream.stop()
+            await bot.close_http_session()
+            await exchange.stop()
+
+    stored, seeded = asyncio.run(scenario())
+    # Both closes reached the store after the seeded history, with no gaps
+    assert int(stored["timestamp"][-1]) == seeded + 2 * HOUR
+    assert len(stored) >= 100
+    assert (np.diff(stored["timestamp"]) == HOUR).all()
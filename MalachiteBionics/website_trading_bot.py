@@ -6,14 +6,24 @@ Connects to your existing Flask app database
 
 import asyncio
 import aiohttp
-import pandas as pd
+import numpy as np
 import sqlite3
 import os
+import random
 import logging
 from datetime import datetime, timedelta
 import traceback
 import json
-from typing import List, Dict, Optional
+from collections import namedtuple
+from functools import partial
+from typing import Awaitable, Callable, List, Dict, Optional, Tuple
+from market_data import KlineCache, KlineStream, Klines, RateLimitGovernor, decode_klines, kline_request_weight
+from candle_store import CandleStore
+from resampler import CandleResampler
+from indicators import IndicatorCache, IndicatorEngine, IndicatorValues, batch_macd, batch_momentum, batch_rsi, latest_indicators
+from strategies import ANALYSIS_CANDLES, requirements, run_strategy
+from indicator_pool import IndicatorPool
+from symbol_index import SymbolIndex, EXCHANGE_INFO_PATH, EXCHANGE_INFO_WEIGHT
 
 # Try to import PostgreSQL support, but fallback to SQLite if not available
 try:
@@ -32,11 +42,153 @@ DATABASE_URL = os.environ.get('DATABASE_URL')
 if DATABASE_URL and DATABASE_URL.startswith('postgres://'):
     DATABASE_URL = DATABASE_URL.replace('postgres://', 'postgresql://', 1)
 
+# Exchange endpoints (overridable to point the bot at fake_exchange.py)
+BINANCE_API_URL = os.environ.get('BINANCE_API_URL', 'https://api.binance.com')
+BINANCE_STREAM_URL = os.environ.get('BINANCE_STREAM_URL', 'wss://stream.binance.com:9443')
+
+# At most this many symbol jobs run at once in a cycle (each evaluates one
+# symbol and serves every user watching it from the result)
+MAX_CONCURRENT_ANALYSES = int(os.environ.get('BOT_MAX_CONCURRENCY', 50))
+
+# Analysis order by plan - lower runs first so premium alerts land first
+# (a symbol job runs at the priority of its highest-plan watcher)
+PLAN_PRIORITY = {
+    'elite': 0, 'premium': 0, 'v12': 0,
+    'v9': 1, 'advanced': 1,
+    'v6': 2, 'classic': 2,
+    'v3': 3, 'basic': 3,
+    'free': 4
+}
+DEFAULT_PLAN_PRIORITY = 5
+
+# Registered strategy (see strategies.py) each plan runs - unknown plans get
+# the v12 algorithm at lower confidence
+PLAN_STRATEGY = {
+    'free': 'free',
+    'v3': 'v3', 'basic': 'v3',
+    'v6': 'v6', 'classic': 'v6',
+    'v9': 'v9', 'advanced': 'v9',
+    'v12': 'v12', 'premium': 'v12', 'elite': 'v12'
+}
+DEFAULT_STRATEGY = 'default'
+
+# One symbol's row of the signal matrix: each active strategy's (signal, confidence)
+# for the candle that closed at open_time
+SignalRow = namedtuple("SignalRow", ["open_time", "rsi", "macd_histogram", "signals"])
+
+# Fewest candles a symbol needs before it is analysed (or its strategies' history if shorter)
+MIN_ANALYSIS_ROWS = 30
+
+# Memory cap for cached indicator values (recomputed only when a candle closes)
+INDICATOR_CACHE_MB = float(os.environ.get('BOT_INDICATOR_CACHE_MB', 16))
+
+# Worker processes for batch indicator evaluation in polling mode (0 keeps it on the event loop)
+INDICATOR_WORKERS = int(os.environ.get('BOT_INDICATOR_WORKERS', 0))
+
+# Bulk ticker prices older than this fall back to the latest kline close
+TICKER_MAX_AGE_SECONDS = 120
+
+# Binance REST request weight allowed per minute per IP
+BINANCE_WEIGHT_LIMIT = int(os.environ.get('BINANCE_WEIGHT_LIMIT', 6000))
+
+# Closed candles are persisted here for warm restarts (empty string disables).
+# On Railway point this at a mounted volume so it survives deploys.
+CANDLE_STORE_DIR = os.environ.get('CANDLE_STORE_DIR', os.path.join(os.path.dirname(__file__), 'candle_data'))
+
+# Streaming mode evaluates on candle close instead of polling every 7 minutes
+STREAMING_MODE = os.environ.get('BOT_STREAMING_MODE', '').lower() in ('1', 'true', 'yes')
+ROSTER_REFRESH_SECONDS = 60  # how often streaming mode re-reads active subscriptions
+
+# Pooled HTTP session settings for exchange traffic
+HTTP_POOL_LIMIT = int(os.environ.get('BOT_HTTP_POOL_LIMIT', 100))
+HTTP_POOL_LIMIT_PER_HOST = int(os.environ.get('BOT_HTTP_POOL_LIMIT_PER_HOST', 20))
+HTTP_KEEPALIVE_TIMEOUT = 60  # seconds an idle connection is kept open
+HTTP_DNS_CACHE_TTL = 300  # seconds a DNS lookup is reused
+
+def plan_priority(user_data: Dict) -> int:
+    return PLAN_PRIORITY.get(user_data.get('plan_type'), DEFAULT_PLAN_PRIORITY)
+
+def plan_strategy(user_data: Dict) -> str:
+    return PLAN_STRATEGY.get(user_data.get('plan_type'), DEFAULT_STRATEGY)
+
+class CycleMarketData:
+    """Per-cycle kline layer shared by every (user, coin) analysis.
+
+    Requests are keyed by (symbol, interval). The first caller for a key starts
+    the fetch and every concurrent caller awaits the same task, so one
+    monitoring cycle costs one exchange request per distinct symbol no matter
+    how many users watch it. All callers receive the same Klines and must
+    treat them as read-only.
+    """
+
+    def __init__(self, fetcher):
+        self._fetcher = fetcher
+        self._requests: Dict[Tuple[str, str], Tuple[int, asyncio.Future]] = {}
+        self.requests_made = 0
+
+    def reset(self):
+        """Drop everything fetched during the previous cycle"""
+        self._requests.clear()
+        self.requests_made = 0
+
+    async def get_klines(self, symbol: str, interval: str, limit: int) -> Optional[Klines]:
+        """Return klines for (symbol, interval), fetching at most once per cycle"""
+        key = (symbol, interval)
+        cached = self._requests.get(key)
+
+        # A caller needing more history than the shared request asked for
+        # replaces it; everyone after that shares the larger request.
+        if cached is None or cached[0] < limit:
+            task = asyncio.ensure_future(self._fetcher(symbol, interval, limit))
+            self._requests[key] = (limit, task)
+            self.requests_made += 1
+        else:
+            task = cached[1]
+
+        # Shield so one cancelled caller doesn't cancel the fetch for the others
+        klines = await asyncio.shield(task)
+        if klines is not None and len(klines) > limit:
+            return klines.tail(limit)
+        return klines
+
 class WebsiteTradingBot:
-    def __init__(self):
+    def __init__(self, streaming: Optional[bool] = None):
         self.db_connection = None
         self.running = False
         self.last_check = None
+        self.candle_store = self.open_candle_store()
+        self.kline_cache = KlineCache(self.fetch_klines, store=self.candle_store)
+        self.market_data = CycleMarketData(self.kline_cache.get_klines)
+        self.http_session = None
+        self.loop = None
+        self.rate_limiter = RateLimitGovernor(weight_limit=BINANCE_WEIGHT_LIMIT)
+        self.ticker_prices: Dict[str, float] = {}
+        self.symbol_index = SymbolIndex()
+        self.indicators = IndicatorEngine(window=ANALYSIS_CANDLES)
+        self.indicator_cache = IndicatorCache(max_bytes=int(INDICATOR_CACHE_MB * 1024 * 1024))
+        self.resampler = CandleResampler(source_interval="1h")
+        self.indicator_pool = IndicatorPool(INDICATOR_WORKERS) if INDICATOR_WORKERS > 0 else None
+        self.signal_matrix: Dict[str, SignalRow] = {}  # Latest row per symbol
+        self.ticker_updated_at = None
+        
+        # Streaming mode state
+        self.streaming = STREAMING_MODE if streaming is None else streaming
+        self.api_url = BINANCE_API_URL
+        self.stream_url = BINANCE_STREAM_URL
+        self.kline_stream = None
+        self.roster: Dict[str, List[Tuple[Dict, str]]] = {}
+        
+    def open_candle_store(self) -> Optional[CandleStore]:
+        """Open the on-disk candle store, or run without one if unavailable"""
+        if not CANDLE_STORE_DIR:
+            return None
+        try:
+            store = CandleStore(CANDLE_STORE_DIR)
+            logger.info(f"Using candle store at {CANDLE_STORE_DIR}")
+            return store
+        except Exception as e:
+            logger.warning(f"Candle store unavailable ({e}) - candles will not be persisted")
+            return None
         
     async def connect_database(self):
         """Connect to database (PostgreSQL or SQLite)"""
@@ -275,9 +427,9 @@ class WebsiteTradingBot:
                     logger.warning(f"Invalid coins JSON for user {user_id}: {e}")
                     continue
                 
-                logger.info(f"Found {len(result)} users with online bots ({sum(1 for u in result if u['is_admin'])} admin, {sum(1 for u in result if not u['is_admin'])} customers)")
-                return result
-                
+            logger.info(f"Found {len(result)} users with online bots ({sum(1 for u in result if u['is_admin'])} admin, {sum(1 for u in result if not u['is_admin'])} customers)")
+            return result
+            
         except Exception as e:
             logger.error(f"Error getting active subscriptions: {e}")
             return []
@@ -371,116 +523,215 @@ class WebsiteTradingBot:
             logger.error(f"Error sending push notification: {e}")
             # Don't let push notification errors break the alert creation
 
-    async def fetch_klines(self, symbol: str, interval: str = "5m", limit: int = 100) -> Optional[pd.DataFrame]:
+    async def open_http_session(self) -> aiohttp.ClientSession:
+        """Open (or reuse) the pooled session shared by all exchange requests"""
+        if self.http_session is None or self.http_session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=HTTP_POOL_LIMIT,
+                limit_per_host=HTTP_POOL_LIMIT_PER_HOST,
+                keepalive_timeout=HTTP_KEEPALIVE_TIMEOUT,
+                ttl_dns_cache=HTTP_DNS_CACHE_TTL
+            )
+            self.http_session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=10)
+            )
+            logger.info(f"Opened pooled HTTP session ({HTTP_POOL_LIMIT_PER_HOST} connections per host)")
+        return self.http_session
+
+    async def close_http_session(self):
+        """Close the pooled HTTP session and its keep-alive connections"""
+        if self.http_session is not None and not self.http_session.closed:
+            await self.http_session.close()
+            logger.info("HTTP session closed")
+        self.http_session = None
+
+    def get_rate_limit_status(self) -> Dict:
+        """How close the bot is running to the exchange's request-weight ceiling"""
+        return self.rate_limiter.snapshot()
+
+    async def fetch_klines(self, symbol: str, interval: str = "5m", limit: int = 100,
+                           start_time: Optional[int] = None) -> Optional[Klines]:
         """Fetch kline data from Binance API (same as your bot)"""
-        url = f"https://api.binance.com/api/v3/klines"
+        url = f"{self.api_url}/api/v3/klines"
         params = {
             "symbol": symbol,
             "interval": interval,
             "limit": limit
         }
+        if start_time is not None:
+            params["startTime"] = start_time  # Delta fetch from this open time
         
         max_retries = 3
         retry_delay = 1
+        session = await self.open_http_session()
         
         for attempt in range(max_retries):
+            # Queue behind the shared weight budget (and any 429/418 pause)
+            window = await self.rate_limiter.acquire(kline_request_weight(limit))
             try:
-                async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=10)) as session:
-                    async with session.get(url, params=params) as resp:
-                        if resp.status == 200:
-                            data = await resp.json()
-                            if not data:
-                                logger.warning(f"Empty data received for {symbol}")
-                                return None
-                            
-                            df = pd.DataFrame([{
-                                "timestamp": int(d[0]),
-                                "open": float(d[1]),
-                                "high": float(d[2]),
-                                "low": float(d[3]),
-                                "close": float(d[4]),
-                                "volume": float(d[5])
-                            } for d in data])
-                            
-                            return df
+                async with session.get(url, params=params) as resp:
+                    self.rate_limiter.observe(resp.status, resp.headers, window)
+                    if resp.status == 400:
+                        # A malformed request - retrying would only spend more weight
+                        try:
+                            body = await resp.json(content_type=None)
+                        except ValueError:
+                            body = None
+                        if isinstance(body, dict) and body.get("code") == -1121:
+                            self.symbol_index.mark_invalid(symbol)  # Invalid symbol
                         else:
-                            logger.warning(f"HTTP {resp.status} for {symbol}, attempt {attempt + 1}")
-                            if attempt < max_retries - 1:
-                                await asyncio.sleep(retry_delay * (attempt + 1))
-                            
+                            logger.warning(f"HTTP 400 for {symbol}: {body}")
+                        return None
+                    elif resp.status == 200:
+                        # Parse the raw body once into NumPy columns (no per-candle dicts)
+                        columns = decode_klines(await resp.read())
+                        if columns is None:
+                            logger.warning(f"Empty data received for {symbol}")
+                            return None
+                        
+                        return Klines(columns)
+                    else:
+                        logger.warning(f"HTTP {resp.status} for {symbol}, attempt {attempt + 1}")
+                        
             except asyncio.TimeoutError:
                 logger.warning(f"Timeout fetching {symbol}, attempt {attempt + 1}")
             except Exception as e:
                 logger.error(f"Error fetching {symbol}, attempt {attempt + 1}: {e}")
                 
             if attempt < max_retries - 1:
-                await asyncio.sleep(retry_delay * (attempt + 1))
+                # Exponential backoff with jitter so retries don't arrive in lockstep
+                await asyncio.sleep(retry_delay * 2 ** attempt + random.uniform(0, retry_delay))
         
         logger.error(f"Failed to fetch data for {symbol} after {max_retries} attempts")
         return None
 
-    def calculate_rsi(self, closes: pd.Series, period: int = 14) -> pd.Series:
+    async def refresh_symbol_index(self):
+        """Reload the tradable-symbol index from exchangeInfo once its TTL expires"""
+        if not self.symbol_index.is_stale():
+            return
+        session = await self.open_http_session()
+        try:
+            window = await self.rate_limiter.acquire(EXCHANGE_INFO_WEIGHT)
+            async with session.get(f"{self.api_url}{EXCHANGE_INFO_PATH}") as resp:
+                self.rate_limiter.observe(resp.status, resp.headers, window)
+                if resp.status != 200:
+                    logger.warning(f"HTTP {resp.status} fetching exchange info")
+                    self.symbol_index.refresh_failed()
+                    return
+                self.symbol_index.load(await resp.json())
+        except Exception as e:
+            logger.error(f"Error fetching exchange info: {e}")
+            self.symbol_index.refresh_failed()
+
+    async def fetch_ticker_prices(self, symbols: List[str]) -> Optional[Dict[str, float]]:
+        """Fetch latest prices for many symbols with one /api/v3/ticker/price call"""
+        url = f"{self.api_url}/api/v3/ticker/price"
+        session = await self.open_http_session()
+        params = {"symbols": json.dumps(sorted(symbols), separators=(',', ':'))}
+        
+        try:
+            window = await self.rate_limiter.acquire(4)
+            async with session.get(url, params=params) as resp:
+                self.rate_limiter.observe(resp.status, resp.headers, window)
+                if resp.status == 400:
+                    # One unknown symbol fails the whole list - fall back to every ticker
+                    window = await self.rate_limiter.acquire(4)
+                    async with session.get(url) as all_resp:
+                        self.rate_limiter.observe(all_resp.status, all_resp.headers, window)
+                        if all_resp.status != 200:
+                            logger.warning(f"HTTP {all_resp.status} fetching ticker prices")
+                            return None
+                        data = await all_resp.json()
+                elif resp.status != 200:
+                    logger.warning(f"HTTP {resp.status} fetching ticker prices")
+                    return None
+                else:
+                    data = await resp.json()
+            
+            wanted = set(symbols)
+            return {t["symbol"]: float(t["price"]) for t in data if t["symbol"] in wanted}
+        except Exception as e:
+            logger.error(f"Error fetching ticker prices: {e}")
+            return None
+
+    async def refresh_ticker_prices(self, symbols: List[str]):
+        """Refresh the shared price snapshot used for alerts"""
+        if not symbols:
+            return
+        prices = await self.fetch_ticker_prices(symbols)
+        if prices:
+            self.ticker_prices.update(prices)
+            self.ticker_updated_at = datetime.utcnow()
+
+    def get_current_price(self, symbol: str, klines: Klines) -> float:
+        """Latest price from the ticker snapshot, or the last kline close if stale"""
+        price = self.ticker_prices.get(symbol)
+        if price is not None and self.ticker_updated_at is not None:
+            age = (datetime.utcnow() - self.ticker_updated_at).total_seconds()
+            if age <= TICKER_MAX_AGE_SECONDS:
+                return price
+        return float(klines["close"][-1])
+
+    async def get_resampled_klines(self, symbol: str, interval: str, limit: int = ANALYSIS_CANDLES,
+                                   include_forming: bool = False) -> Optional[Klines]:
+        """4h/12h/1d/1w candles built locally from 1h candles - no extra exchange weight.
+
+        Every registered strategy runs on 1h candles, so nothing in the bot
+        calls this yet; higher-timeframe strategies should read their candles here.
+        """
+        if not self.resampler.has(symbol) and self.candle_store is not None:
+            # Long history comes from the store; the live window only extends it
+            self.resampler.update(symbol, self.candle_store.read(symbol, "1h", limit=self.resampler.history_needed()))
+        
+        if self.kline_stream is not None:
+            hourly = self.kline_stream.get_klines(symbol)
+        else:
+            hourly = await self.market_data.get_klines(symbol, interval="1h", limit=ANALYSIS_CANDLES + 1)
+            if hourly is not None:
+                hourly = hourly[hourly["timestamp"] + self.resampler.source_ms <= self.kline_cache.clock()]
+        self.resampler.update(symbol, hourly)
+        return self.resampler.get_klines(symbol, interval, limit, include_forming)
+
+    def calculate_rsi(self, closes: np.ndarray, period: int = 14) -> np.ndarray:
         """Calculate RSI (your v12 algorithm)"""
         try:
+            closes = np.asarray(closes, dtype=np.float64)
             if len(closes) < period + 1:
                 logger.warning(f"Insufficient data for RSI calculation: {len(closes)} < {period + 1}")
-                return pd.Series([50] * len(closes), index=closes.index)
-            
-            delta = closes.diff()
-            gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
-            loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
-            rs = gain / loss
-            rsi = 100 - (100 / (1 + rs))
-            return rsi.fillna(50)
+                return np.full(len(closes), 50.0)
+            
+            return batch_rsi(closes[np.newaxis], period)[0]
         except Exception as e:
             logger.error(f"Error calculating RSI: {e}")
-            return pd.Series([50] * len(closes), index=closes.index)
+            return np.full(len(closes), 50.0)
 
-    def calculate_macd(self, series: pd.Series, short_span: int = 12, long_span: int = 26, signal_span: int = 9):
+    def calculate_macd(self, series: np.ndarray, short_span: int = 12, long_span: int = 26, signal_span: int = 9):
         """Calculate MACD (your v12 algorithm)"""
         try:
+            series = np.asarray(series, dtype=np.float64)
             if len(series) < long_span:
                 logger.warning(f"Insufficient data for MACD calculation: {len(series)} < {long_span}")
-                return pd.Series([0] * len(series), index=series.index), \
-                       pd.Series([0] * len(series), index=series.index), \
-                       pd.Series([0] * len(series), index=series.index)
+                return np.zeros(len(series)), np.zeros(len(series)), np.zeros(len(series))
             
-            ema_short = series.ewm(span=short_span, adjust=False).mean()
-            ema_long = series.ewm(span=long_span, adjust=False).mean()
-            macd_line = ema_short - ema_long
-            signal_line = macd_line.ewm(span=signal_span, adjust=False).mean()
-            histogram = macd_line - signal_line
-            
-            return macd_line, signal_line, histogram
+            macd_line, signal_line, histogram = batch_macd(series[np.newaxis], short_span, long_span, signal_span)
+            return macd_line[0], signal_line[0], histogram[0]
         except Exception as e:
             logger.error(f"Error calculating MACD: {e}")
-            return pd.Series([0] * len(series), index=series.index), \
-                   pd.Series([0] * len(series), index=series.index), \
-                   pd.Series([0] * len(series), index=series.index)
+            return np.zeros(len(series)), np.zeros(len(series)), np.zeros(len(series))
 
-    def calculate_momentum(self, series: pd.Series, period: int = 10) -> pd.Series:
+    def calculate_momentum(self, series: np.ndarray, period: int = 10) -> np.ndarray:
         """Calculate momentum (same as your bot)"""
         try:
+            series = np.asarray(series, dtype=np.float64)
             if len(series) < period + 1:
                 logger.warning(f"Insufficient data for momentum calculation: {len(series)} < {period + 1}")
-                return pd.Series([0] * len(series), index=series.index)
+                return np.zeros(len(series))
             
-            return series - series.shift(period)
+            return batch_momentum(series[np.newaxis], period)[0]
         except Exception as e:
             logger.error(f"Error calculating momentum: {e}")
-            return pd.Series([0] * len(series), index=series.index)
-
-    def calculate_confidence(self, rsi_val: float, macd_val: float) -> float:
-        """Calculate confidence score (your v12 algorithm)"""
-        try:
-            # Confidence based on how far RSI is from 50 and MACD histogram magnitude
-            rsi_conf = abs(rsi_val - 50) / 50  # normalized 0 to 1
-            macd_conf = min(abs(macd_val) * 10, 1)  # scale MACD and cap at 1
-            combined_conf = (rsi_conf + macd_conf) / 2
-            return combined_conf * 100  # scale to 0-100
-        except Exception as e:
-            logger.error(f"Error calculating confidence: {e}")
-            return 50.0
+            return np.zeros(len(series))
 
     def update_user_bot_activity(self, user_id: int):
         """Update user's bot last active timestamp"""
@@ -495,240 +746,97 @@ class WebsiteTradingBot:
         except Exception as e:
             logger.error(f"Error updating bot activity for user {user_id}: {e}")
 
-    def predict_free(self, rsi_value: float, macd_histogram: float) -> str:
-        """Free Algorithm - Admin's main_bot_code.py logic (RSI + MACD)"""
-        try:
-            rsi = float(rsi_value)
-            macd_val = float(macd_histogram)
-            
-            # Your main_bot_code.py algorithm: RSI < 30 and MACD > 0 = Buy, RSI > 70 and MACD < 0 = Sell
-            if rsi < 30 and macd_val > 0:
-                return "Buy"
-            elif rsi > 70 and macd_val < 0:
-                return "Sell"
-            else:
-                return "Neutral"
-                
-        except (ValueError, TypeError):
-            return "Neutral"
-
-    def predict_v3(self, rsi_value: float) -> str:
-        """V3 Trading Algorithm - RSI only (your original logic)"""
-        try:
-            rsi = float(rsi_value)
-            
-            if rsi <= 30:
-                return "Buy"
-            elif rsi >= 70:
-                return "Sell"
-            else:
-                return "Neutral"
-                
-        except (ValueError, TypeError):
-            return "Neutral"
-
-    def predict_v12(self, rsi_value: float, macd_histogram: float) -> str:
-        """V12 Trading Algorithm - Your latest algorithm with RSI + MACD"""
-        try:
-            rsi = float(rsi_value)
-            macd_val = float(macd_histogram)
-            
-            # Your v12 algorithm logic: RSI < 30 and MACD > 0 = Buy, RSI > 70 and MACD < 0 = Sell
-            if rsi < 30 and macd_val > 0:
-                return "Buy"
-            elif rsi > 70 and macd_val < 0:
-                return "Sell"
-            else:
-                return "Neutral"
-                
-        except (ValueError, TypeError):
-            return "Neutral"
+    def evaluate_signals(self, symbol: str, klines: Klines, streamed: bool, strategies: set) -> Optional[SignalRow]:
+        """The given strategies' signals for a symbol, computed once per closed candle"""
+        # Indicators use closed candles only; polled frames end with the forming candle
+        timestamps = klines["timestamp"]
+        closed = len(klines) if streamed else len(klines) - 1
+        last_closed = int(timestamps[closed - 1])
+        row = self.signal_matrix.get(symbol)
+        if row is not None and row.open_time == last_closed and strategies <= row.signals.keys():
+            return row
+        
+        needed, candles = requirements(strategies)
+        if "macd_histogram" in needed:
+            # MACD needs the full window, where the incremental engine updates all three at once
+            indicators = self.indicator_cache.get(symbol, "1h", last_closed)
+            if indicators is None:
+                indicators = self.indicators.evaluate(
+                    symbol, "1h", timestamps[:closed], klines["close"][:closed]
+                )
+                self.indicator_cache.put(symbol, "1h", last_closed, indicators)
+        else:
+            # Short-lookback indicators only - computed straight from the last few candles
+            indicators = latest_indicators(klines["close"][:closed][-candles:], needed)
+        
+        if any(np.isnan(getattr(indicators, indicator)) for indicator in needed - {"momentum"}):
+            logger.warning(f"Indicator calculation failed for {symbol}")
+            return None
+        
+        signals = {strategy: run_strategy(strategy, indicators) for strategy in strategies}
+        row = SignalRow(last_closed, indicators.rsi, indicators.macd_histogram, signals)
+        self.signal_matrix[symbol] = row
+        return row
 
-    def predict_v6(self, rsi_value: float, macd_histogram: float) -> str:
-        """V6 Trading Algorithm - RSI + MACD (your original logic)"""
+    async def analyze_symbol(self, symbol: str, watchers: List[Tuple[Dict, str]], klines: Optional[Klines] = None):
+        """Evaluate a symbol once and fan its signals out to every (user, coin) watching it"""
         try:
-            rsi = float(rsi_value)
-            macd_hist = float(macd_histogram)
-            
-            # RSI oversold with positive MACD momentum
-            if rsi <= 35 and macd_hist > 0:
-                return "Buy"
-            
-            # RSI overbought with negative MACD momentum  
-            elif rsi >= 65 and macd_hist < 0:
-                return "Sell"
+            # Update each watcher's bot activity
+            for user_data, _ in watchers:
+                self.update_user_bot_activity(user_data['user_id'])
             
-            # Strong momentum signals regardless of RSI
-            elif rsi <= 25:  # Very oversold
-                return "Buy"
-            elif rsi >= 75:  # Very overbought
-                return "Sell"
+            # Only the strategies these watchers' plans run, and only the
+            # candles the most demanding of them needs
+            strategies = {plan_strategy(user_data) for user_data, _ in watchers}
+            _, candles = requirements(strategies)
             
-            else:
-                return "Neutral"
-                
-        except (ValueError, TypeError):
-            return "Neutral"
+            # Fetch market data (using 1h intervals like your v12 bot), shared
+            # with every other caller for this symbol during the cycle
+            streamed = klines is not None
+            if klines is None:
+                klines = await self.market_data.get_klines(symbol, interval="1h", limit=candles + 1)
+            if klines is None or klines.empty:
+                logger.warning(f"No data available for {symbol}")
+                return
 
-    def predict_v9(self, rsi_value: float, macd_histogram: float, momentum: float) -> str:
-        """V9 Trading Algorithm - RSI + MACD + Momentum (your original logic)"""
-        try:
-            rsi = float(rsi_value)
-            macd_hist = float(macd_histogram)
-            mom = float(momentum)
-            
-            # Strong buy signals - all indicators align
-            if rsi <= 30 and macd_hist > 0 and mom > 0:
-                return "Buy"
-            
-            # Strong sell signals - all indicators align
-            elif rsi >= 70 and macd_hist < 0 and mom < 0:
-                return "Sell"
-            
-            # Medium strength signals - 2 out of 3 indicators
-            elif rsi <= 35 and (macd_hist > 0 or mom > 0):
-                return "Buy"
-            elif rsi >= 65 and (macd_hist < 0 or mom < 0):
-                return "Sell"
-            
-            # Very extreme RSI levels override other indicators
-            elif rsi <= 20:
-                return "Buy"
-            elif rsi >= 80:
-                return "Sell"
-            
-            # Strong momentum with moderate RSI
-            elif mom > 5 and rsi < 50:
-                return "Buy"
-            elif mom < -5 and rsi > 50:
-                return "Sell"
-            
-            else:
-                return "Neutral"
-                
-        except (ValueError, TypeError):
-            return "Neutral"
+            if len(klines) < min(MIN_ANALYSIS_ROWS, candles + (0 if streamed else 1)):  # Minimum data requirement
+                logger.warning(f"Insufficient data for {symbol}: {len(klines)} rows")
+                return
 
-    def predict_elite(self, rsi_value: float, macd_histogram: float, momentum: float) -> str:
-        """Elite Algorithm - Enhanced version for premium users"""
-        try:
-            rsi = float(rsi_value)
-            macd_hist = float(macd_histogram)
-            mom = float(momentum)
-            
-            # Elite algorithm with more sophisticated logic
-            score = 0
-            
-            # RSI scoring
-            if rsi <= 25:
-                score += 3
-            elif rsi <= 35:
-                score += 2
-            elif rsi >= 75:
-                score -= 3
-            elif rsi >= 65:
-                score -= 2
-            
-            # MACD scoring
-            if macd_hist > 0.001:
-                score += 2
-            elif macd_hist > 0:
-                score += 1
-            elif macd_hist < -0.001:
-                score -= 2
-            elif macd_hist < 0:
-                score -= 1
-            
-            # Momentum scoring
-            if mom > 10:
-                score += 2
-            elif mom > 2:
-                score += 1
-            elif mom < -10:
-                score -= 2
-            elif mom < -2:
-                score -= 1
-            
-            # Elite decision logic
-            if score >= 4:
-                return "Buy"
-            elif score <= -4:
-                return "Sell"
-            else:
-                return "Neutral"
-                
-        except (ValueError, TypeError):
-            return "Neutral"
+            row = self.evaluate_signals(symbol, klines, streamed, strategies)
+            if row is None:
+                return
+            current_price = self.get_current_price(symbol, klines)
+        except Exception as e:
+            logger.error(f"Error analyzing {symbol}: {e}")
+            traceback.print_exc()
+            return
+        
+        # Premium plans first so their alerts land first
+        for user_data, coin in sorted(watchers, key=lambda watcher: plan_priority(watcher[0])):
+            self.deliver_signal(user_data, coin, row, current_price)
+
+    async def analyze_coin_for_user(self, user_data: Dict, coin: str, klines: Optional[Klines] = None):
+        """Analyze a specific coin for a specific user (klines given in streaming mode)"""
+        await self.analyze_symbol(SymbolIndex.symbol_for(coin), [(user_data, coin.strip())], klines=klines)
 
-    async def analyze_coin_for_user(self, user_data: Dict, coin: str):
-        """Analyze a specific coin for a specific user"""
+    def deliver_signal(self, user_data: Dict, coin: str, row: SignalRow, current_price: float):
+        """Fan-out step - turn a symbol's signal row into one user's alert"""
         try:
-            symbol = f"{coin.upper()}USDT"
+            symbol = SymbolIndex.symbol_for(coin)
             user_id = user_data['user_id']
             plan_type = user_data['plan_type']
             is_admin = user_data.get('is_admin', False)
             
-            # Update user's bot activity
-            self.update_user_bot_activity(user_id)
-            
-            # Fetch market data (using 1h intervals like your v12 bot)
-            df = await self.fetch_klines(symbol, interval="1h", limit=100)
-            if df is None or df.empty:
-                logger.warning(f"No data available for {symbol}")
-                return
-
-            if len(df) < 30:  # Minimum data requirement
-                logger.warning(f"Insufficient data for {symbol}: {len(df)} rows")
-                return
-
-            # Calculate indicators
-            df["rsi"] = self.calculate_rsi(df["close"])
-            _, _, macd_histogram = self.calculate_macd(df["close"])
-            
-            rsi_val = df["rsi"].iloc[-1]
-            macd_val = macd_histogram.iloc[-1]
-            
-            if pd.isna(rsi_val) or pd.isna(macd_val):
-                logger.warning(f"Indicator calculation failed for {symbol}")
-                return
-
-            current_price = df["close"].iloc[-1]
-            
-            # Calculate confidence
-            confidence = self.calculate_confidence(rsi_val, macd_val)
-            
-            # Get prediction based on user's plan
-            signal = "Neutral"
-            
-            if plan_type == "free":  # Admin gets free version
-                signal = self.predict_free(rsi_val, macd_val)
-                confidence = 80  # Free version confidence
-            elif plan_type in ["basic", "v3"]:  # Basic = V3
-                signal = self.predict_v3(rsi_val)
-                confidence = 80
-            elif plan_type in ["classic", "v6"]:  # Classic = V6
-                signal = self.predict_v6(rsi_val, macd_val)
-                confidence = 85
-            elif plan_type in ["advanced", "v9"]:  # Advanced = V9
-                momentum_series = self.calculate_momentum(df["close"])
-                momentum_val = momentum_series.iloc[-1]
-                if not pd.isna(momentum_val):
-                    signal = self.predict_v9(rsi_val, macd_val, momentum_val)
-                    confidence = 90
-                else:
-                    signal = self.predict_v12(rsi_val, macd_val)  # Fallback to v12
-                    confidence = 90
-            elif plan_type in ["premium", "elite", "v12"]:  # Premium/Elite = V12
-                signal = self.predict_v12(rsi_val, macd_val)  # Premium & Elite use v12 algorithm
-                confidence = 95
-            else:
-                # Default to v12 algorithm for unknown plans
-                signal = self.predict_v12(rsi_val, macd_val)
-                confidence = 85
+            rsi_val = row.rsi
+            macd_val = row.macd_histogram
+            signal, confidence = row.signals[plan_strategy(user_data)]
+            has_macd = not np.isnan(macd_val)  # Not computed when only RSI-based plans watch the symbol
 
             # Log the analysis
             user_type = "ADMIN" if is_admin else "CUSTOMER"
-            logger.info(f"{datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')} - {user_type} {user_data['email']} - {coin.upper()} RSI: {rsi_val:.2f}, MACD: {macd_val:.4f}")
+            macd_text = f", MACD: {macd_val:.4f}" if has_macd else ""
+            logger.info(f"{datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')} - {user_type} {user_data['email']} - {coin.upper()} RSI: {rsi_val:.2f}{macd_text}")
 
             # Create alert if signal is actionable (not Neutral)
             if signal in ["Buy", "Sell"]:
@@ -736,7 +844,8 @@ class WebsiteTradingBot:
                 message = f"{signal.upper()} signal for {symbol}\n"
                 message += f"Algorithm: {plan_type.upper()}\n"
                 message += f"RSI: {rsi_val:.2f}\n"
-                message += f"MACD Histogram: {macd_val:.4f}\n"
+                if has_macd:
+                    message += f"MACD Histogram: {macd_val:.4f}\n"
                 message += f"Confidence Score: {confidence:.1f}/100\n"
                 message += f"Price: ${current_price:.4f}\n"
                 
@@ -765,50 +874,117 @@ class WebsiteTradingBot:
                     logger.error(f"Failed to create alert for user {user_id} - {symbol}")
 
         except Exception as e:
-            logger.error(f"Error analyzing {coin} for user {user_data.get('email', 'unknown')}: {e}")
+            logger.error(f"Error delivering {coin} signal to user {user_data.get('email', 'unknown')}: {e}")
             traceback.print_exc()
 
+    async def run_prioritized(self, jobs: List[Tuple[int, Callable[[], Awaitable]]],
+                              concurrency: int = MAX_CONCURRENT_ANALYSES):
+        """Run (priority, job) pairs on a bounded worker pool, lowest priority first"""
+        queue = asyncio.PriorityQueue()
+        for seq, (priority, job) in enumerate(jobs):
+            queue.put_nowait((priority, seq, job))  # seq keeps FIFO order within a tier
+        
+        async def worker():
+            while True:
+                try:
+                    _, _, job = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                try:
+                    await job()
+                except Exception as e:
+                    logger.error(f"Analysis job failed: {e}")
+        
+        await asyncio.gather(*(worker() for _ in range(min(concurrency, len(jobs)))))
+
+    async def precompute_indicators(self, roster: Dict[str, List[Tuple[Dict, str]]]):
+        """Evaluate every symbol whose newest candle isn't cached yet in one pooled batch"""
+        # Only symbols whose strategies need MACD go through the engine and its cache
+        symbols = [
+            symbol for symbol, watchers in roster.items()
+            if "macd_histogram" in requirements({plan_strategy(user_data) for user_data, _ in watchers})[0]
+        ]
+        frames = await asyncio.gather(
+            *(self.market_data.get_klines(symbol, interval="1h", limit=ANALYSIS_CANDLES + 1) for symbol in symbols),
+            return_exceptions=True
+        )
+        
+        stale = []
+        for symbol, klines in zip(symbols, frames):
+            if not isinstance(klines, Klines) or len(klines) < MIN_ANALYSIS_ROWS:
+                continue  # analyze_coin_for_user logs these
+            # Same closed-candle window as analyze_coin_for_user (polled frames end with the forming candle)
+            closed = klines[:-1]
+            last_closed = int(closed["timestamp"][-1])
+            if self.indicator_cache.get(symbol, "1h", last_closed) is None:
+                stale.append((symbol, last_closed, closed["close"]))
+        if not stale:
+            return
+        
+        values = await self.indicator_pool.evaluate([closes for _, _, closes in stale], length=ANALYSIS_CANDLES)
+        for (symbol, last_closed, _), rsi, histogram, momentum in zip(stale, *values):
+            self.indicator_cache.put(symbol, "1h", last_closed, IndicatorValues(float(rsi), float(histogram), float(momentum)))
+        logger.info(f"Evaluated indicators for {len(stale)} symbols in {self.indicator_pool.workers} worker processes")
+
+    async def run_cycle(self) -> int:
+        """One monitoring cycle over every online user; returns how many were found"""
+        start_time = datetime.utcnow()
+        
+        # Fresh market data for this cycle, fetched once per symbol
+        self.market_data.reset()
+        
+        # Get all users with online bot status
+        active_users = self.get_active_subscriptions()
+        
+        if not active_users:
+            logger.info("No users with online bots found, sleeping...")
+            return 0
+        
+        # One bulk price snapshot for every tradable symbol in the roster
+        await self.refresh_symbol_index()
+        roster = self.build_roster(active_users)  # Tradable symbols only
+        symbols = list(roster)
+        await self.refresh_ticker_prices(symbols)
+        
+        # Optionally batch the indicator math into worker processes first
+        if self.indicator_pool is not None:
+            await self.precompute_indicators(roster)
+        
+        # Evaluate each symbol once and fan out to its watchers, premium plans first
+        admin_count = sum(1 for user_data in active_users if user_data.get('is_admin'))
+        customer_count = len(active_users) - admin_count
+        jobs = [
+            (min(plan_priority(user_data) for user_data, _ in watchers),
+             partial(self.analyze_symbol, symbol, watchers))
+            for symbol, watchers in roster.items()
+        ]
+        
+        if jobs:
+            watching = sum(len(watchers) for watchers in roster.values())
+            logger.info(f"Analyzing {len(jobs)} symbols for {watching} coin-user combinations ({admin_count} admin bots, {customer_count} customer bots, {MAX_CONCURRENT_ANALYSES} at a time)")
+            await self.run_prioritized(jobs)
+        
+        # Update tracking
+        self.last_check = datetime.utcnow()
+        processing_time = (self.last_check - start_time).total_seconds()
+        
+        cache = self.kline_cache
+        budget = self.get_rate_limit_status()
+        logger.info(f"Monitoring cycle completed in {processing_time:.2f}s for {len(active_users)} users ({self.market_data.requests_made} symbols: {cache.full_fetches} full, {cache.delta_fetches} delta, {cache.backfills} backfill fetches so far)")
+        indicators = self.indicators.snapshot()
+        results = self.indicator_cache.snapshot()
+        logger.info(f"Indicator state for {indicators['symbols']} symbols ({indicators['updates']} candle updates, {indicators['reseeds']} reseeds so far); result cache {results['hits']} hits, {results['misses']} misses, {results['entries']} entries, {results['bytes'] / 1024:.0f} KiB")
+        logger.info(f"Request weight {budget['used_weight']}/{budget['weight_limit']} this minute (peak {budget['peak_weight']}, throttled {budget['throttled']}, 429s {budget['rate_limited']}, 418s {budget['banned']})")
+        
+        return len(active_users)
+
     async def monitoring_loop(self):
         """Main monitoring loop - runs continuously"""
         logger.info("Starting website trading bot monitoring loop")
         
         while self.running:
             try:
-                start_time = datetime.utcnow()
-                
-                # Get all users with online bot status
-                active_users = self.get_active_subscriptions()
-                
-                if not active_users:
-                    logger.info("No users with online bots found, sleeping...")
-                    await asyncio.sleep(420)  # 7 minutes
-                    continue
-                
-                # Process each user's coins
-                tasks = []
-                admin_count = 0
-                customer_count = 0
-                
-                for user_data in active_users:
-                    if user_data.get('is_admin'):
-                        admin_count += 1
-                    else:
-                        customer_count += 1
-                        
-                    coins = user_data.get('coins', [])
-                    for coin in coins:
-                        if coin and coin.strip():  # Make sure coin is valid
-                            tasks.append(self.analyze_coin_for_user(user_data, coin.strip()))
-                
-                if tasks:
-                    logger.info(f"Analyzing {len(tasks)} coin-user combinations ({admin_count} admin bots, {customer_count} customer bots)")
-                    await asyncio.gather(*tasks, return_exceptions=True)
-                
-                # Update tracking
-                self.last_check = datetime.utcnow()
-                processing_time = (self.last_check - start_time).total_seconds()
-                
-                logger.info(f"Monitoring cycle completed in {processing_time:.2f}s for {len(active_users)} users")
+                await self.run_cycle()
                 
                 # Wait 7 minutes before next cycle (same as your Discord bot)
                 await asyncio.sleep(420)
@@ -818,6 +994,69 @@ class WebsiteTradingBot:
                 traceback.print_exc()
                 await asyncio.sleep(60)  # Wait 1 minute before retrying
 
+    def build_roster(self, active_users: List[Dict]) -> Dict[str, List[Tuple[Dict, str]]]:
+        """Map each symbol to the (user, coin) pairs watching it"""
+        roster = {}
+        for user_data in active_users:
+            for coin in user_data.get('coins', []):
+                if coin and coin.strip():
+                    symbol = SymbolIndex.symbol_for(coin)
+                    if self.symbol_index.is_invalid(symbol):
+                        continue
+                    roster.setdefault(symbol, []).append((user_data, coin.strip()))
+        return roster
+
+    async def on_candle_closed(self, symbol: str):
+        """Streaming mode - evaluate every watcher of a symbol on its new candle"""
+        klines = self.kline_stream.get_klines(symbol)
+        if klines is None:
+            return
+        
+        # Keep the cache and the candle store in step with the stream
+        await self.kline_cache.record(symbol, "1h", klines.tail(1))
+        
+        watchers = self.roster.get(symbol, [])
+        if not watchers:
+            return
+        
+        logger.info(f"{symbol} candle closed - analyzing for {len(watchers)} users")
+        await self.analyze_symbol(symbol, watchers, klines=klines)
+        self.last_check = datetime.utcnow()
+
+    async def streaming_loop(self):
+        """Streaming mode - keep kline streams subscribed for the active roster"""
+        logger.info("Starting website trading bot streaming loop")
+        
+        # Seeds and resyncs go through the kline cache, so they warm-start from
+        # the candle store and only fetch the candles it is missing
+        session = await self.open_http_session()
+        self.kline_stream = KlineStream(
+            session, self.stream_url,
+            history_loader=self.kline_cache.get_klines,
+            on_candle_closed=self.on_candle_closed,
+            interval="1h",
+            max_candles=ANALYSIS_CANDLES,
+            clock=self.kline_cache.clock
+        )
+        stream_task = asyncio.ensure_future(self.kline_stream.run())
+        
+        try:
+            while self.running:
+                try:
+                    await self.refresh_symbol_index()
+                    active_users = self.get_active_subscriptions()
+                    self.roster = self.build_roster(active_users)
+                    await self.kline_stream.set_symbols(self.roster.keys())
+                    await self.refresh_ticker_prices(list(self.roster))
+                except Exception as e:
+                    logger.error(f"Error refreshing streaming roster: {e}")
+                    traceback.print_exc()
+                
+                await asyncio.sleep(ROSTER_REFRESH_SECONDS)
+        finally:
+            await self.kline_stream.stop()
+            stream_task.cancel()
+
     async def start(self):
         """Start the website trading bot"""
         logger.info("Starting Website Trading Bot...")
@@ -827,11 +1066,18 @@ class WebsiteTradingBot:
         if not database_connected:
             logger.warning("Bot starting in no-database mode - will skip database operations")
         
+        # One pooled session (keep-alive, DNS cache) for the bot's whole life
+        self.loop = asyncio.get_running_loop()
+        await self.open_http_session()
+        
         self.running = True
         
-        # Start monitoring loop
+        # Start monitoring loop (or candle-close streaming)
         try:
-            await self.monitoring_loop()
+            if self.streaming:
+                await self.streaming_loop()
+            else:
+                await self.monitoring_loop()
         except KeyboardInterrupt:
             logger.info("Bot stopped by user")
         except Exception as e:
@@ -839,6 +1085,9 @@ class WebsiteTradingBot:
             traceback.print_exc()
         finally:
             self.running = False
+            await self.close_http_session()
+            if self.indicator_pool is not None:
+                self.indicator_pool.shutdown()
             if self.db_connection:
                 self.db_connection.close()
                 logger.info("Database connection closed")
@@ -849,6 +1098,11 @@ class WebsiteTradingBot:
         """Stop the trading bot"""
         logger.info("Stopping Website Trading Bot...")
         self.running = False
+        
+        # stop() may be called from another thread (e.g. the Flask service), so
+        # hand the session close to the bot's own event loop
+        if self.loop and self.loop.is_running() and self.http_session is not None:
+            asyncio.run_coroutine_threadsafe(self.close_http_session(), self.loop)
 
 async def main():
     """Main entry point"""